@@ -0,0 +1,61 @@
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Consumption windows in days; the longest one bounds how much history is read
+WINDOWS = (30, 90)
+
+_cache_lock = threading.Lock()
+_plan_cache = {}
+
+
+def compute_reorder_plan(stock, consumption, today, lead_time_days=14, safety_days=7):
+    """Usage rates, days of cover and reorder points for the whole catalogue
+
+    stock is the get_current_stock() frame and consumption holds daily issued
+    quantities (item_id, date, quantity). Everything is computed in one
+    vectorized pass over all items.
+    """
+    plan = stock[['id', 'name', 'category', 'minimum_stock', 'current_stock']].copy()
+
+    # Catalogue position of each consumption row, and its age in days
+    positions = pd.Index(plan['id']).get_indexer(consumption['item_id'])
+    dates = pd.to_datetime(consumption['date']).to_numpy(dtype='datetime64[D]')
+    age = (np.datetime64(today, 'D') - dates).astype(int)
+    quantities = consumption['quantity'].to_numpy(dtype=float)
+    known = positions >= 0
+
+    for window in WINDOWS:
+        in_window = known & (age < window)
+        usage = np.bincount(positions[in_window], weights=quantities[in_window], minlength=len(plan))
+        plan[f'usage_{window}d'] = usage
+        plan[f'daily_usage_{window}d'] = usage / window
+
+    daily = plan[f'daily_usage_{WINDOWS[-1]}d'].to_numpy()
+    current = plan['current_stock'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plan['days_of_cover'] = np.where(daily > 0, current / daily, np.inf)
+    plan['reorder_point'] = np.ceil(daily * (lead_time_days + safety_days))
+    plan['reorder_now'] = (daily > 0) & (current <= plan['reorder_point'].to_numpy())
+
+    return plan.sort_values(['reorder_now', 'days_of_cover'], ascending=[False, True])
+
+
+def get_reorder_plan(db, lead_time_days=14, safety_days=7):
+    """Reorder plan for db, cached until the next transaction is recorded"""
+    today = date.today()
+    key = (db.get_data_version(), today, lead_time_days, safety_days)
+    with _cache_lock:
+        cached = _plan_cache.get(db.get_db_path())
+        if cached and cached[0] == key:
+            return cached[1]
+
+    stock = db.get_current_stock()
+    consumption = db.get_daily_consumption(today - timedelta(days=max(WINDOWS) - 1))
+    plan = compute_reorder_plan(stock, consumption, today, lead_time_days, safety_days)
+
+    with _cache_lock:
+        _plan_cache[db.get_db_path()] = (key, plan)
+    return plan
@@ -0,0 +1,188 @@
+import os
+import threading
+
+# auto uses DuckDB when it is installed and SQLite otherwise
+ENGINE_ENV = "INVENTORY_ANALYTICS_ENGINE"
+
+# Long-horizon aggregations, written once for both engines; {transactions} is the row source
+ANALYTICS_QUERIES = {
+    # Same result as get_monthly_transactions() when run over the live table only
+    "monthly_movement": """
+    SELECT
+        substr(t.date, 1, 7) as month,
+        i.name as item_name,
+        i.category,
+        CAST(SUM(CASE WHEN t.transaction_type = 'IN' THEN t.quantity ELSE 0 END) AS BIGINT) as stock_in,
+        CAST(SUM(CASE WHEN t.transaction_type = 'OUT' THEN t.quantity ELSE 0 END) AS BIGINT) as stock_out,
+        CAST(SUM(CASE WHEN t.transaction_type = 'IN' THEN t.quantity ELSE -t.quantity END) AS BIGINT) as net_change
+    FROM {transactions} t
+    JOIN items i ON t.item_id = i.id
+    WHERE t.transaction_type IN ('IN', 'OUT')
+    GROUP BY substr(t.date, 1, 7), i.name, i.category
+    ORDER BY month DESC, i.category NULLS FIRST, i.name
+    """,
+    "consumption_by_destination": """
+    SELECT
+        substr(t.date, 1, 7) as month,
+        t.source_destination as destination,
+        CAST(SUM(t.quantity) AS BIGINT) as quantity,
+        COUNT(*) as issues
+    FROM {transactions} t
+    WHERE t.transaction_type = 'OUT'
+    GROUP BY substr(t.date, 1, 7), t.source_destination
+    ORDER BY month DESC, quantity DESC, destination NULLS FIRST
+    """,
+    "expiry_history": """
+    SELECT
+        substr(t.expiry_date, 1, 7) as expiry_month,
+        CAST(SUM(CASE WHEN t.transaction_type IN ('IN', 'OPENING') THEN t.quantity ELSE 0 END) AS BIGINT) as received,
+        CAST(SUM(CASE WHEN t.transaction_type = 'OUT' THEN t.quantity ELSE 0 END) AS BIGINT) as issued,
+        CAST(SUM(CASE WHEN t.transaction_type IN ('IN', 'OPENING') THEN t.quantity ELSE -t.quantity END) AS BIGINT)
+            as remaining
+    FROM {transactions} t
+    WHERE t.expiry_date IS NOT NULL
+    GROUP BY substr(t.expiry_date, 1, 7)
+    ORDER BY expiry_month DESC
+    """,
+}
+
+# Columns the analytics queries read; the DuckDB copy holds only these
+MIRROR_COLUMNS = "id, item_id, transaction_type, quantity, date, source_destination, expiry_date"
+
+
+class SQLiteAnalytics:
+    """Runs ANALYTICS_QUERIES on the database's own connection"""
+
+    name = "sqlite"
+
+    def query(self, db, name, include_archive=True):
+        include_archive = include_archive and db.get_archive_cutoff() is not None
+        sql = ANALYTICS_QUERIES[name].format(transactions=db._transactions_source(include_archive))
+        with db._attached_archive(include_archive):
+            return db._read_sql(f"analytics_{name}", sql)
+
+
+class DuckDBAnalytics:
+    """Runs ANALYTICS_QUERIES in DuckDB on a columnar copy of items and transactions
+
+    The copy is loaded through the Arrow read path inside one read snapshot
+    and kept per data version. Inserted transactions are appended by id; a
+    full reload only happens when transaction rows were updated or deleted
+    (rewrite_generation, which a restore also moves), the archive changed,
+    or the highest id went down. Items are reloaded whenever
+    items_generation moves.
+    """
+
+    name = "duckdb"
+
+    def __init__(self):
+        import duckdb
+        self._conn = duckdb.connect()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._items_generation = None
+        self._rewrite_generation = None
+        self._max_id = 0
+        self.full_loads = 0
+        self.appends = 0
+
+    def _load(self, table, arrow_table, mode="replace"):
+        # Registered Arrow tables are read without a copy; the CAST pins types for all-NULL columns
+        self._conn.register("arrow_batch", arrow_table)
+        try:
+            select = "SELECT * FROM arrow_batch"
+            if table != "items":
+                select = """SELECT CAST(id AS BIGINT) as id, CAST(item_id AS BIGINT) as item_id,
+                    CAST(transaction_type AS VARCHAR) as transaction_type, CAST(quantity AS BIGINT) as quantity,
+                    CAST(date AS VARCHAR) as date, CAST(source_destination AS VARCHAR) as source_destination,
+                    CAST(expiry_date AS VARCHAR) as expiry_date
+                    FROM arrow_batch"""
+            if mode == "append":
+                self._conn.execute(f"INSERT INTO {table} {select}")
+            else:
+                self._conn.execute(f"CREATE OR REPLACE TABLE {table} AS {select}")
+        finally:
+            self._conn.unregister("arrow_batch")
+
+    def refresh(self, db):
+        """Bring the copy up to the database's current data version"""
+        if db.get_data_version() == self._generation:
+            return
+        with db.read_snapshot() as snapshot:
+            generation, items_generation, rewrite_generation, max_id = snapshot._read_rows(
+                "analytics_generation",
+                """SELECT generation, items_generation, rewrite_generation,
+                    (SELECT COALESCE(MAX(id), 0) FROM main.transactions)
+                FROM data_generation WHERE id = 1""",
+            )[0]
+            if generation == self._generation:
+                return
+            if items_generation != self._items_generation:
+                self._load("items", snapshot._read_arrow(
+                    "analytics_load_items", "SELECT id, name, CAST(category AS TEXT) as category FROM items"
+                ))
+            # Fewer ids than already copied means rows were dropped (e.g. a restore), which appending would miss
+            if rewrite_generation != self._rewrite_generation or max_id < self._max_id:
+                self._load("transactions", snapshot._read_arrow(
+                    "analytics_load_transactions", f"SELECT {MIRROR_COLUMNS} FROM main.transactions"
+                ))
+                # The archive only changes when rows are moved out of transactions, which is a rewrite
+                archive = "archive.transactions" if snapshot._snapshot_archive else "main.transactions WHERE 0"
+                self._load("archived_transactions", snapshot._read_arrow(
+                    "analytics_load_archive", f"SELECT {MIRROR_COLUMNS} FROM {archive}"
+                ))
+                self.full_loads += 1
+            else:
+                self._load("transactions", snapshot._read_arrow(
+                    "analytics_append_transactions",
+                    f"SELECT {MIRROR_COLUMNS} FROM main.transactions WHERE id > ?", [self._max_id],
+                ), mode="append")
+                self.appends += 1
+            self._max_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+            self._generation = generation
+            self._items_generation = items_generation
+            self._rewrite_generation = rewrite_generation
+
+    def query(self, db, name, include_archive=True):
+        with self._lock:
+            self.refresh(db)
+            source = "transactions"
+            if include_archive:
+                # Opening balances summarise the archived rows, as in Database._transactions_source
+                source = """(
+                    SELECT * FROM transactions WHERE transaction_type != 'OPENING'
+                    UNION ALL
+                    SELECT * FROM archived_transactions
+                )"""
+            return self._conn.execute(ANALYTICS_QUERIES[name].format(transactions=source)).df()
+
+
+def duckdb_available():
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_analytics_backend(db_path, engine=None):
+    """The analytics backend for a database file: DuckDB when installed (or asked for), else SQLite"""
+    engine = engine or os.environ.get(ENGINE_ENV, "auto")
+    if engine == "sqlite" or (engine == "auto" and not duckdb_available()):
+        return SQLiteAnalytics()
+    if engine not in ("auto", "duckdb"):
+        raise ValueError(f"Unknown analytics engine: {engine}")
+    key = os.path.abspath(db_path)
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = DuckDBAnalytics()
+        return _backends[key]
+
+
+def run_analytics(db, name, include_archive=True, engine=None):
+    """Result of one ANALYTICS_QUERIES aggregation as a DataFrame"""
+    return get_analytics_backend(db.get_db_path(), engine).query(db, name, include_archive)
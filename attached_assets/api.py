@@ -0,0 +1,318 @@
+import argparse
+import json
+import os
+import queue
+import re
+from contextlib import contextmanager
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from attached_assets.database import Database, default_db_path
+from attached_assets.records import INSUFFICIENT_STOCK, UNKNOWN_ITEM
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1024 * 1024
+
+# Most movements accepted by one /movements request
+MAX_BATCH = 1000
+
+# HTTP status of a single movement that was not written, by IssueResult status
+MOVEMENT_FAILURE_STATUS = {INSUFFICIENT_STOCK: 409, UNKNOWN_ITEM: 404}
+
+
+class ApiError(Exception):
+    """An error reported to the client with an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class DatabasePool:
+    """Reusable Database instances, so requests do not pay for connecting and schema checks"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._idle = queue.LifoQueue()
+        # Create the first instance up front so the schema exists before serving
+        self._idle.put(Database(db_path))
+
+    @contextmanager
+    def connection(self):
+        try:
+            db = self._idle.get_nowait()
+        except queue.Empty:
+            db = Database(self.db_path)
+        try:
+            yield db
+        finally:
+            self._idle.put(db)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().conn.close()
+            except queue.Empty:
+                break
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (date, datetime, pd.Timestamp)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _frame_records(frame):
+    """DataFrame rows as JSON-ready dicts with None for missing values"""
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+
+def _movement_payload(result):
+    return {
+        "status": result.status,
+        "transaction_id": result.transaction_id,
+        "available": result.available,
+    }
+
+
+class InventoryRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints over the Database operations
+
+    GET  /health
+    GET  /items                      ?category=
+    GET  /items/lookup               ?name=
+    GET  /items/<id>
+    GET  /items/<id>/lots
+    GET  /items/<id>/balance         ?expiry_date=
+    GET  /lots/lookup                ?code=
+    GET  /stock
+    POST /stock/in                   {item_id | item_name, quantity, expiry_date, source, barcode, ...}
+    POST /stock/out                  {item_id | item_name, quantity, expiry_date, destination, ...}
+    POST /movements                  {"movements": [{type: IN|OUT, ...}, ...]}
+    """
+
+    # Keep-alive lets scanners and robots reuse one connection for many requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY each response waits on a delayed ACK
+    disable_nagle_algorithm = True
+    server_version = "InventoryAPI/1.0"
+
+    ROUTES = [
+        ("GET", re.compile(r"^/health$"), "health"),
+        ("GET", re.compile(r"^/items$"), "list_items"),
+        ("GET", re.compile(r"^/items/lookup$"), "lookup_item"),
+        ("GET", re.compile(r"^/items/(\d+)$"), "get_item"),
+        ("GET", re.compile(r"^/items/(\d+)/lots$"), "get_lots"),
+        ("GET", re.compile(r"^/items/(\d+)/balance$"), "get_balance"),
+        ("GET", re.compile(r"^/lots/lookup$"), "lookup_lot"),
+        ("GET", re.compile(r"^/stock$"), "current_stock"),
+        ("POST", re.compile(r"^/stock/in$"), "stock_in"),
+        ("POST", re.compile(r"^/stock/out$"), "stock_out"),
+        ("POST", re.compile(r"^/movements$"), "movements"),
+    ]
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            # The body is always consumed first so the kept-alive connection stays in sync
+            raw_body = self._read_raw_body() if method == "POST" else None
+            self._check_token()
+            for route_method, pattern, handler in self.ROUTES:
+                match = pattern.match(url.path)
+                if match and route_method == method:
+                    break
+            else:
+                raise ApiError(404, f"No route for {method} {url.path}")
+            body = self._parse_body(raw_body) if method == "POST" else None
+            with self.server.pool.connection() as db:
+                status, payload = getattr(self, handler)(db, body, *match.groups())
+        except ApiError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception as e:
+            print(f"API error on {method} {self.path}: {e}")
+            status, payload = 500, {"error": "Internal server error"}
+        self._send_json(status, payload)
+
+    def _check_token(self):
+        token = self.server.token
+        if token and self.headers.get("Authorization") != f"Bearer {token}":
+            raise ApiError(401, "Missing or invalid API token")
+
+    def _read_raw_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            self.close_connection = True
+            raise ApiError(413, "Request body too large")
+        return self.rfile.read(length)
+
+    def _parse_body(self, raw_body):
+        try:
+            body = json.loads(raw_body or b"{}")
+        except ValueError:
+            raise ApiError(400, "Request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        return body
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, default=_json_default).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _item_id(self, db, body):
+        """Resolve item_id or item_name in a request body"""
+        if body.get("item_id") is not None:
+            return body["item_id"]
+        if body.get("item_name"):
+            item = db.get_item_by_name(body["item_name"])
+            if item is None:
+                raise ApiError(404, f"Unknown item: {body['item_name']}")
+            return item.id
+        raise ApiError(400, "item_id or item_name is required")
+
+    def _movement(self, db, body, movement_type):
+        movement = dict(body, type=movement_type, item_id=self._item_id(db, body))
+        if movement.get("created_by") is None:
+            movement["created_by"] = "api"
+        return movement
+
+    def _record(self, db, movements):
+        try:
+            return db.record_movements(movements)
+        except (ValueError, TypeError) as e:
+            raise ApiError(400, str(e))
+
+    # Handlers return (status, payload)
+
+    def health(self, db, body):
+        return 200, {"status": "ok"}
+
+    def list_items(self, db, body):
+        return 200, _frame_records(db.get_items(self.query.get("category")))
+
+    def lookup_item(self, db, body):
+        if not self.query.get("name"):
+            raise ApiError(400, "name is required")
+        item = db.get_item_by_name(self.query["name"])
+        if item is None:
+            raise ApiError(404, f"Unknown item: {self.query['name']}")
+        return 200, item._asdict()
+
+    def get_item(self, db, body, item_id):
+        item = db.get_item(item_id)
+        if item is None:
+            raise ApiError(404, f"Unknown item: {item_id}")
+        return 200, item._asdict()
+
+    def get_lots(self, db, body, item_id):
+        return 200, [lot._asdict() for lot in db.get_item_lots(item_id)]
+
+    def get_balance(self, db, body, item_id):
+        if not self.query.get("expiry_date"):
+            raise ApiError(400, "expiry_date is required")
+        expiry_date = self.query["expiry_date"]
+        return 200, {
+            "item_id": int(item_id),
+            "expiry_date": expiry_date,
+            "available_stock": db.get_available_stock(item_id, expiry_date),
+        }
+
+    def lookup_lot(self, db, body):
+        """Lots matching a scanned batch number or barcode"""
+        if not self.query.get("code"):
+            raise ApiError(400, "code is required")
+        lots = db.lookup_lot(self.query["code"])
+        if not lots:
+            raise ApiError(404, f"No lot matches {self.query['code']}")
+        return 200, [lot._asdict() for lot in lots]
+
+    def current_stock(self, db, body):
+        return 200, _frame_records(db.get_current_stock())
+
+    def stock_in(self, db, body):
+        result = self._record(db, [self._movement(db, body, "IN")])[0]
+        if result:
+            return 201, _movement_payload(result)
+        return MOVEMENT_FAILURE_STATUS.get(result.status, 500), _movement_payload(result)
+
+    def stock_out(self, db, body):
+        result = self._record(db, [self._movement(db, body, "OUT")])[0]
+        if result:
+            return 201, _movement_payload(result)
+        return MOVEMENT_FAILURE_STATUS.get(result.status, 500), _movement_payload(result)
+
+    def movements(self, db, body):
+        """Record a batch of movements in one commit; failures are reported per movement"""
+        movements = body.get("movements")
+        if not isinstance(movements, list) or not movements:
+            raise ApiError(400, "movements must be a non-empty list")
+        if len(movements) > MAX_BATCH:
+            raise ApiError(413, f"At most {MAX_BATCH} movements per request")
+        if not all(isinstance(movement, dict) for movement in movements):
+            raise ApiError(400, "Each movement must be a JSON object")
+        resolved = [self._movement(db, movement, str(movement.get("type", "")).upper()) for movement in movements]
+        results = self._record(db, resolved)
+        return 200, {
+            "recorded": sum(1 for result in results if result),
+            "results": [_movement_payload(result) for result in results],
+        }
+
+
+class InventoryServer(ThreadingHTTPServer):
+    """Threaded HTTP server sharing a pool of Database connections"""
+
+    daemon_threads = True
+
+    def __init__(self, address, db_path=None, token=None, quiet=False):
+        self.pool = DatabasePool(db_path or default_db_path())
+        self.token = token
+        self.quiet = quiet
+        super().__init__(address, InventoryRequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the inventory database as a JSON HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--db", help="database file (default: INVENTORY_DB_PATH or the app's database)")
+    parser.add_argument("--quiet", action="store_true", help="do not log each request")
+    args = parser.parse_args(argv)
+
+    # Clients must send "Authorization: Bearer <token>" when INVENTORY_API_TOKEN is set
+    server = InventoryServer((args.host, args.port), args.db, os.environ.get("INVENTORY_API_TOKEN"), args.quiet)
+    print(f"Inventory API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
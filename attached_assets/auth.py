@@ -37,6 +37,8 @@ def check_password():
         db = Database()
         if db.verify_user(username, password):
             st.session_state.authenticated = True
+            st.session_state.username = username
+            st.session_state.role = db.get_user_role(username)
             st.rerun()
         else:
             st.error("Invalid username or password")
@@ -1,20 +1,21 @@
 import sqlite3
 import os
-import shutil
 from datetime import datetime
 import streamlit as st
 import zipfile
+from attached_assets.database import Database, default_db_path, read_generations
+from attached_assets.catalogue import get_catalogue
 
 class BackupManager:
-    def __init__(self, db_path='attached_assets/inventory.db', backup_dir='backups'):
-        self.db_path = db_path
+    def __init__(self, db_path=None, backup_dir='backups'):
+        self.db_path = db_path or default_db_path()
         self.backup_dir = backup_dir
         
         if not os.path.exists(backup_dir):
             os.makedirs(backup_dir)
             
-    def create_backup(self):
-        """Create a backup of the database"""
+    def create_backup(self, progress=None):
+        """Create a backup of the database; progress(status, remaining, total) is called as pages are copied"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_path = os.path.join(self.backup_dir, f'inventory_backup_{timestamp}.db')
         
@@ -22,8 +23,8 @@ class BackupManager:
             # Create backup directory if it doesn't exist
             os.makedirs(self.backup_dir, exist_ok=True)
             
-            # Copy database file
-            shutil.copy2(self.db_path, backup_path)
+            # Copy the database through SQLite so changes still in the WAL file are included
+            self._copy_database(self.db_path, backup_path, progress)
             
             # Create ZIP archive
             zip_path = backup_path + '.zip'
@@ -39,7 +40,7 @@ class BackupManager:
             st.error(f"Backup failed: {str(e)}")
             return None
             
-    def restore_backup(self, backup_file):
+    def restore_backup(self, backup_file, progress=None):
         """Restore database from backup"""
         try:
             # Extract ZIP file
@@ -48,14 +49,24 @@ class BackupManager:
                 
             # Get extracted DB file
             db_file = os.path.splitext(backup_file)[0]
+
+            # Bring the backup's schema up to date and its counters past the live database's,
+            # so nothing cached for a generation before the restore is served after it
+            restored = Database(db_file)
+            try:
+                restored.advance_generations(read_generations(self.db_path))
+            finally:
+                restored.conn.close()
             
             # Close current database connection
             # This assumes the database connection is stored in session state
             if 'db' in st.session_state:
                 st.session_state.db.conn.close()
                 
-            # Replace current DB with backup
-            shutil.copy2(db_file, self.db_path)
+            # Replace current DB with backup; going through SQLite keeps other open connections consistent
+            self._copy_database(db_file, self.db_path, progress)
+            # Cached items belong to the replaced database
+            get_catalogue(self.db_path).invalidate()
             
             # Remove extracted file
             os.remove(db_file)
@@ -66,6 +77,34 @@ class BackupManager:
             st.error(f"Restore failed: {str(e)}")
             return False
             
+    def _copy_database(self, source_path, target_path, progress=None):
+        """Copy a SQLite database with the online backup API"""
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            if progress:
+                # Copying in steps lets the caller report progress and lets writers in between
+                source.backup(target, pages=1024, progress=progress)
+            else:
+                source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    def prune_backups(self, keep):
+        """Delete all but the newest keep backups made by create_backup; returns the number deleted"""
+        if keep < 1:
+            raise ValueError("At least one backup must be kept")
+        # Names carry the creation time, so they sort oldest first; uploaded files are left alone
+        made = sorted(
+            file for file in os.listdir(self.backup_dir)
+            if file.startswith('inventory_backup_') and file.endswith('.db.zip')
+        )
+        stale = made[:-keep]
+        for file in stale:
+            os.remove(os.path.join(self.backup_dir, file))
+        return len(stale)
+
     def list_backups(self):
         """List available backups"""
         backups = []
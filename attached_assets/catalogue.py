@@ -0,0 +1,198 @@
+import bisect
+import itertools
+import os
+import threading
+import time
+
+from attached_assets.records import ItemRecord
+
+# A lookup miss reloads the catalogue at most this often, in seconds
+MISS_RELOAD_INTERVAL = 1.0
+
+
+class Catalogue:
+    """In-memory item catalogue for one database, shared by every session in the process
+
+    Holds name -> id and id -> ItemRecord dicts plus a per-category index.
+    It is loaded on first use and kept current by the Database write methods;
+    sync() drops it when the items generation counter moves, so changes made
+    by another process are picked up on the next lookup. A lookup that misses
+    also reloads (at most once a second).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._by_id = {}
+        self._by_name = {}
+        self._by_category = {}
+        self._sorted = {}
+        self._search_index = None
+        self._loaded_at = 0
+        self._items_generation = None
+
+    def _ensure_loaded(self, conn):
+        if not self._loaded:
+            self.reload(conn)
+
+    def reload(self, conn):
+        """Rebuild every index from the items table"""
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, category, minimum_stock FROM items")
+        records = [ItemRecord(*row) for row in cursor.fetchall()]
+        with self._lock:
+            self._by_id = {}
+            self._by_name = {}
+            self._by_category = {}
+            self._sorted = {}
+            # Rebuilt on next search; _add would otherwise index every name into the old one again
+            self._search_index = None
+            for record in records:
+                self._add(record)
+            self._loaded = True
+            self._loaded_at = time.monotonic()
+
+    def _reload_on_miss(self, conn):
+        """Reload after a miss unless the catalogue was just loaded; returns True if it reloaded"""
+        if time.monotonic() - self._loaded_at < MISS_RELOAD_INTERVAL:
+            return False
+        self.reload(conn)
+        return True
+
+    def sync(self, items_generation):
+        """Forget everything if the items table has changed since the last sync"""
+        with self._lock:
+            if items_generation != self._items_generation:
+                self._loaded = False
+                self._items_generation = items_generation
+
+    def invalidate(self):
+        """Forget everything; the next lookup reloads from the database"""
+        with self._lock:
+            self._loaded = False
+
+    def put(self, record, generations=None):
+        """Insert or replace one item, e.g. after add_item or update_item
+
+        generations is the items generation (before, after) the write that
+        produced record. If the catalogue was synced to the first, it is now
+        current at the second, so only writes made elsewhere make sync() reload.
+        """
+        with self._lock:
+            if generations and generations[0] is not None and generations[0] == self._items_generation:
+                self._items_generation = generations[1]
+            if not self._loaded:
+                return
+            old = self._by_id.get(record.id)
+            if old is not None:
+                self._by_name.pop(old.name, None)
+                self._by_category.get(old.category, {}).pop(old.id, None)
+                if self._search_index is not None:
+                    self._unindex_name(old.name)
+            self._add(record)
+
+    def _add(self, record):
+        self._by_id[record.id] = record
+        self._by_name[record.name] = record.id
+        self._by_category.setdefault(record.category, {})[record.id] = record
+        # Sorted name lists are rebuilt on next use; the search index is updated in place
+        self._sorted = {}
+        if self._search_index is not None:
+            self._index_name(record.name)
+
+    def get(self, conn, item_id):
+        self._ensure_loaded(conn)
+        record = self._by_id.get(int(item_id))
+        if record is None and self._reload_on_miss(conn):
+            record = self._by_id.get(int(item_id))
+        return record
+
+    def get_by_name(self, conn, name):
+        self._ensure_loaded(conn)
+        item_id = self._by_name.get(name)
+        if item_id is None and self._reload_on_miss(conn):
+            item_id = self._by_name.get(name)
+        return self._by_id.get(item_id) if item_id is not None else None
+
+    def names(self, conn, category=None):
+        """Item names in display order, optionally for one category"""
+        self._ensure_loaded(conn)
+        with self._lock:
+            if category not in self._sorted:
+                records = self._by_category.get(category, {}).values() if category else self._by_id.values()
+                self._sorted[category] = sorted(record.name for record in records)
+            return list(self._sorted[category])
+
+    def _get_search_index(self):
+        """(lower-case name, name) pairs in sorted order for prefix search, and trigram -> pairs for substrings"""
+        with self._lock:
+            if self._search_index is None:
+                self._search_index = ([], {})
+                for name in self._by_name:
+                    self._index_name(name, sort=False)
+                self._search_index[0].sort()
+            return self._search_index
+
+    def _index_name(self, name, sort=True):
+        keys, trigrams = self._search_index
+        key = (name.lower(), name)
+        if sort:
+            bisect.insort(keys, key)
+        else:
+            keys.append(key)
+        for start in range(len(key[0]) - 2):
+            trigrams.setdefault(key[0][start:start + 3], set()).add(key)
+
+    def _unindex_name(self, name):
+        keys, trigrams = self._search_index
+        key = (name.lower(), name)
+        position = bisect.bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+        for start in range(len(key[0]) - 2):
+            trigrams.get(key[0][start:start + 3], set()).discard(key)
+
+    def search(self, conn, text, limit=20):
+        """Up to limit names containing text, case-insensitively: prefix matches first, then substrings"""
+        self._ensure_loaded(conn)
+        text = text.strip().lower()
+        with self._lock:
+            keys, trigrams = self._get_search_index()
+            if not text:
+                return [name for _, name in keys[:limit]]
+
+            # Prefix matches are a contiguous run of the sorted keys
+            matches = []
+            start = bisect.bisect_left(keys, (text,))
+            for key, name in itertools.islice(keys, start, None):
+                if not key.startswith(text) or len(matches) == limit:
+                    break
+                matches.append(name)
+            if len(matches) == limit:
+                return matches
+
+            # Substring candidates share every trigram of the text; shorter texts fall back to a scan
+            if len(text) >= 3:
+                grams = [trigrams.get(text[i:i + 3], set()) for i in range(len(text) - 2)]
+                candidates = sorted(set.intersection(*grams))
+            else:
+                candidates = keys
+            for key, name in candidates:
+                if text in key and not key.startswith(text):
+                    matches.append(name)
+                    if len(matches) == limit:
+                        break
+            return matches
+
+
+_catalogues = {}
+_catalogues_lock = threading.Lock()
+
+
+def get_catalogue(db_path):
+    """The process-wide catalogue for a database file"""
+    key = os.path.abspath(db_path)
+    with _catalogues_lock:
+        if key not in _catalogues:
+            _catalogues[key] = Catalogue()
+        return _catalogues[key]
@@ -0,0 +1,358 @@
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from datetime import date, datetime
+
+from attached_assets import maintenance
+from attached_assets.backup import BackupManager
+from attached_assets.database import Database, default_db_path
+from attached_assets.export import write_export, write_report_pack
+
+# Rows sent to the writer per transaction during imports
+IMPORT_BATCH_SIZE = 5000
+
+TRANSACTION_TYPES = ("IN", "OUT", "OPENING")
+
+REBUILD_STEPS = ("lots", "snapshots", "analyze", "vacuum")
+
+# Accepted spellings of the item column, including the export's own header
+ITEM_NAME_COLUMNS = ("item_name", "item", "name")
+
+
+class Progress:
+    """Single-line progress report on stderr, redrawn at most a few times a second"""
+
+    def __init__(self, label, total=None, unit="rows"):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.start = time.perf_counter()
+        self.count = 0
+        self.done = None
+        self._last_draw = 0
+
+    def update(self, count, done=None, force=False):
+        """Record progress; done is measured against total and defaults to count"""
+        self.count, self.done = count, done
+        now = time.perf_counter()
+        if not force and now - self._last_draw < 0.25:
+            return
+        self._last_draw = now
+        line = f"\r{self.label}: {count:,} {self.unit}"
+        if self.total:
+            line += f" ({min(done if done is not None else count, self.total) / self.total:.0%})"
+        sys.stderr.write(line + f" [{now - self.start:.1f}s]")
+        sys.stderr.flush()
+
+    def finish(self, count=None, done=None):
+        if count is None:
+            count, done = self.count, self.done
+        self.update(count, done, force=True)
+        sys.stderr.write("\n")
+
+
+def _normalise_header(header):
+    return [str(name or "").strip().lower().replace(" ", "_") for name in header]
+
+
+def _iter_csv(path, progress):
+    """Yield CSV rows as dicts, reporting progress by bytes read"""
+    with open(path, "rb") as raw:
+        progress.total = os.path.getsize(path)
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        reader = csv.reader(text)
+        header = _normalise_header(next(reader, []))
+        for count, row in enumerate(reader, 1):
+            yield dict(zip(header, row))
+            progress.update(count, raw.tell())
+
+
+def _iter_xlsx(path, progress):
+    """Yield the first sheet's rows as dicts without loading the workbook into memory"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0]
+        progress.total = worksheet.max_row
+        rows = worksheet.iter_rows(values_only=True)
+        header = _normalise_header(next(rows, []))
+        for count, row in enumerate(rows, 1):
+            if any(value is not None for value in row):
+                yield dict(zip(header, row))
+            progress.update(count, count)
+    finally:
+        workbook.close()
+
+
+def _iter_file(path, progress):
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        return _iter_xlsx(path, progress)
+    return _iter_csv(path, progress)
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _item_name(record):
+    return next((_text(record.get(column)) for column in ITEM_NAME_COLUMNS if _text(record.get(column))), None)
+
+
+def _date(value):
+    """A date cell or 'YYYY-MM-DD...' string as an ISO date string, or None"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (date, datetime)):
+        return (value.date() if isinstance(value, datetime) else value).isoformat()
+    return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").date().isoformat()
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Rejects:
+    """Counts rejected input rows and prints the first few reasons"""
+
+    def __init__(self, limit=10):
+        self.count = 0
+        self.limit = limit
+
+    def add(self, line, reason):
+        self.count += 1
+        if self.count <= self.limit:
+            sys.stderr.write(f"\nRow {line}: {reason}")
+
+
+def _transaction_rows(db, records, rejects, created_by, create_items):
+    """Turn imported dicts into transaction tuples, resolving item names to ids"""
+    item_ids = {name: db.get_item_by_name(name).id for name in db.get_item_names()}
+    cutoff = db.get_archive_cutoff()
+    # Running lot balances, so an OUT row can't take more than the lot holds after the rows before it
+    balances = db.get_lot_quantities()
+    for line, record in enumerate(records, 2):
+        try:
+            name = _item_name(record)
+            if record.get("item_id") not in (None, ""):
+                item_id = int(record["item_id"])
+            elif name in item_ids:
+                item_id = item_ids[name]
+            elif name and create_items:
+                db.add_item(name, _text(record.get("category")))
+                item_id = item_ids[name] = db.get_item_by_name(name).id
+            else:
+                rejects.add(line, f"unknown item {name!r}")
+                continue
+
+            transaction_type = (_text(record.get("transaction_type")) or "IN").upper()
+            if transaction_type not in TRANSACTION_TYPES:
+                rejects.add(line, f"unknown transaction type {transaction_type!r}")
+                continue
+            quantity = int(float(record.get("quantity")))
+            if quantity <= 0:
+                rejects.add(line, "quantity must be positive")
+                continue
+            day = _date(record.get("date")) or date.today().isoformat()
+            # Closed periods live in the archive and are summarised by opening balances
+            if cutoff and day < cutoff.isoformat():
+                rejects.add(line, f"date {day} is before the archive cutoff {cutoff}")
+                continue
+
+            expiry_date = _date(record.get("expiry_date"))
+            batch_number = _text(record.get("batch_number"))
+            lot = (item_id, expiry_date, batch_number)
+            available = balances.get(lot, 0)
+            if transaction_type == "OUT" and quantity > available:
+                rejects.add(line, f"OUT of {quantity} exceeds the {max(0, available)} held in lot {batch_number!r}")
+                continue
+            balances[lot] = available - quantity if transaction_type == "OUT" else available + quantity
+
+            yield (
+                item_id,
+                transaction_type,
+                quantity,
+                day,
+                _text(record.get("source_destination") or record.get("source") or record.get("destination")),
+                expiry_date,
+                batch_number,
+                _text(record.get("notes")),
+                _text(record.get("created_by")) or created_by,
+                _text(record.get("barcode")),
+            )
+        except (TypeError, ValueError) as e:
+            rejects.add(line, str(e))
+
+
+def _item_rows(records, rejects):
+    for line, record in enumerate(records, 2):
+        name = _item_name(record)
+        if not name:
+            rejects.add(line, "missing item name")
+            continue
+        try:
+            minimum_stock = int(float(record.get("minimum_stock") or 20))
+        except ValueError as e:
+            rejects.add(line, str(e))
+            continue
+        yield name, _text(record.get("category")), minimum_stock
+
+
+def cmd_import(db, args):
+    progress = Progress(f"Importing {os.path.basename(args.file)}", unit="rows read")
+    records = _iter_file(args.file, progress)
+    rejects = _Rejects()
+    imported = 0
+    earliest = None
+
+    if args.type == "items":
+        for chunk in _chunks(_item_rows(records, rejects), args.batch_size):
+            imported += db.import_items(chunk)
+    else:
+        rows = _transaction_rows(db, records, rejects, args.created_by, args.create_items)
+        for chunk in _chunks(rows, args.batch_size):
+            imported += db.import_transactions(chunk)
+            first = min(row[3] for row in chunk)
+            earliest = first if earliest is None else min(earliest, first)
+    progress.finish()
+
+    if earliest:
+        # Back-dated movements make later snapshots stale; the snapshot job rebuilds them
+        dropped = db.invalidate_snapshots(earliest)
+        if dropped:
+            print(f"Dropped {dropped} stale snapshot row(s) from {earliest} onwards")
+    print(f"Imported {imported:,} {args.type}; rejected {rejects.count:,} row(s)")
+    return 1 if rejects.count and not imported else 0
+
+
+def cmd_export(db, args):
+    progress = Progress(f"Exporting {args.type}", unit="rows written")
+    if args.type == "pack":
+        rows = write_report_pack(db, args.output, progress.update)
+    else:
+        rows = write_export(db, args.type, args.output, progress.update)
+    progress.finish(rows)
+    print(f"Wrote {rows:,} row(s) to {args.output}")
+    return 0
+
+
+def _page_progress(label):
+    progress = Progress(label, unit="pages copied")
+
+    def report(status, remaining, total):
+        progress.total = total
+        progress.update(total - remaining)
+        if remaining == 0:
+            progress.finish()
+
+    return report
+
+
+def cmd_backup(db, args):
+    manager = BackupManager(db.get_db_path(), args.backup_dir)
+    path = manager.create_backup(_page_progress("Backing up"))
+    if not path:
+        return 1
+    print(f"Backup written to {path}")
+    return 0
+
+
+def cmd_restore(db, args):
+    # Backups are extracted next to the archive, so the manager works in its directory
+    manager = BackupManager(db.get_db_path(), os.path.dirname(os.path.abspath(args.file)))
+    db.conn.close()
+    if not manager.restore_backup(os.path.abspath(args.file), _page_progress("Restoring")):
+        return 1
+    print(f"Restored {db.get_db_path()} from {args.file}")
+    return 0
+
+
+def cmd_rebuild(db, args):
+    steps = args.steps or ["snapshots", "analyze"]
+    unknown = set(steps) - set(REBUILD_STEPS)
+    if unknown:
+        print(f"Unknown rebuild step(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    if "lots" in steps:
+        start = time.perf_counter()
+        rebuilt = db.rebuild_lots()
+        print(f"Lots: rebuilt {rebuilt:,} lot(s) from transactions in {time.perf_counter() - start:.1f}s")
+    if "snapshots" in steps:
+        start = time.perf_counter()
+        dropped = db.invalidate_snapshots(date.min)
+        created = db.refresh_snapshots()
+        print(f"Snapshots: dropped {dropped:,} row(s), rebuilt {created} month-end snapshot(s) "
+              f"in {time.perf_counter() - start:.1f}s")
+    if "analyze" in steps:
+        start = time.perf_counter()
+        maintenance.analyze(db)
+        maintenance.optimize(db)
+        print(f"Statistics: analyzed in {time.perf_counter() - start:.1f}s")
+    if "vacuum" in steps:
+        start = time.perf_counter()
+        released = maintenance.incremental_vacuum(db, max_pages=2 ** 31 - 1)
+        print(f"Vacuum: released {released:,} page(s) in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m attached_assets.cli",
+                                     description="Bulk inventory jobs without the web app")
+    parser.add_argument("--db", help="database file (default: INVENTORY_DB_PATH or the app's database)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="bulk import a CSV or XLSX file")
+    importer.add_argument("file")
+    importer.add_argument("--type", choices=["transactions", "items"], default="transactions")
+    importer.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="rows per commit")
+    importer.add_argument("--created-by", default="import", help="user recorded on rows without created_by")
+    importer.add_argument("--create-items", action="store_true", help="add unknown item names to the catalogue")
+    importer.set_defaults(func=cmd_import)
+
+    exporter = commands.add_parser("export", help="export stock, transactions or the report pack to CSV or XLSX")
+    exporter.add_argument("type", choices=["stock", "transactions", "pack"],
+                          help="pack writes every report sheet from one snapshot (.xlsx only)")
+    exporter.add_argument("output", help="file to write; the extension picks the format")
+    exporter.set_defaults(func=cmd_export)
+
+    backup = commands.add_parser("backup", help="write a compressed backup")
+    backup.add_argument("--backup-dir", default="backups")
+    backup.set_defaults(func=cmd_backup)
+
+    restore = commands.add_parser("restore", help="replace the database with a backup")
+    restore.add_argument("file", help="backup .zip file")
+    restore.set_defaults(func=cmd_restore)
+
+    rebuild = commands.add_parser("rebuild", help="rebuild derived data (default: snapshots and analyze)")
+    rebuild.add_argument("steps", nargs="*", metavar="{lots,snapshots,analyze,vacuum}")
+    rebuild.set_defaults(func=cmd_rebuild)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "export" and not args.output.lower().endswith((".csv", ".xlsx")):
+        sys.exit("Export file must end in .csv or .xlsx")
+    if args.command == "export" and args.type == "pack" and not args.output.lower().endswith(".xlsx"):
+        sys.exit("The report pack is written as .xlsx")
+    db = Database(args.db or default_db_path())
+    try:
+        return args.func(db, args)
+    finally:
+        db.conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,34 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from attached_assets.utils import format_date, create_monthly_transaction_chart, create_stock_level_chart
-
+from attached_assets.profiling import profiler
+from attached_assets.analytics import get_reorder_plan
+from attached_assets.reports import get_reports
+from attached_assets.records import INSUFFICIENT_STOCK
+from attached_assets import maintenance
+from attached_assets.view_models import filter_stock, stock_totals, lot_key, lot_labels
+from attached_assets.export_jobs import get_export_runner, EXPORT_TYPES, MIME_TYPES
+from attached_assets.analytics_backend import get_analytics_backend, run_analytics
+
+SEARCH_VIEW_COLUMNS = (
+    "item_name", "transaction_type", "quantity", "date", "source_destination",
+    "expiry_date", "batch_number", "barcode", "notes", "created_by", "created_at",
+)
+
+# Searches returning at least this many rows read Arrow batches straight from the cursor.
+# In benchmarks/arrow_read.py the compact frame peaks at 141 MB and compact Arrow at 66 MB for 100k rows;
+# at 10k rows the two are within a few MB and milliseconds of each other
+ARROW_VIEW_MIN_ROWS = 50000
+
+EXPORT_CHOICES = {
+    "Stock Levels": "stock",
+    "Transaction History": "transactions",
+    "Report Pack": "pack",
+}
+
+@st.fragment
 def render_balance_stock(db):
     st.markdown("<h2 class='subheader'>Current Stock Levels</h2>", unsafe_allow_html=True)
 
@@ -13,15 +39,13 @@ def render_balance_stock(db):
     search = st.text_input("🔍 Search Items", key="stock_search")
 
     # Filter data based on search
-    filtered_data = stock_data.copy()
-    if search:
-        filtered_data = filtered_data[filtered_data['name'].str.contains(search, case=False)]
+    filtered_data = filter_stock(stock_data, search)
 
     # Display the stock data with enhanced styling
     if not filtered_data.empty:
         st.markdown('<div class="stock-table">', unsafe_allow_html=True)
         st.dataframe(
-            filtered_data[['name', 'current_stock']],
+            filtered_data,
             column_config={
                 "name": st.column_config.TextColumn(
                     "Item Name",
@@ -43,9 +67,9 @@ def render_balance_stock(db):
         st.info("No items found matching the search criteria.")
 
     # Create metrics for overall inventory status
+    total_items, total_stock = stock_totals(stock_data)
     col1, col2 = st.columns(2)
     with col1:
-        total_items = len(stock_data)
         st.markdown(
             f"""
             <div class="metric-card">
@@ -57,7 +81,6 @@ def render_balance_stock(db):
         )
 
     with col2:
-        total_stock = stock_data['current_stock'].sum()
         st.markdown(
             f"""
             <div class="metric-card" style="background: linear-gradient(135deg, #2ec4b6, #4cc9f0);">
@@ -95,6 +118,7 @@ def render_balance_stock(db):
         st.markdown("</div>", unsafe_allow_html=True)
 
 
+@st.fragment
 def render_stock_in(db):
     st.subheader("📥 Stock In Entry")
 
@@ -104,24 +128,25 @@ def render_stock_in(db):
         st.session_state.stock_in_source = ""
         st.session_state.stock_in_quantity = 1
         st.session_state.stock_in_batch = ""
+        st.session_state.stock_in_barcode = ""
         st.session_state.stock_in_notes = ""
 
     if st.session_state.reset_stock_in_form:
         st.session_state.reset_stock_in_form = False
 
-    items = db.get_items()
-    if not items.empty:
+    if db.get_item_names():
         col1, col2 = st.columns(2)
 
         with col1:
             date = st.date_input("Date of Receipt", key="stock_in_date")
-            item = st.selectbox("Select Item", items['name'], key="stock_in_item")
+            item = item_picker(db, "Select Item", key="stock_in_item")
             quantity = st.number_input("Quantity", min_value=1, key="stock_in_quantity")
             batch = st.text_input("Batch Number", key="stock_in_batch")
 
         with col2:
             expiry_date = st.date_input("Expiry Date", datetime.now() + timedelta(days=365), key="stock_in_expiry")
             source = st.text_input("Received From", key="stock_in_source")
+            barcode = st.text_input("Barcode / GTIN (optional)", key="stock_in_barcode")
             notes = st.text_area("Notes", key="stock_in_notes", height=100)
 
         success_container = st.empty()
@@ -131,12 +156,16 @@ def render_stock_in(db):
                 st.error("Please enter the source!")
                 return
 
+            if not item:
+                st.error("Please select an item!")
+                return
+
             if not batch:
                 st.error("Please enter the batch number!")
                 return
 
-            item_id = items[items['name'] == item].iloc[0]['id']
-            if db.add_stock(item_id, quantity, expiry_date, source, batch, notes):
+            item_id = db.get_item_by_name(item).id
+            if db.add_stock(item_id, quantity, expiry_date, source, batch, notes, barcode=barcode.strip()):
                 success_container.success("Stock added successfully!")
                 st.session_state.refresh_dashboard = True
                 st.session_state.reset_stock_in_form = True
@@ -146,6 +175,53 @@ def render_stock_in(db):
     else:
         st.warning("No items available. Please add items in the Balance Stock section.")
 
+# Most item names sent to the browser by one picker
+ITEM_PICKER_LIMIT = 25
+
+def item_picker(db, label, key):
+    """Search box plus a selectbox holding only the best matches, so large catalogues stay fast"""
+    text = st.text_input(f"Search {label.lower()}", key=f"{key}_search", placeholder="Type part of the item name")
+    # Ask for one extra match to tell whether the list was cut off
+    options = db.search_item_names(text, ITEM_PICKER_LIMIT + 1)
+    truncated = len(options) > ITEM_PICKER_LIMIT
+    options = options[:ITEM_PICKER_LIMIT]
+
+    # Keep the current choice (e.g. set by a scan) selectable while the search text changes
+    current = st.session_state.get(key)
+    if current and current not in options and db.get_item_by_name(current):
+        options.insert(0, current)
+
+    if not options:
+        st.warning(f"No items match '{text}'.")
+        return None
+    item = st.selectbox(label, options, key=key)
+    if truncated:
+        st.caption(f"Showing the first {ITEM_PICKER_LIMIT} matches; type more to narrow the list.")
+    return item
+
+def _apply_stock_out_scan(db):
+    """Select the item and lot matching the scanned code, then clear the scan box for the next scan"""
+    code = st.session_state.stock_out_scan.strip()
+    st.session_state.stock_out_scan = ""
+    if not code:
+        return
+    today = datetime.now().date().isoformat()
+    matches = db.lookup_lot(code)
+    usable = [lot for lot in matches if lot.available_stock > 0 and lot.expiry_date and lot.expiry_date >= today]
+    if not usable:
+        reason = "has no stock left or has expired" if matches else "does not match any batch or barcode"
+        st.session_state.stock_out_scan_message = ("warning", f"Scanned code {code} {reason}.")
+        return
+
+    lot = usable[0]
+    st.session_state.stock_out_item = lot.item_name
+    st.session_state.stock_out_expiry = lot_key(lot)
+    message = f"Selected {lot.item_name}, batch {lot.batch_number}"
+    if len(usable) > 1:
+        message += f" ({len(usable)} lots match; check the batch below)"
+    st.session_state.stock_out_scan_message = ("success", message)
+
+@st.fragment
 def render_stock_out(db):
     st.subheader("📤 Stock Out Entry")
 
@@ -157,38 +233,41 @@ def render_stock_out(db):
     if st.session_state.reset_stock_out_form:
         st.session_state.reset_stock_out_form = False
 
-    items = db.get_items()
-    if not items.empty:
+    if db.get_item_names():
+        # Scanning a lot label fills in the item and batch below
+        st.text_input("Scan Barcode / Batch Number", key="stock_out_scan", on_change=_apply_stock_out_scan, args=(db,),
+                      placeholder="Scan or type a code and press Enter")
+        scan_message = st.session_state.pop("stock_out_scan_message", None)
+        if scan_message:
+            getattr(st, scan_message[0])(scan_message[1])
+
         col1, col2 = st.columns(2)
 
         with col1:
             date = st.date_input("Date", key="stock_out_date")
-            item = st.selectbox("Select Item", items['name'], key="stock_out_item")
+            item = item_picker(db, "Select Item", key="stock_out_item")
 
         if item:
-            item_id = items[items['name'] == item].iloc[0]['id']
-            expiry_dates = db.get_item_expiry_dates(item_id)
+            item_id = db.get_item_by_name(item).id
+            lots = db.get_item_lots(item_id)
 
-            if not expiry_dates.empty:
+            if lots:
                 with col2:
-                    # Create a list of batch/expiry options
-                    batch_expiry_options = expiry_dates.apply(
-                        lambda x: f"Batch: {x['batch_number']} (Expires: {format_date(x['expiry_date'])})", 
-                        axis=1
-                    ).tolist()
-
-                    selected_batch_expiry = st.selectbox(
+                    # Options are lot keys, so the selection survives issues; the stock is read from the fresh lots
+                    lots_by_key = {lot_key(lot): lot for lot in lots}
+                    labels = lot_labels(lots)
+                    if st.session_state.get("stock_out_expiry") not in lots_by_key:
+                        # Kept from another item, or the lot has since run out or expired
+                        st.session_state.pop("stock_out_expiry", None)
+                    selected_key = st.selectbox(
                         "Select Batch/Expiry",
-                        batch_expiry_options,
+                        list(lots_by_key),
+                        format_func=labels.get,
                         key="stock_out_expiry"
                     )
 
-                    # Find the selected row using string matching
-                    selected_idx = batch_expiry_options.index(selected_batch_expiry)
-                    selected_row = expiry_dates.iloc[selected_idx]
-                    actual_expiry = selected_row['expiry_date']
-                    batch_number = selected_row['batch_number']
-                    available_stock = selected_row['available_stock']
+                    actual_expiry, batch_number = selected_key
+                    available_stock = lots_by_key[selected_key].available_stock
 
                     st.info(f"Available Stock: {available_stock}")
 
@@ -208,11 +287,15 @@ def render_stock_out(db):
                                 st.error("Please enter the destination!")
                                 return
 
-                            if db.remove_stock(item_id, quantity, destination, actual_expiry, batch_number, notes):
+                            result = db.remove_stock(item_id, quantity, destination, actual_expiry, batch_number, notes)
+                            if result:
                                 st.success("Stock out recorded successfully!")
                                 st.session_state.refresh_dashboard = True
                                 st.session_state.reset_stock_out_form = True
                                 st.rerun()
+                            elif result.status == INSUFFICIENT_STOCK:
+                                st.error(f"Insufficient stock: only {result.available} left in this batch. "
+                                         "It may have just been issued by another user.")
                             else:
                                 st.error("Failed to record stock out. Please try again.")
                     else:
@@ -222,6 +305,7 @@ def render_stock_out(db):
     else:
         st.warning("No items available. Please add items in the Balance Stock section.")
 
+@st.fragment
 def render_search_filter(db):
     st.subheader("🔍 Search & Filter Transactions")
 
@@ -239,22 +323,29 @@ def render_search_filter(db):
 
     # Get and display filtered transactions
     type_filter = transaction_type if transaction_type != "All" else None
-    transactions = db.search_transactions(start_date, end_date, transaction_type=type_filter)
-
-    if not transactions.empty:
+    # Only the displayed columns, typed compactly: labels as categoricals, dates parsed once.
+    # Large results skip the pandas frame and go from the cursor to Arrow batches
+    large = db.count_transactions(start_date, end_date, transaction_type=type_filter,
+                                  limit=ARROW_VIEW_MIN_ROWS) >= ARROW_VIEW_MIN_ROWS
+    transactions = db.search_transactions(start_date, end_date, transaction_type=type_filter,
+                                          columns=SEARCH_VIEW_COLUMNS, compact=True, arrow=large)
+
+    # len() works for both the DataFrame and the Arrow Table
+    if len(transactions):
         st.dataframe(
             transactions,
             column_config={
-                "date": "Date",
+                "date": st.column_config.DateColumn("Date"),
                 "item_name": "Item",
                 "transaction_type": "Type",
                 "quantity": st.column_config.NumberColumn("Quantity", format="%d"),
                 "source_destination": "Source/Destination",
-                "expiry_date": "Expiry Date",
+                "expiry_date": st.column_config.DateColumn("Expiry Date"),
                 "batch_number": "Batch",
+                "barcode": "Barcode",
                 "notes": "Notes",
                 "created_by": "Created By",
-                "created_at": "Created At"
+                "created_at": st.column_config.DatetimeColumn("Created At")
             },
             hide_index=True,
             use_container_width=True
@@ -264,10 +355,12 @@ def render_search_filter(db):
 
 def render_reports(db):
     st.subheader("📈 Reports")
+    # All sections come from one lot-balance read and one monthly read, cached per data version
+    reports = get_reports(db)
 
     # Expired items report
     st.markdown("### 🚫 Expired Items")
-    expired_items = db.get_expired_items()
+    expired_items = reports.expired
     if not expired_items.empty:
         st.dataframe(
             expired_items,
@@ -284,7 +377,7 @@ def render_reports(db):
 
     # Near expiry report
     st.markdown("### ⚠️ Items Near Expiry (Next 60 Days)")
-    near_expiry = db.get_near_expiry_items()
+    near_expiry = reports.near_expiry
     if not near_expiry.empty:
         st.dataframe(
             near_expiry,
@@ -301,7 +394,7 @@ def render_reports(db):
 
     # Low stock report
     st.markdown("### 📉 Low Stock Items")
-    low_stock = db.get_low_stock_items()
+    low_stock = reports.low_stock
     if not low_stock.empty:
         st.dataframe(
             low_stock,
@@ -317,11 +410,327 @@ def render_reports(db):
     else:
         st.success("No items are below minimum stock levels.")
 
+    # Historical balances
+    render_stock_as_of(db)
+
     # Monthly transaction summary
     st.markdown("### Monthly Transaction Summary")
-    monthly_data = db.get_monthly_transactions()
+    monthly_data = reports.monthly
     if not monthly_data.empty:
         # The chart is rendered directly in the function now
         create_monthly_transaction_chart(monthly_data)
     else:
-        st.info("No transaction data available for summary.")
\ No newline at end of file
+        st.info("No transaction data available for summary.")
+
+    render_long_term_analytics(db)
+
+@st.fragment
+def render_long_term_analytics(db):
+    st.markdown("### 🔭 Long-Term Analytics")
+    # These aggregate the whole history, archive included, so they only run when asked for
+    if not st.checkbox("Show consumption and expiry history", key="long_term_analytics"):
+        return
+
+    backend = get_analytics_backend(db.get_db_path())
+    st.caption(f"Computed with {backend.name}, including archived transactions.")
+
+    st.markdown("#### Consumption by Destination")
+    consumption = run_analytics(db, "consumption_by_destination")
+    if not consumption.empty:
+        st.dataframe(
+            consumption,
+            column_config={
+                "month": "Month",
+                "destination": "Destination",
+                "quantity": st.column_config.NumberColumn("Quantity", format="%d"),
+                "issues": st.column_config.NumberColumn("Issues", format="%d")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+    else:
+        st.info("No stock has been issued yet.")
+
+    st.markdown("#### Expiry History")
+    expiry = run_analytics(db, "expiry_history")
+    if not expiry.empty:
+        st.dataframe(
+            expiry,
+            column_config={
+                "expiry_month": "Expiry Month",
+                "received": st.column_config.NumberColumn("Received", format="%d"),
+                "issued": st.column_config.NumberColumn("Issued", format="%d"),
+                "remaining": st.column_config.NumberColumn("Remaining", format="%d")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+    else:
+        st.info("No transactions with an expiry date yet.")
+
+@st.fragment
+def render_reorder_planning(db):
+    st.subheader("🛒 Reorder Planning")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        lead_time = st.number_input("Supplier Lead Time (days)", min_value=0, value=14, key="reorder_lead_time")
+    with col2:
+        safety_days = st.number_input("Safety Stock (days)", min_value=0, value=7, key="reorder_safety_days")
+    with col3:
+        only_due = st.checkbox("Only items due for reorder", key="reorder_only_due")
+
+    plan = get_reorder_plan(db, lead_time, safety_days)
+    if only_due:
+        plan = plan[plan['reorder_now']]
+
+    due_count = int(plan['reorder_now'].sum())
+    if due_count:
+        st.warning(f"{due_count} item(s) are at or below their reorder point.")
+
+    if not plan.empty:
+        st.dataframe(
+            plan.drop(columns=['id']).replace(np.inf, np.nan),
+            column_config={
+                "name": "Item",
+                "category": "Category",
+                "minimum_stock": st.column_config.NumberColumn("Minimum Stock", format="%d"),
+                "current_stock": st.column_config.NumberColumn("Current Stock", format="%d"),
+                "usage_30d": st.column_config.NumberColumn("Used (30d)", format="%d"),
+                "daily_usage_30d": st.column_config.NumberColumn("Daily Use (30d)", format="%.2f"),
+                "usage_90d": st.column_config.NumberColumn("Used (90d)", format="%d"),
+                "daily_usage_90d": st.column_config.NumberColumn("Daily Use (90d)", format="%.2f"),
+                "days_of_cover": st.column_config.NumberColumn("Days of Cover", format="%.0f"),
+                "reorder_point": st.column_config.NumberColumn("Reorder Point", format="%d"),
+                "reorder_now": st.column_config.CheckboxColumn("Reorder Now")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+    else:
+        st.success("No items are due for reorder.")
+
+@st.fragment
+def render_stock_as_of(db):
+    st.markdown("### 🗓️ Stock As Of Date")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        as_of = st.date_input("As of", datetime.now(), key="stock_as_of_date")
+    with col2:
+        by_lot = st.checkbox("Break down by batch/expiry", key="stock_as_of_by_lot")
+
+    stock = db.get_stock_as_of(as_of, by_lot=by_lot)
+    if not stock.empty:
+        st.dataframe(
+            stock.drop(columns=['id']),
+            column_config={
+                "name": "Item",
+                "category": "Category",
+                "expiry_date": st.column_config.DateColumn("Expiry Date"),
+                "batch_number": "Batch",
+                "stock": st.column_config.NumberColumn("Stock", format="%d")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+    else:
+        st.info(f"No stock was held on {format_date(as_of)}.")
+
+def render_archive_settings(db):
+    """Move closed periods into the archive database"""
+    cutoff = db.get_archive_cutoff()
+    if cutoff:
+        st.caption(f"Transactions before {format_date(cutoff)} are archived.")
+    else:
+        st.caption("No transactions have been archived yet.")
+
+    with st.form("archive_form"):
+        default_cutoff = datetime(datetime.now().year, 1, 1).date()
+        new_cutoff = st.date_input("Archive transactions before", default_cutoff, key="archive_cutoff")
+        submit = st.form_submit_button("Archive")
+
+        if submit:
+            try:
+                with st.spinner("Archiving transactions..."):
+                    archived = db.archive_transactions(new_cutoff)
+                st.success(f"Archived {archived:,} transactions.")
+            except ValueError as e:
+                st.error(str(e))
+
+def render_job_status(scheduler):
+    """Show the background jobs with their last run and allow running one now"""
+    status = pd.DataFrame(scheduler.status())
+    st.dataframe(
+        status,
+        column_config={
+            "job": "Job",
+            "interval_s": st.column_config.NumberColumn("Every (s)", format="%d"),
+            "running": st.column_config.CheckboxColumn("Running"),
+            "runs": "Runs",
+            "failures": "Failures",
+            "last_started": "Last Run",
+            "last_duration_s": st.column_config.NumberColumn("Duration (s)", format="%.2f"),
+            "last_result": "Result",
+            "last_error": "Error",
+            "next_run_in_s": st.column_config.NumberColumn("Next Run In (s)", format="%d")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+    job = st.selectbox("Job", status["job"], key="job_to_run")
+    if st.button("Run Now", key="run_job_now"):
+        if scheduler.run_now(job):
+            st.success(f"Started {job}.")
+        else:
+            st.warning(f"{job} is already running.")
+
+@st.fragment
+def render_maintenance(db):
+    """Storage report and maintenance actions for the database file"""
+    render_maintenance_actions(db)
+
+    # The report scans every page (dbstat), so it only runs while asked for and the fragment keeps it off other reruns
+    if not st.checkbox("Show storage report", key="maintenance_size_report"):
+        return
+    report = maintenance.size_report(db)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("File Size", f"{report['file_bytes'] / 1024 / 1024:,.1f} MB")
+        st.metric("Pages", f"{report['page_count']:,}")
+    with col2:
+        st.metric("Free", f"{report['free_bytes'] / 1024 / 1024:,.1f} MB")
+        st.metric("Free Pages", f"{report['freelist_count']:,}")
+    st.caption(f"Page size {report['page_size']:,} bytes · auto_vacuum {report['auto_vacuum']}")
+
+    if report["objects"]:
+        st.dataframe(
+            pd.DataFrame(report["objects"]),
+            column_config={
+                "name": "Name",
+                "type": "Type",
+                "table": "Table",
+                "pages": st.column_config.NumberColumn("Pages", format="%d"),
+                "bytes": st.column_config.NumberColumn("Bytes", format="%d")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+    else:
+        st.info("Per-table sizes need SQLite's dbstat extension.")
+
+def render_maintenance_actions(db):
+    """Analyze, optimize and vacuum buttons"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("Analyze", key="maintenance_analyze"):
+            with st.spinner("Analyzing..."):
+                maintenance.analyze(db)
+            st.success("Statistics updated.")
+    with col2:
+        if st.button("Optimize", key="maintenance_optimize"):
+            maintenance.optimize(db)
+            st.success("Optimized.")
+    with col3:
+        if st.button("Vacuum", key="maintenance_vacuum"):
+            released = maintenance.incremental_vacuum(db, max_pages=10000)
+            st.success(f"Released {released:,} pages.")
+
+def render_query_diagnostics():
+    """Show per-query profiling statistics collected by the Database layer"""
+    stats = profiler.snapshot()
+    queries = stats["queries"]
+
+    st.caption(f"Collected since {stats['started_at']}")
+    if not queries:
+        st.info("No queries recorded yet.")
+        return
+
+    summary = pd.DataFrame([
+        {
+            "query": name,
+            "calls": q["calls"],
+            "total_ms": q["total_ms"],
+            "mean_ms": q["mean_ms"],
+            "max_ms": q["max_ms"],
+            "mean_rows": q["mean_rows"],
+            "full_scan": bool(q["full_scans"]),
+        }
+        for name, q in queries.items()
+    ]).sort_values("total_ms", ascending=False)
+    st.dataframe(summary, hide_index=True, use_container_width=True)
+
+    selected = st.selectbox("Query Details", summary["query"], key="diagnostics_query")
+    query = queries[selected]
+    st.bar_chart(pd.Series(query["histogram"], name="calls"))
+    for step in query["plan"]:
+        if step in query["full_scans"]:
+            st.warning(f"Full scan: {step}")
+        else:
+            st.text(step)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📥 Export JSON",
+            data=profiler.to_json(),
+            file_name=f"query_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json",
+            key="diagnostics_export"
+        )
+    with col2:
+        if st.button("Reset", key="diagnostics_reset"):
+            profiler.reset()
+            st.rerun()
+
+@st.fragment
+def render_export_panel(db):
+    """Sidebar exports, built in the background and reused until the data changes"""
+    runner = get_export_runner(db.get_db_path())
+    choice = st.selectbox("Export", list(EXPORT_CHOICES), key="export_choice")
+    export_type = EXPORT_CHOICES[choice]
+    formats = EXPORT_TYPES[export_type][1]
+    export_format = st.radio("Format", formats, horizontal=True, key=f"export_format_{export_type}")
+
+    if st.button("Prepare Export", key="prepare_export"):
+        st.session_state.export_job = runner.submit(db, export_type, export_format)
+
+    job = st.session_state.get("export_job")
+    if job is None:
+        return
+    # While the worker runs, only the status below is polled, not the rest of the page
+    st.fragment(_render_export_job, run_every=0.5 if job.running else None)(job)
+
+def _render_export_job(job):
+    if job.running:
+        st.session_state.export_polling = job
+        fraction = job.fraction()
+        label = next(choice for choice, export_type in EXPORT_CHOICES.items() if export_type == job.export_type)
+        text = f"Preparing {label.lower()}: {job.rows:,} rows written ({job.elapsed():.0f}s)"
+        if fraction is None:
+            st.caption(text)
+        else:
+            st.progress(fraction, text=text)
+        return
+    if st.session_state.get("export_polling") is job:
+        # Finished since the last poll: rerun once so polling stops
+        st.session_state.export_polling = None
+        st.rerun()
+    if job.error:
+        st.error(f"Export failed: {job.error}")
+    else:
+        try:
+            with open(job.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            st.info("This export was replaced by a newer one. Please prepare it again.")
+            return
+        st.download_button(
+            label=f"📥 Download {job.format.upper()} File",
+            data=data,
+            file_name=job.download_name(),
+            mime=MIME_TYPES[job.format],
+            key="download_export"
+        )
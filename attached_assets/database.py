@@ -8,8 +8,17 @@ import os
 import sqlite3
 import pandas as pd
 import os
-from datetime import datetime
+from datetime import datetime, date, timedelta
+import copy
 import hashlib
+import time
+from contextlib import contextmanager
+from attached_assets.profiling import profiler, table_names
+from attached_assets.records import ItemRecord, LotRecord, ScannedLot, IssueResult, RECORDED, ISSUED, INSUFFICIENT_STOCK, FAILED, UNKNOWN_ITEM
+from attached_assets.writer import get_writer
+from attached_assets.catalogue import get_catalogue
+from attached_assets.invalidation import get_data_watch
+from attached_assets.frames import compact_frame, compact_table
 
 class Database:
     """Database class to handle all database operations"""
@@ -122,14 +131,177 @@ class Database:
 
 
 
+DEFAULT_DB_PATH = 'attached_assets/inventory.db'
+
+
+def default_db_path():
+    """Path of the inventory database, overridable with INVENTORY_DB_PATH"""
+    return os.environ.get("INVENTORY_DB_PATH", DEFAULT_DB_PATH)
+
+
+# Columns shared by the live transactions table and the archive database
+TRANSACTION_COLUMNS = (
+    "id, item_id, transaction_type, quantity, date, source_destination, "
+    "expiry_date, batch_number, notes, created_by, created_at, barcode"
+)
+
+
+# Output column -> expression for transaction listings over transactions t JOIN items i
+TRANSACTION_VIEW_COLUMNS = {
+    "id": "t.id",
+    "item_name": "i.name",
+    "category": "i.category",
+    "transaction_type": "t.transaction_type",
+    "quantity": "t.quantity",
+    "date": "t.date",
+    "source_destination": "t.source_destination",
+    "expiry_date": "t.expiry_date",
+    "batch_number": "t.batch_number",
+    "notes": "t.notes",
+    "created_by": "t.created_by",
+    "created_at": "t.created_at",
+    "barcode": "t.barcode",
+}
+
+SEARCH_COLUMNS = tuple(column for column in TRANSACTION_VIEW_COLUMNS if column != "category")
+
+
+def _transaction_select(columns):
+    """SELECT list for the given TRANSACTION_VIEW_COLUMNS names"""
+    unknown = set(columns) - set(TRANSACTION_VIEW_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown transaction column(s): {', '.join(sorted(unknown))}")
+    return ",\n            ".join(f"{TRANSACTION_VIEW_COLUMNS[column]} as {column}" for column in columns)
+
+
+# Rows per record batch on the Arrow read path
+ARROW_BATCH_SIZE = 10000
+
+
+def _arrow_array(values):
+    """One column of a fetched chunk as an Arrow array"""
+    import pyarrow as pa
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # SQLite columns can mix storage classes; such a column is read as text
+        return _text_array(values)
+
+
+def _text_array(values):
+    import pyarrow as pa
+    return pa.array([None if value is None else str(value) for value in values], pa.string())
+
+
+def _unify_chunk_types(chunks):
+    """Per-chunk column arrays with every column read as text in all chunks if any chunk read it as text
+
+    _arrow_array types each chunk on its own, so a column holding numbers in
+    one chunk and text in another would otherwise fail to concatenate.
+    """
+    import pyarrow as pa
+    for column in range(len(chunks[0])):
+        types = {arrays[column].type for arrays in chunks} - {pa.null()}
+        if pa.string() in types and len(types) > 1:
+            for arrays in chunks:
+                if arrays[column].type != pa.string():
+                    arrays[column] = _text_array(arrays[column].to_pylist())
+    return chunks
+
+
+def _to_date(value):
+    """Convert a date, datetime or 'YYYY-MM-DD' string to a date"""
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def _month_end(day):
+    """Last day of the month containing day"""
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
 class Database:
-    def __init__(self):
+    def __init__(self, db_path=None):
         # Ensure database file is in the correct location
-        db_path = 'attached_assets/inventory.db'
+        db_path = db_path or default_db_path()
         if not os.path.exists(db_path):
             print(f"Creating new database at {db_path}")
+        self.db_path = db_path
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Set on read_snapshot() copies, which attach the archive for the whole transaction
+        self._in_snapshot = False
+        self._snapshot_archive = False
         self.create_tables()
+        self._apply_migrations()
+
+    def get_db_path(self):
+        """Get the path to the SQLite database file"""
+        return self.db_path
+
+    def _read_sql(self, name, query, params=None):
+        """Run a read query into a DataFrame, recording its cost in the query profiler"""
+        start = time.perf_counter()
+        result = pd.read_sql_query(query, self.conn, params=params)
+        profiler.record(name, time.perf_counter() - start, len(result))
+        if not profiler.has_plan(name):
+            self._record_plan(name, query, params)
+        return result
+
+    def _read_rows(self, name, query, params=None):
+        """Run a read query into a list of tuples, recording its cost in the query profiler"""
+        start = time.perf_counter()
+        cursor = self.conn.cursor()
+        cursor.execute(query, params or [])
+        rows = cursor.fetchall()
+        profiler.record(name, time.perf_counter() - start, len(rows))
+        if not profiler.has_plan(name):
+            self._record_plan(name, query, params)
+        return rows
+
+    def _read_arrow(self, name, query, params=None, batch_size=ARROW_BATCH_SIZE):
+        """Run a read query into a pyarrow Table, building one record batch per fetchmany() chunk
+
+        Rows go from the cursor straight into Arrow arrays, with no pandas
+        object frame in between, which is the form st.dataframe sends.
+        """
+        import pyarrow as pa
+        start = time.perf_counter()
+        cursor = self.conn.cursor()
+        cursor.execute(query, params or [])
+        names = [column[0] for column in cursor.description]
+        chunks = []
+        rows = 0
+        while True:
+            chunk = cursor.fetchmany(batch_size)
+            if not chunk:
+                break
+            rows += len(chunk)
+            chunks.append([_arrow_array(values) for values in zip(*chunk)])
+        if chunks:
+            tables = [
+                pa.Table.from_batches([pa.RecordBatch.from_arrays(arrays, names=names)])
+                for arrays in _unify_chunk_types(chunks)
+            ]
+            # A column that is all NULL in one chunk takes its type from the others
+            result = pa.concat_tables(tables, promote_options="permissive")
+        else:
+            result = pa.table({name: pa.array([], pa.null()) for name in names})
+        profiler.record(name, time.perf_counter() - start, rows)
+        if not profiler.has_plan(name):
+            self._record_plan(name, query, params)
+        return result
+
+    def _record_plan(self, name, query, params=None):
+        """Store the EXPLAIN QUERY PLAN output of a query in the profiler"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("EXPLAIN QUERY PLAN " + query, params or [])
+            plan = [row[3] for row in cursor.fetchall()]
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            tables = {row[0] for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            print(f"Error explaining query {name}: {e}")
+            return
+        profiler.set_plan(name, plan, table_names(query, tables))
 
     def create_tables(self):
         cursor = self.conn.cursor()
@@ -142,7 +314,7 @@ class Database:
         )''')
 
         # Insert default admin user if not exists
-        cursor.execute("INSERT OR IGNORE INTO users VALUES (?, ?)", ("admin", "admin123"))
+        cursor.execute("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)", ("admin", "admin123"))
 
         # Items table with categories
         cursor.execute('''
@@ -171,8 +343,49 @@ class Database:
             FOREIGN KEY (item_id) REFERENCES items (id)
         )''')
 
+        # Per-lot balances at the end of a day, used to answer historical stock queries
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stock_snapshots (
+            snapshot_date DATE NOT NULL,
+            item_id INTEGER NOT NULL,
+            expiry_date DATE,
+            batch_number TEXT,
+            quantity INTEGER NOT NULL,
+            FOREIGN KEY (item_id) REFERENCES items (id)
+        )''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_snapshots_date ON stock_snapshots (snapshot_date)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date)")
+        # Lot balances are summed per item and expiry, including the check made on every issue
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_lot ON transactions (item_id, expiry_date)")
+
+        # Application settings such as the archive location
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )''')
+
         self.conn.commit()
 
+    def _apply_migrations(self):
+        """Apply pending schema migrations, tracked with PRAGMA user_version"""
+        cursor = self.conn.cursor()
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            try:
+                # DDL is transactional in SQLite, so a failed migration leaves nothing behind and can be retried.
+                # Migrations that must run outside a transaction (VACUUM) commit this one first and are idempotent.
+                self.conn.execute("BEGIN IMMEDIATE")
+                migration(self.conn)
+                self.conn.execute(f"PRAGMA user_version = {number}")
+                self.conn.commit()
+            except sqlite3.OperationalError as e:
+                # Another process may hold the database; the migration is retried on next start
+                self.conn.rollback()
+                print(f"Migration {number} ({migration.__name__}) not applied: {e}")
+                break
+
     def verify_user(self, username, password):
         cursor = self.conn.cursor()
         cursor.execute("SELECT * FROM users WHERE username=? AND password=?", (username, password))
@@ -180,20 +393,43 @@ class Database:
         print(f"Verifying user {username}: {'Success' if result else 'Failed'}")
         return result is not None
 
+    def get_user_role(self, username):
+        """Role of a user ('admin' or 'user'), or None for an unknown username"""
+        row = self.conn.execute("SELECT role FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def writer(self):
+        """Single writer thread shared by every Database instance for this file"""
+        return get_writer(self.db_path)
+
+    @property
+    def data_watch(self):
+        """Generation counters of this file as seen by the process"""
+        return get_data_watch(self.db_path)
+
+    @property
+    def catalogue(self):
+        """In-memory item catalogue shared by every Database instance for this file"""
+        catalogue = get_catalogue(self.db_path)
+        # Items changed by another process (or a connection other than the writer) drop the catalogue
+        catalogue.sync(self.data_watch.state()[1])
+        return catalogue
+
+    def _write_item(self, func, *args):
+        """Run an item write in the writer; returns its result and the items generation around it"""
+        return self.writer.execute(_tracking_items_generation, func, *args)
+
     def add_item(self, name, category=None, minimum_stock=20):
-        cursor = self.conn.cursor()
         try:
-            cursor.execute(
-                "INSERT INTO items (name, category, minimum_stock) VALUES (?, ?, ?)",
-                (name, category, minimum_stock)
-            )
-            self.conn.commit()
-            return True
+            item_id, generations = self._write_item(_insert_item, name, category, minimum_stock)
         except sqlite3.IntegrityError:
             return False
+        # Not through self.catalogue: its sync would see this write's generation and drop everything
+        get_catalogue(self.db_path).put(ItemRecord(item_id, name, category, minimum_stock), generations)
+        return True
 
     def update_item(self, item_id, name=None, category=None, minimum_stock=None):
-        cursor = self.conn.cursor()
         updates = []
         params = []
 
@@ -210,8 +446,12 @@ class Database:
         if updates:
             query = f"UPDATE items SET {', '.join(updates)} WHERE id = ?"
             params.append(item_id)
-            cursor.execute(query, params)
-            self.conn.commit()
+            _, generations = self._write_item(_execute, query, params)
+            rows = self._read_rows("refresh_item", """
+            SELECT id, name, category, minimum_stock FROM items WHERE id = ?
+            """, [int(item_id)])
+            if rows:
+                get_catalogue(self.db_path).put(ItemRecord(*rows[0]), generations)
             return True
         return False
 
@@ -222,48 +462,104 @@ class Database:
             query += " WHERE category = ?"
             params.append(category)
         query += " ORDER BY name"
-        return pd.read_sql_query(query, self.conn, params=params)
+        return self._read_sql("get_items", query, params)
 
-    def add_stock(self, item_id, quantity, expiry_date, source, batch_number=None, notes=None, created_by="admin"):
-        cursor = self.conn.cursor()
+    def get_item(self, item_id):
+        """Get a single item as an ItemRecord, or None"""
+        return self.catalogue.get(self.conn, item_id)
+
+    def get_item_by_name(self, name):
+        """Get a single item by its unique name as an ItemRecord, or None"""
+        return self.catalogue.get_by_name(self.conn, name)
+
+    def get_item_names(self, category=None):
+        """Get item names in display order as a plain list"""
+        return self.catalogue.names(self.conn, category)
+
+    def search_item_names(self, text, limit=20):
+        """Item names matching typed text for the item pickers, best matches first"""
+        return self.catalogue.search(self.conn, text, limit)
+
+    def add_stock(self, item_id, quantity, expiry_date, source, batch_number=None, notes=None, created_by="admin",
+                  barcode=None):
         try:
-            cursor.execute("""
-            INSERT INTO transactions 
-            (item_id, transaction_type, quantity, date, source_destination, expiry_date, batch_number, notes, created_by) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (int(item_id), "IN", quantity, datetime.now().date(), source, expiry_date, batch_number, notes, created_by))
-            self.conn.commit()
+            self.writer.execute(
+                _insert_transaction, int(item_id), "IN", quantity, source, expiry_date, batch_number, notes, created_by,
+                barcode or None
+            )
             return True
         except Exception as e:
             print(f"Error adding stock: {e}")
             return False
 
     def remove_stock(self, item_id, quantity, destination, expiry_date, batch_number=None, notes=None, created_by="admin"):
-        cursor = self.conn.cursor()
+        """Issue stock from a lot; returns an IssueResult that is falsy when nothing was issued"""
         try:
-            # If batch number is not provided, try to get it from the item/expiry combination
-            if not batch_number:
-                cursor.execute("""
-                SELECT batch_number FROM transactions 
-                WHERE item_id = ? AND expiry_date = ? AND transaction_type = 'IN'
-                LIMIT 1
-                """, (int(item_id), expiry_date))
-                
-                batch_result = cursor.fetchone()
-                batch_number = batch_result[0] if batch_result else None
-            
-            cursor.execute("""
-            INSERT INTO transactions 
-            (item_id, transaction_type, quantity, date, source_destination, expiry_date, batch_number, notes, created_by) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (int(item_id), "OUT", quantity, datetime.now().date(), destination, expiry_date, batch_number, notes, created_by))
-            self.conn.commit()
-            return True
+            return self.writer.execute(
+                _issue_stock, int(item_id), quantity, destination, expiry_date, batch_number, notes, created_by
+            )
         except Exception as e:
             print(f"Error removing stock: {e}")
-            return False
+            return IssueResult(FAILED, None, None)
+
+    def record_movements(self, movements, created_by="admin"):
+        """Apply many stock movements in one group commit; returns one IssueResult per movement
+
+        Each movement is a dict with type ('IN' or 'OUT'), item_id, quantity and
+        expiry_date, plus optional source/destination, batch_number, barcode, notes and created_by.
+        """
+        # Validate everything before queueing so a bad movement cannot leave the batch half-applied
+        requests = []
+        for movement in movements:
+            missing = [key for key in ("item_id", "quantity", "expiry_date") if movement.get(key) is None]
+            if missing:
+                raise ValueError(f"Movement is missing {', '.join(missing)}")
+            item_id = _whole_number(movement["item_id"], "item_id")
+            quantity = _whole_number(movement["quantity"], "quantity")
+            if quantity <= 0:
+                raise ValueError("Movement quantity must be positive")
+            user = movement.get("created_by") or created_by
+            # The item is checked in the writer's transaction, so it cannot be deleted between check and insert
+            if movement.get("type") == "IN":
+                requests.append((_for_existing_item, _insert_transaction, item_id, "IN", quantity,
+                                 movement.get("source"), movement["expiry_date"], movement.get("batch_number"),
+                                 movement.get("notes"), user, movement.get("barcode")))
+            elif movement.get("type") == "OUT":
+                requests.append((_for_existing_item, _issue_stock, item_id, quantity, movement.get("destination"),
+                                 movement["expiry_date"], movement.get("batch_number"), movement.get("notes"), user))
+            else:
+                raise ValueError(f"Unknown movement type: {movement.get('type')}")
+
+        futures = [self.writer.submit(*request) for request in requests]
+        results = []
+        for future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error recording movement: {e}")
+                result = IssueResult(FAILED, None, None)
+            if not isinstance(result, IssueResult):
+                result = IssueResult(RECORDED, None, result)
+            results.append(result)
+        return results
+
+    def import_items(self, rows):
+        """Insert (name, category, minimum_stock) rows, skipping existing names; returns the number added"""
+        added = self.writer.execute(_insert_items, rows)
+        if added:
+            self.catalogue.invalidate()
+        return added
+
+    def import_transactions(self, rows):
+        """Insert raw transaction rows in one transaction; returns the number inserted
 
-    def get_current_stock(self):
+        Each row is (item_id, transaction_type, quantity, date, source_destination,
+        expiry_date, batch_number, notes, created_by, barcode).
+        """
+        return self.writer.execute(_insert_transactions, rows)
+
+    def get_current_stock(self, arrow=False):
+        """Stock on hand per item; a pyarrow Table read through _read_arrow when arrow is set"""
         query = """
         SELECT 
             i.id,
@@ -271,7 +567,7 @@ class Database:
             i.category,
             i.minimum_stock,
             COALESCE(SUM(CASE 
-                WHEN t.transaction_type = 'IN' THEN t.quantity 
+                WHEN t.transaction_type IN ('IN', 'OPENING') THEN t.quantity 
                 WHEN t.transaction_type = 'OUT' THEN -t.quantity 
                 ELSE 0
             END), 0) as current_stock
@@ -280,7 +576,44 @@ class Database:
         GROUP BY i.id, i.name, i.category, i.minimum_stock
         ORDER BY i.category, i.name
         """
-        return pd.read_sql_query(query, self.conn)
+        if arrow:
+            return self._read_arrow("get_current_stock_arrow", query)
+        return self._read_sql("get_current_stock", query)
+
+    def get_daily_consumption(self, since):
+        """Quantities issued per item and day from since onwards"""
+        query = """
+        SELECT item_id, date, SUM(quantity) as quantity
+        FROM transactions
+        WHERE transaction_type = 'OUT' AND date >= ?
+        GROUP BY item_id, date
+        """
+        return self._read_sql("get_daily_consumption", query, [str(since)])
+
+    def get_data_version(self):
+        """Generation number that changes with every committed write to items or transactions, from any process"""
+        if self._in_snapshot:
+            # The version of the snapshot's own state, not the latest commit
+            rows = self._read_rows("get_data_version", "SELECT generation FROM data_generation WHERE id = 1")
+            return rows[0][0]
+        return self.data_watch.state()[0]
+
+    def advance_generations(self, previous):
+        """Move every generation counter past previous, the counters of a database this file will replace
+
+        A restored backup would otherwise bring back generation numbers that
+        caches and export files were already keyed on, for different data.
+        """
+        if previous is None:
+            return
+        self.conn.execute(
+            """UPDATE data_generation
+            SET generation = MAX(generation, ?) + 1, items_generation = MAX(items_generation, ?) + 1,
+                rewrite_generation = MAX(rewrite_generation, ?) + 1
+            WHERE id = 1""",
+            previous,
+        )
+        self.conn.commit()
 
     def get_monthly_transactions(self):
         query = """
@@ -297,10 +630,11 @@ class Database:
             END) as net_change
         FROM transactions t
         JOIN items i ON t.item_id = i.id
+        WHERE t.transaction_type IN ('IN', 'OUT')
         GROUP BY month, i.name, i.category
         ORDER BY month DESC, i.category, i.name
         """
-        return pd.read_sql_query(query, self.conn)
+        return self._read_sql("get_monthly_transactions", query)
 
     def get_low_stock_items(self):
         """Get items with stock less than 20"""
@@ -310,7 +644,7 @@ class Database:
                 i.id,
                 i.name,
                 COALESCE(SUM(CASE 
-                    WHEN t.transaction_type = 'IN' THEN t.quantity 
+                    WHEN t.transaction_type IN ('IN', 'OPENING') THEN t.quantity 
                     ELSE -t.quantity 
                 END), 0) as stock_level
             FROM items i
@@ -326,7 +660,7 @@ class Database:
         WHERE stock_level < 20
         ORDER BY (20 - stock_level) DESC
         """
-        return pd.read_sql_query(query, self.conn)
+        return self._read_sql("get_low_stock_items", query)
 
     def get_item_expiry_dates(self, item_id):
         query = """
@@ -335,7 +669,7 @@ class Database:
                 expiry_date,
                 batch_number,
                 SUM(CASE 
-                    WHEN transaction_type = 'IN' THEN quantity 
+                    WHEN transaction_type IN ('IN', 'OPENING') THEN quantity 
                     ELSE -quantity 
                 END) as available_stock
             FROM transactions
@@ -348,79 +682,145 @@ class Database:
         WHERE expiry_date >= date('now')
         ORDER BY expiry_date
         """
-        return pd.read_sql_query(query, self.conn, params=[int(item_id)])
+        return self._read_sql("get_item_expiry_dates", query, [int(item_id)])
+
+    def get_lot_balances(self):
+        """Stock per item and expiry date from the lots table; items without lots get one row with balance 0"""
+        query = """
+        SELECT i.id as item_id, i.name as item_name, l.expiry_date, COALESCE(SUM(l.quantity), 0) as balance
+        FROM items i
+        LEFT JOIN lots l ON l.item_id = i.id
+        GROUP BY i.id, l.expiry_date
+        """
+        return self._read_sql("get_lot_balances", query)
+
+    def get_lots(self):
+        """Every lot with stock on hand, with its item"""
+        query = """
+        SELECT i.name as item_name, i.category, l.batch_number, l.barcode, l.expiry_date,
+            l.quantity as available_stock
+        FROM lots l
+        JOIN items i ON i.id = l.item_id
+        WHERE l.quantity > 0
+        ORDER BY i.name, l.expiry_date, l.batch_number
+        """
+        return self._read_sql("get_lots", query)
+
+    def get_item_lots(self, item_id):
+        """Get the unexpired lots of an item that still hold stock as LotRecords"""
+        query = """
+        SELECT expiry_date, batch_number, quantity
+        FROM lots
+        WHERE item_id = ? AND expiry_date IS NOT NULL AND expiry_date >= date('now') AND quantity > 0
+        ORDER BY expiry_date
+        """
+        return [LotRecord(*row) for row in self._read_rows("get_item_lots", query, [int(item_id)])]
+
+    def get_lot_quantities(self):
+        """Quantity of every lot keyed by (item_id, expiry_date, batch_number)"""
+        query = "SELECT item_id, expiry_date, batch_number, quantity FROM lots"
+        return {tuple(row[:3]): row[3] for row in self._read_rows("get_lot_quantities", query)}
+
+    def rebuild_lots(self):
+        """Recompute the lots table from transactions; returns the number of lots
+
+        Archived movements are covered by the OPENING rows that summarise them in the live table.
+        """
+        return self.writer.execute(_rebuild_lots)
 
     def get_available_stock(self, item_id, expiry_date):
         query = """
-        SELECT COALESCE(
-            SUM(CASE 
-                WHEN transaction_type = 'IN' THEN quantity 
-                ELSE -quantity 
-            END),
-            0
-        ) as available_stock
-        FROM transactions
+        SELECT COALESCE(SUM(quantity), 0) as available_stock
+        FROM lots
         WHERE item_id = ? AND expiry_date = ?
         """
-        result = pd.read_sql_query(query, self.conn, params=[int(item_id), expiry_date])
-        return max(0, result.iloc[0]['available_stock'])
+        rows = self._read_rows("get_available_stock", query, [int(item_id), expiry_date])
+        return max(0, rows[0][0])
 
-    def search_transactions(self, start_date=None, end_date=None, item_id=None, transaction_type=None):
+    def lookup_lot(self, code):
+        """Resolve a scanned batch number or barcode to its lots as ScannedLots, in-stock lots first"""
+        code = str(code).strip()
+        if not code:
+            return []
         query = """
+        SELECT l.item_id, i.name, l.expiry_date, l.batch_number, l.barcode, l.quantity
+        FROM lots l
+        JOIN items i ON i.id = l.item_id
+        WHERE l.batch_number = ? OR l.barcode = ?
+        ORDER BY l.quantity > 0 DESC, l.expiry_date
+        """
+        return [ScannedLot(*row) for row in self._read_rows("lookup_lot", query, [code, code])]
+
+    def search_transactions(self, start_date=None, end_date=None, item_id=None, transaction_type=None,
+                            columns=SEARCH_COLUMNS, compact=False, arrow=False):
+        """Transactions matching the filters; columns projects the result and compact types it with compact_frame
+
+        With arrow=True the result is a pyarrow Table read through _read_arrow
+        (and typed with compact_table when compact is set) instead of a DataFrame.
+        """
+        # Archived transactions are only read when the search reaches back before the cutoff
+        include_archive = self._needs_archive(start_date)
+        conditions, params = _search_conditions(start_date, end_date, item_id, transaction_type)
+        query = f"""
         SELECT 
-            t.id,
-            i.name as item_name,
-            t.transaction_type,
-            t.quantity,
-            t.date,
-            t.source_destination,
-            t.expiry_date,
-            t.batch_number,
-            t.notes,
-            t.created_by,
-            t.created_at
-        FROM transactions t
+            {_transaction_select(columns)}
+        FROM {self._transactions_source(include_archive)} t
         JOIN items i ON t.item_id = i.id
-        WHERE 1=1
+        WHERE 1=1{conditions}
+        ORDER BY t.date DESC, t.created_at DESC
         """
-        params = []
-
-        if start_date:
-            query += " AND t.date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND t.date <= ?"
-            params.append(end_date)
-        if item_id:
-            query += " AND t.item_id = ?"
-            params.append(item_id)
-        if transaction_type:
-            query += " AND t.transaction_type = ?"
-            params.append(transaction_type)
+        with self._attached_archive(include_archive):
+            if arrow:
+                result = self._read_arrow("search_transactions_arrow", query, params)
+                return compact_table(result) if compact else result
+            result = self._read_sql("search_transactions", query, params)
+        return compact_frame(result) if compact else result
 
-        query += " ORDER BY t.date DESC, t.created_at DESC"
-        return pd.read_sql_query(query, self.conn, params=params)
+    def count_transactions(self, start_date=None, end_date=None, item_id=None, transaction_type=None, limit=-1):
+        """Number of rows search_transactions would return for the same filters, counting no further than limit"""
+        include_archive = self._needs_archive(start_date)
+        conditions, params = _search_conditions(start_date, end_date, item_id, transaction_type)
+        query = f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1
+            FROM {self._transactions_source(include_archive)} t
+            JOIN items i ON t.item_id = i.id
+            WHERE 1=1{conditions}
+            LIMIT ?
+        )
+        """
+        params.append(limit)
+        with self._attached_archive(include_archive):
+            return self._read_rows("count_transactions", query, params)[0][0]
 
-    def get_all_transactions(self):
-        query = """
+    def _all_transactions_query(self, include_archive, columns=tuple(TRANSACTION_VIEW_COLUMNS)):
+        return f"""
         SELECT 
-            t.id,
-            i.name as item_name,
-            i.category,
-            t.transaction_type,
-            t.quantity,
-            t.date,
-            t.source_destination,
-            t.expiry_date,
-            t.batch_number,
-            t.notes,
-            t.created_by,
-            t.created_at
-        FROM transactions t
+            {_transaction_select(columns)}
+        FROM {self._transactions_source(include_archive)} t
         JOIN items i ON t.item_id = i.id
         ORDER BY t.date DESC, t.created_at DESC
         """
-        return pd.read_sql_query(query, self.conn)
+
+    def get_all_transactions(self, include_archive=True, columns=tuple(TRANSACTION_VIEW_COLUMNS), compact=False):
+        """Every transaction with its item; columns projects the result and compact types it with compact_frame"""
+        include_archive = include_archive and self.get_archive_cutoff() is not None
+        with self._attached_archive(include_archive):
+            result = self._read_sql("get_all_transactions", self._all_transactions_query(include_archive, columns))
+        return compact_frame(result) if compact else result
+
+    def iter_all_transactions(self, include_archive=True, batch_size=5000):
+        """Yield get_all_transactions() as (columns, rows) chunks without loading everything at once"""
+        include_archive = include_archive and self.get_archive_cutoff() is not None
+        with self._attached_archive(include_archive):
+            cursor = self.conn.cursor()
+            cursor.execute(self._all_transactions_query(include_archive))
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield columns, rows
 
     def get_expired_items(self):
         query = """
@@ -429,7 +829,7 @@ class Database:
                 item_id,
                 expiry_date,
                 SUM(CASE 
-                    WHEN transaction_type = 'IN' THEN quantity 
+                    WHEN transaction_type IN ('IN', 'OPENING') THEN quantity 
                     ELSE -quantity 
                 END) as stock_level
             FROM transactions
@@ -445,7 +845,7 @@ class Database:
         WHERE cs.expiry_date < date('now')
         ORDER BY cs.expiry_date DESC
         """
-        return pd.read_sql_query(query, self.conn)
+        return self._read_sql("get_expired_items", query)
 
     def get_near_expiry_items(self):
         query = """
@@ -454,7 +854,7 @@ class Database:
                 item_id,
                 expiry_date,
                 SUM(CASE 
-                    WHEN transaction_type = 'IN' THEN quantity 
+                    WHEN transaction_type IN ('IN', 'OPENING') THEN quantity 
                     ELSE -quantity 
                 END) as stock_level
             FROM transactions
@@ -471,25 +871,579 @@ class Database:
             AND cs.expiry_date >= date('now')
         ORDER BY cs.expiry_date ASC
         """
-        return pd.read_sql_query(query, self.conn)
+        return self._read_sql("get_near_expiry_items", query)
 
     def add_user(self, username, password):
         """Add a new user to the database"""
-        cursor = self.conn.cursor()
         try:
-            cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
-            self.conn.commit()
+            self.writer.execute(_execute, "INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
             return True
         except sqlite3.IntegrityError:
             return False
 
     def change_password(self, username, current_password, new_password):
         """Change user password"""
+        # The current password is verified by the update itself
+        updated = self.writer.execute(
+            _execute,
+            "UPDATE users SET password=? WHERE username=? AND password=?",
+            (new_password, username, current_password)
+        )
+        return updated > 0
+
+    def _latest_snapshot_date(self, on_or_before):
+        """Date of the newest snapshot taken on or before a date, or None"""
+        rows = self._read_rows("latest_snapshot_date", """
+        SELECT MAX(snapshot_date) FROM stock_snapshots WHERE snapshot_date <= ?
+        """, [str(on_or_before)])
+        return rows[0][0]
+
+    def _lot_movements(self, base_date, as_of):
+        """SQL and params for per-lot quantities: a snapshot plus the movements after it
+
+        Dates before the archive cutoff read their movements from the attached archive.
+        """
+        source = "archive.transactions" if self._needs_archive(as_of) else "transactions"
+        if base_date is None:
+            return f"""
+            SELECT item_id, expiry_date, batch_number,
+                CASE WHEN transaction_type IN ('IN', 'OPENING') THEN quantity ELSE -quantity END as quantity
+            FROM {source}
+            WHERE date <= ?
+            """, [str(as_of)]
+        return f"""
+            SELECT item_id, expiry_date, batch_number, quantity
+            FROM stock_snapshots
+            WHERE snapshot_date = ?
+            UNION ALL
+            SELECT item_id, expiry_date, batch_number,
+                CASE WHEN transaction_type IN ('IN', 'OPENING') THEN quantity ELSE -quantity END as quantity
+            FROM {source}
+            WHERE date > ? AND date <= ?
+            """, [base_date, base_date, str(as_of)]
+
+    def create_snapshot(self, snapshot_date):
+        """Store per-lot balances as of the end of snapshot_date
+
+        Only snapshot days that are over; movements recorded later on the same
+        day would not be included.
+        """
+        snapshot_date = str(snapshot_date)
         cursor = self.conn.cursor()
-        # Verify current password
-        cursor.execute("SELECT * FROM users WHERE username=? AND password=?", (username, current_password))
-        if cursor.fetchone():
-            cursor.execute("UPDATE users SET password=? WHERE username=?", (new_password, username))
+        cursor.execute(
+            "SELECT MAX(snapshot_date) FROM stock_snapshots WHERE snapshot_date < ?",
+            (snapshot_date,)
+        )
+        base_date = cursor.fetchone()[0]
+        movements, params = self._lot_movements(base_date, snapshot_date)
+
+        with self._attached_archive(self._needs_archive(snapshot_date)):
+            cursor.execute("DELETE FROM stock_snapshots WHERE snapshot_date = ?", (snapshot_date,))
+            cursor.execute(f"""
+            INSERT INTO stock_snapshots (snapshot_date, item_id, expiry_date, batch_number, quantity)
+            SELECT ?, item_id, expiry_date, batch_number, SUM(quantity)
+            FROM ({movements})
+            GROUP BY item_id, expiry_date, batch_number
+            HAVING SUM(quantity) != 0
+            """, [snapshot_date] + params)
             self.conn.commit()
-            return True
-        return False
+        return cursor.rowcount
+
+    def refresh_snapshots(self):
+        """Create any missing month-end snapshots up to the last completed month"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT MIN(date) FROM transactions")
+        first_date = cursor.fetchone()[0]
+        if not first_date:
+            return 0
+        cursor.execute("SELECT MAX(snapshot_date) FROM stock_snapshots")
+        last_snapshot = cursor.fetchone()[0]
+
+        start = datetime.strptime((last_snapshot or first_date)[:10], '%Y-%m-%d').date()
+        month_end = _month_end(start)
+        if last_snapshot and month_end <= start:
+            month_end = _month_end(month_end + timedelta(days=1))
+
+        created = 0
+        while month_end < date.today():
+            self.create_snapshot(month_end)
+            created += 1
+            month_end = _month_end(month_end + timedelta(days=1))
+        return created
+
+    def invalidate_snapshots(self, since_date):
+        """Drop snapshots taken on or after since_date, e.g. after back-dated movements"""
+        # The snapshot at the archive cutoff stands in for the archived movements
+        cutoff = self.get_archive_cutoff()
+        if cutoff and _to_date(since_date) < cutoff:
+            since_date = cutoff
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM stock_snapshots WHERE snapshot_date >= ?", (str(since_date),))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def get_stock_as_of(self, as_of, by_lot=False):
+        """Stock held at the end of as_of, per item or per lot
+
+        Starts from the nearest earlier snapshot and only replays the movements
+        recorded after it.
+        """
+        base_date = self._latest_snapshot_date(as_of)
+        movements, params = self._lot_movements(base_date, as_of)
+        lot_columns = "m.expiry_date, m.batch_number," if by_lot else ""
+        query = f"""
+        SELECT
+            i.id,
+            i.name,
+            i.category,
+            {lot_columns}
+            SUM(m.quantity) as stock
+        FROM ({movements}) m
+        JOIN items i ON i.id = m.item_id
+        GROUP BY i.id, i.name, i.category{", m.expiry_date, m.batch_number" if by_lot else ""}
+        HAVING SUM(m.quantity) != 0
+        ORDER BY i.category, i.name{", m.expiry_date" if by_lot else ""}
+        """
+        with self._attached_archive(self._needs_archive(as_of)):
+            return self._read_sql("get_stock_as_of", query, params)
+
+    def _get_setting(self, key):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _set_setting(self, key, value):
+        """Store a setting; the caller commits"""
+        cursor = self.conn.cursor()
+        cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+
+    def get_archive_cutoff(self):
+        """First date still held in the live transactions table, or None if nothing is archived"""
+        cutoff = self._get_setting("archive_cutoff")
+        return _to_date(cutoff) if cutoff else None
+
+    def _needs_archive(self, since):
+        """Whether reading history from since onwards needs the archive (None means all history)"""
+        cutoff = self.get_archive_cutoff()
+        return cutoff is not None and (since is None or _to_date(since) < cutoff)
+
+    @contextmanager
+    def _attached_archive(self, needed=True):
+        """Attach the archive database as 'archive' for the duration of a query"""
+        archive_path = self._get_setting("archive_path") if needed else None
+        if not archive_path or self._snapshot_archive:
+            yield
+            return
+        self.conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        try:
+            _upgrade_archive(self.conn)
+            yield
+        finally:
+            self.conn.execute("DETACH DATABASE archive")
+
+    @contextmanager
+    def read_snapshot(self):
+        """A copy of this Database whose reads all see the same committed state
+
+        The copy has its own connection held in one read transaction, so
+        writes committed meanwhile stay invisible to it until the block exits.
+        """
+        if self._in_snapshot:
+            yield self
+            return
+        # Writers only run alongside a long read in WAL mode, which the writer connection switches on
+        self.writer
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        snapshot = copy.copy(self)
+        snapshot.conn = conn
+        snapshot._in_snapshot = True
+        try:
+            # ATTACH is not allowed inside a transaction, so the archive is attached up front
+            archive_path = self._get_setting("archive_path")
+            if archive_path:
+                conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+                _upgrade_archive(conn)
+                snapshot._snapshot_archive = True
+            conn.execute("BEGIN")
+            # The snapshot starts at the first read, not at BEGIN
+            conn.execute("SELECT COUNT(*) FROM items").fetchone()
+            if snapshot._snapshot_archive:
+                conn.execute("SELECT COUNT(*) FROM archive.transactions").fetchone()
+            yield snapshot
+        finally:
+            conn.rollback()
+            conn.close()
+
+    def _transactions_source(self, include_archive):
+        """FROM clause for transactions, optionally with the archived history"""
+        if not include_archive:
+            return "transactions"
+        # Opening balances summarise the archived rows, so they are replaced by the rows themselves
+        return f"""(
+            SELECT {TRANSACTION_COLUMNS} FROM main.transactions WHERE transaction_type != 'OPENING'
+            UNION ALL
+            SELECT {TRANSACTION_COLUMNS} FROM archive.transactions
+        )"""
+
+    def archive_transactions(self, cutoff_date, archive_path=None):
+        """Move transactions dated before cutoff_date into the archive database
+
+        Each lot's net balance before the cutoff is kept in the live table as an
+        OPENING row dated the day before the cutoff, so current balances are
+        unchanged. Returns the number of transactions archived.
+        """
+        cutoff = _to_date(cutoff_date)
+        current_cutoff = self.get_archive_cutoff()
+        if current_cutoff and cutoff <= current_cutoff:
+            raise ValueError(f"Transactions before {current_cutoff} are already archived")
+        if cutoff > date.today():
+            raise ValueError("The archive cutoff cannot be in the future")
+
+        archive_path = (
+            archive_path
+            or self._get_setting("archive_path")
+            or os.path.splitext(self.db_path)[0] + "_archive.db"
+        )
+        opening_date = cutoff - timedelta(days=1)
+
+        # Historical balances up to the cutoff stay answerable from this snapshot
+        self.create_snapshot(opening_date)
+
+        cursor = self.conn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        try:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS archive.transactions AS
+            SELECT {TRANSACTION_COLUMNS} FROM main.transactions WHERE 0
+            """)
+            _upgrade_archive(self.conn)
+            cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_transactions_date ON transactions (date)")
+
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM main.transactions")
+            last_id = cursor.fetchone()[0]
+
+            cursor.execute(f"""
+            INSERT INTO archive.transactions ({TRANSACTION_COLUMNS})
+            SELECT {TRANSACTION_COLUMNS} FROM main.transactions
+            WHERE date < ? AND transaction_type != 'OPENING'
+            """, (str(cutoff),))
+            archived = cursor.rowcount
+
+            # Fold everything before the cutoff (including older opening rows) into new opening rows
+            cursor.execute("""
+            INSERT INTO main.transactions
+            (item_id, transaction_type, quantity, date, source_destination, expiry_date, batch_number, notes, created_by,
+             barcode)
+            SELECT
+                item_id,
+                'OPENING',
+                SUM(CASE WHEN transaction_type IN ('IN', 'OPENING') THEN quantity ELSE -quantity END),
+                ?,
+                'Opening balance',
+                expiry_date,
+                batch_number,
+                ?,
+                'system',
+                MAX(barcode)
+            FROM main.transactions
+            WHERE date < ?
+            GROUP BY item_id, expiry_date, batch_number
+            HAVING SUM(CASE WHEN transaction_type IN ('IN', 'OPENING') THEN quantity ELSE -quantity END) != 0
+            """, (str(opening_date), f"Net of transactions archived before {cutoff}", str(cutoff)))
+            cursor.execute("DELETE FROM main.transactions WHERE date < ? AND id <= ?", (str(cutoff), last_id))
+
+            self._set_setting("archive_path", archive_path)
+            self._set_setting("archive_cutoff", str(cutoff))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.execute("DETACH DATABASE archive")
+        return archived
+
+
+def _upgrade_archive(conn):
+    """Add the columns the live transactions table gained since the attached archive was created"""
+    archived = {row[1] for row in conn.execute("PRAGMA archive.table_info(transactions)")}
+    if not archived:
+        return
+    for _, column, column_type, *_ in conn.execute("PRAGMA main.table_info(transactions)").fetchall():
+        if column not in archived:
+            conn.execute(f"ALTER TABLE archive.transactions ADD COLUMN {column} {column_type}")
+
+
+# Write operations, run by the writer thread inside its current transaction
+
+def _execute(cursor, query, params):
+    cursor.execute(query, params)
+    return cursor.rowcount
+
+
+def _items_generation(cursor):
+    try:
+        cursor.execute("SELECT items_generation FROM data_generation WHERE id = 1")
+    except sqlite3.OperationalError:
+        # Counters not migrated yet
+        return None
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _tracking_items_generation(cursor, func, *args):
+    """func's result and (items_generation before, after) it, read in the same write transaction"""
+    before = _items_generation(cursor)
+    result = func(cursor, *args)
+    return result, (before, _items_generation(cursor))
+
+
+def _insert_item(cursor, name, category, minimum_stock):
+    cursor.execute(
+        "INSERT INTO items (name, category, minimum_stock) VALUES (?, ?, ?)",
+        (name, category, minimum_stock)
+    )
+    return cursor.lastrowid
+
+
+def _insert_transaction(cursor, item_id, transaction_type, quantity, source_destination, expiry_date,
+                        batch_number, notes, created_by, barcode=None):
+    cursor.execute("""
+    INSERT INTO transactions
+    (item_id, transaction_type, quantity, date, source_destination, expiry_date, batch_number, notes, created_by,
+     barcode)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (item_id, transaction_type, quantity, datetime.now().date(), source_destination, expiry_date,
+          batch_number, notes, created_by, barcode))
+    return cursor.lastrowid
+
+
+def _insert_items(cursor, rows):
+    before = cursor.connection.total_changes
+    cursor.executemany(
+        "INSERT OR IGNORE INTO items (name, category, minimum_stock) VALUES (?, ?, ?)", rows
+    )
+    return cursor.connection.total_changes - before
+
+
+def _insert_transactions(cursor, rows):
+    cursor.executemany("""
+    INSERT INTO transactions
+    (item_id, transaction_type, quantity, date, source_destination, expiry_date, batch_number, notes, created_by,
+     barcode)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    return len(rows)
+
+
+def _search_conditions(start_date, end_date, item_id, transaction_type):
+    """AND clauses and parameters for the search_transactions filters on alias t"""
+    conditions, params = "", []
+    if start_date:
+        conditions += " AND t.date >= ?"
+        params.append(start_date)
+    if end_date:
+        conditions += " AND t.date <= ?"
+        params.append(end_date)
+    if item_id:
+        conditions += " AND t.item_id = ?"
+        params.append(item_id)
+    if transaction_type:
+        conditions += " AND t.transaction_type = ?"
+        params.append(transaction_type)
+    return conditions, params
+
+
+def _whole_number(value, name):
+    """value as an int, refusing fractions, booleans and non-numeric text instead of truncating them"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    try:
+        number = None if isinstance(value, bool) else float(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not number.is_integer():
+        raise ValueError(f"Movement {name} must be a whole number, not {value!r}")
+    return int(number)
+
+
+def _for_existing_item(cursor, func, item_id, *args):
+    cursor.execute("SELECT 1 FROM items WHERE id = ?", (item_id,))
+    if cursor.fetchone() is None:
+        return IssueResult(UNKNOWN_ITEM, None, None)
+    return func(cursor, item_id, *args)
+
+
+def _rebuild_lots(cursor):
+    cursor.execute("DELETE FROM lots")
+    cursor.execute("""
+    INSERT INTO lots (item_id, expiry_date, batch_number, barcode, quantity)
+    SELECT item_id, expiry_date, batch_number, MAX(barcode),
+           SUM(CASE WHEN transaction_type IN ('IN', 'OPENING') THEN quantity ELSE -quantity END)
+    FROM transactions
+    WHERE item_id IS NOT NULL
+    GROUP BY item_id, expiry_date, batch_number
+    """)
+    return cursor.rowcount
+
+
+def _issue_stock(cursor, item_id, quantity, destination, expiry_date, batch_number, notes, created_by):
+    # If batch number is not provided, take the item/expiry lot that still holds stock
+    if not batch_number:
+        cursor.execute("""
+        SELECT batch_number FROM lots
+        WHERE item_id = ? AND expiry_date = ?
+        ORDER BY quantity > 0 DESC, id
+        LIMIT 1
+        """, (item_id, expiry_date))
+        batch_result = cursor.fetchone()
+        batch_number = batch_result[0] if batch_result else None
+
+    # The writer already holds the write lock, so no other issue can land between this check and the insert
+    cursor.execute("""
+    SELECT COALESCE(SUM(quantity), 0) FROM lots
+    WHERE item_id = ? AND expiry_date = ? AND batch_number IS ?
+    """, (item_id, expiry_date, batch_number))
+    available = cursor.fetchone()[0]
+    if quantity > available:
+        return IssueResult(INSUFFICIENT_STOCK, max(0, available), None)
+
+    transaction_id = _insert_transaction(cursor, item_id, "OUT", quantity, destination, expiry_date,
+                                         batch_number, notes, created_by)
+    return IssueResult(ISSUED, available - quantity, transaction_id)
+
+
+def _enable_incremental_vacuum(conn):
+    """Switch to incremental auto-vacuum so free pages can be released in small steps"""
+    conn.commit()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    # Changing auto_vacuum on an existing database only takes effect after a VACUUM
+    conn.execute("VACUUM")
+
+
+def _add_lots_table(conn):
+    """Add transaction barcodes and a trigger-maintained table of lot balances"""
+    conn.execute("ALTER TABLE transactions ADD COLUMN barcode TEXT")
+    conn.execute("""
+    CREATE TABLE lots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_id INTEGER NOT NULL,
+        expiry_date DATE,
+        batch_number TEXT,
+        barcode TEXT,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (item_id) REFERENCES items (id)
+    )""")
+    conn.execute("""
+    INSERT INTO lots (item_id, expiry_date, batch_number, quantity)
+    SELECT item_id, expiry_date, batch_number,
+           SUM(CASE WHEN transaction_type IN ('IN', 'OPENING') THEN quantity ELSE -quantity END)
+    FROM transactions
+    WHERE item_id IS NOT NULL
+    GROUP BY item_id, expiry_date, batch_number
+    """)
+    # One row per lot; scans are resolved through the batch number and barcode indexes
+    conn.execute("CREATE UNIQUE INDEX idx_lots_lot ON lots (item_id, expiry_date, batch_number)")
+    conn.execute("CREATE INDEX idx_lots_batch ON lots (batch_number)")
+    conn.execute("CREATE INDEX idx_lots_barcode ON lots (barcode) WHERE barcode IS NOT NULL")
+
+    # Every change to transactions is applied to its lot in the same transaction
+    conn.execute(f"""
+    CREATE TRIGGER transactions_lots_insert AFTER INSERT ON transactions
+    BEGIN
+        {_LOT_ADD.format(row="NEW")}
+    END""")
+    conn.execute(f"""
+    CREATE TRIGGER transactions_lots_delete AFTER DELETE ON transactions
+    BEGIN
+        {_LOT_SUBTRACT.format(row="OLD")}
+    END""")
+    conn.execute(f"""
+    CREATE TRIGGER transactions_lots_update
+    AFTER UPDATE OF item_id, transaction_type, quantity, expiry_date, batch_number, barcode ON transactions
+    BEGIN
+        {_LOT_SUBTRACT.format(row="OLD")}
+        {_LOT_ADD.format(row="NEW")}
+    END""")
+
+
+_LOT_MATCH = "item_id = {row}.item_id AND expiry_date IS {row}.expiry_date AND batch_number IS {row}.batch_number"
+_SIGNED_QUANTITY = "CASE WHEN {row}.transaction_type IN ('IN', 'OPENING') THEN {row}.quantity ELSE -{row}.quantity END"
+
+# Trigger bodies keeping lots in step with a transaction row ({row} is NEW or OLD)
+_LOT_ADD = f"""
+        INSERT INTO lots (item_id, expiry_date, batch_number, barcode)
+        SELECT {{row}}.item_id, {{row}}.expiry_date, {{row}}.batch_number, {{row}}.barcode
+        WHERE NOT EXISTS (SELECT 1 FROM lots WHERE {_LOT_MATCH});
+        UPDATE lots
+        SET quantity = quantity + {_SIGNED_QUANTITY}, barcode = COALESCE({{row}}.barcode, barcode)
+        WHERE {_LOT_MATCH};"""
+_LOT_SUBTRACT = f"""
+        UPDATE lots SET quantity = quantity - {_SIGNED_QUANTITY}
+        WHERE {_LOT_MATCH};"""
+
+
+def _add_data_generation(conn):
+    """Add trigger-maintained generation counters that change with every write to items or transactions"""
+    conn.execute("""
+    CREATE TABLE data_generation (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation INTEGER NOT NULL,
+        items_generation INTEGER NOT NULL
+    )""")
+    conn.execute("INSERT INTO data_generation (id, generation, items_generation) VALUES (1, 1, 1)")
+    # Caches in every process compare these numbers, so each write bumps them in its own transaction
+    for table, counters in (
+        ("items", "generation = generation + 1, items_generation = items_generation + 1"),
+        ("transactions", "generation = generation + 1"),
+    ):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+            CREATE TRIGGER {table}_generation_{event.lower()} AFTER {event} ON {table}
+            BEGIN
+                UPDATE data_generation SET {counters} WHERE id = 1;
+            END""")
+
+
+def _add_rewrite_generation(conn):
+    """Count updates and deletes of transactions separately, so insert-only changes can be applied incrementally"""
+    conn.execute("ALTER TABLE data_generation ADD COLUMN rewrite_generation INTEGER NOT NULL DEFAULT 1")
+    for event in ("UPDATE", "DELETE"):
+        conn.execute(f"DROP TRIGGER transactions_generation_{event.lower()}")
+        conn.execute(f"""
+        CREATE TRIGGER transactions_generation_{event.lower()} AFTER {event} ON transactions
+        BEGIN
+            UPDATE data_generation
+            SET generation = generation + 1, rewrite_generation = rewrite_generation + 1
+            WHERE id = 1;
+        END""")
+
+
+def _add_user_roles(conn):
+    """Store each user's role, so administration is granted explicitly rather than by username"""
+    conn.execute("ALTER TABLE users ADD COLUMN role TEXT NOT NULL DEFAULT 'user'")
+    conn.execute("UPDATE users SET role = 'admin' WHERE username = 'admin'")
+
+
+def read_generations(db_path):
+    """(generation, items_generation, rewrite_generation) of a database file, or None if it has no counters yet"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT generation, items_generation, rewrite_generation FROM data_generation WHERE id = 1"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
+# Schema migrations in order; PRAGMA user_version records how many have been applied
+MIGRATIONS = [
+    _enable_incremental_vacuum,
+    _add_lots_table,
+    _add_data_generation,
+    _add_rewrite_generation,
+    _add_user_roles,
+]
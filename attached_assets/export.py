@@ -2,6 +2,7 @@ import pandas as pd
 import streamlit as st
 from io import BytesIO
 import datetime
+import csv
 
 def export_data(db, data_type):
     """Export data to Excel with formatting"""
@@ -43,6 +44,101 @@ def export_data(db, data_type):
 
     return output.getvalue(), final_filename
 
+def write_export(db, data_type, path, progress=None):
+    """Stream an export to a .csv or .xlsx file; progress(rows) is called after each chunk"""
+    if data_type == "stock":
+        df = db.get_current_stock()
+        chunks = [(list(df.columns), df.itertuples(index=False, name=None))]
+    elif data_type == "transactions":
+        chunks = db.iter_all_transactions()
+    else:
+        raise ValueError(f"Invalid export type: {data_type}")
+
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            rows = 0
+            for columns, chunk in chunks:
+                if rows == 0:
+                    writer.writerow(columns)
+                for row in chunk:
+                    writer.writerow(row)
+                    rows += 1
+                if progress:
+                    progress(rows)
+        return rows
+
+    # A write-only workbook streams rows to disk instead of holding every cell in memory
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    rows = _write_sheet(workbook, data_type.title(), chunks, progress)
+    workbook.save(path)
+    return rows
+
+def _write_sheet(workbook, title, chunks, progress=None, rows=0):
+    """Append a sheet to a write-only workbook from (columns, rows) chunks; returns the running row count"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+    worksheet = workbook.create_sheet(title)
+    header_written = False
+    for columns, chunk in chunks:
+        if not header_written:
+            header = []
+            for col_num, value in enumerate(columns):
+                cell = WriteOnlyCell(worksheet, value=value)
+                cell.font = Font(bold=True, color='FFFFFF')
+                cell.fill = PatternFill(start_color='4361EE', end_color='4361EE', fill_type='solid')
+                header.append(cell)
+                # Column widths cannot be measured while streaming, so size them from the header
+                worksheet.column_dimensions[get_column_letter(col_num + 1)].width = max(len(value) + 2, 14)
+            worksheet.append(header)
+            header_written = True
+        for row in chunk:
+            worksheet.append(row)
+            rows += 1
+        if progress:
+            progress(rows)
+    return rows
+
+def _frame_chunks(df):
+    """A DataFrame as a single (columns, rows) chunk, with missing values written as empty cells"""
+    df = df.astype(object).where(df.notna(), None)
+    return [(list(df.columns), df.itertuples(index=False, name=None))]
+
+def _expiry_report(db):
+    expired = db.get_expired_items()
+    expired.insert(0, 'status', 'Expired')
+    near_expiry = db.get_near_expiry_items()
+    near_expiry.insert(0, 'status', 'Expires within 60 days')
+    return pd.concat([expired, near_expiry], ignore_index=True)
+
+def _monthly_report(db):
+    from attached_assets.view_models import monthly_summary
+    return monthly_summary(db.get_monthly_transactions())
+
+# Report pack sheets in workbook order; each reads through the snapshot Database it is given
+REPORT_PACK_SHEETS = [
+    ("Stock", lambda db: _frame_chunks(db.get_current_stock())),
+    ("Lots", lambda db: _frame_chunks(db.get_lots())),
+    ("Low Stock", lambda db: _frame_chunks(db.get_low_stock_items())),
+    ("Expiry", lambda db: _frame_chunks(_expiry_report(db))),
+    ("Monthly Summary", lambda db: _frame_chunks(_monthly_report(db))),
+    ("Transactions", lambda db: db.iter_all_transactions()),
+]
+
+def write_report_pack(db, path, progress=None):
+    """Write every report sheet to one .xlsx workbook (a path or file object) from a single snapshot"""
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    rows = 0
+    # One read transaction for every sheet, so the numbers agree with each other
+    with db.read_snapshot() as snapshot:
+        for title, chunks in REPORT_PACK_SHEETS:
+            rows = _write_sheet(workbook, title, chunks(snapshot), progress, rows)
+    workbook.save(path)
+    return rows
+
 def get_csv_download_link(df, filename):
     """Generate CSV download link"""
     csv = df.to_csv(index=False)
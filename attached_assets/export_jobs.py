@@ -0,0 +1,163 @@
+import glob
+import os
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from attached_assets.database import Database
+from attached_assets.export import write_export, write_report_pack
+
+# Export type -> (download file name, formats it can be written in)
+EXPORT_TYPES = {
+    "stock": ("current_stock", ("xlsx", "csv")),
+    "transactions": ("transactions", ("xlsx", "csv")),
+    "pack": ("report_pack", ("xlsx",)),
+}
+
+MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+}
+
+
+def version_token(version):
+    """A data version as a file-name-safe string"""
+    return str(version)
+
+
+class ExportJob:
+    """One export file being built (or already built) for a data version"""
+
+    def __init__(self, export_type, fmt, token, expected_rows=None):
+        self.export_type = export_type
+        self.format = fmt
+        self.token = token
+        self.expected_rows = expected_rows
+        self.rows = 0
+        self.path = None
+        self.error = None
+        self.cached = False
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def running(self):
+        return self.finished is None
+
+    def progress(self, rows):
+        self.rows = rows
+
+    def fraction(self):
+        """Share of the expected rows written so far, or None when there is nothing to compare with"""
+        if not self.expected_rows:
+            return None
+        return min(self.rows / self.expected_rows, 0.99)
+
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def download_name(self):
+        built = datetime.fromtimestamp(os.path.getmtime(self.path))
+        return f"{EXPORT_TYPES[self.export_type][0]}_{built.strftime('%Y%m%d_%H%M%S')}.{self.format}"
+
+
+class ExportJobRunner:
+    """Builds export files on worker threads and keeps them on disk, keyed by data version
+
+    A request for an export whose file already exists for the current data
+    version is served from disk; a request for one that is being built
+    joins that build. Files for older versions are deleted once a newer one
+    is written.
+    """
+
+    def __init__(self, db_path, export_dir=None):
+        self.db_path = db_path
+        self.export_dir = export_dir or os.path.join(os.path.dirname(os.path.abspath(db_path)), "exports")
+        self.builds = 0
+        self.hits = 0
+        self._jobs = {}
+        self._last_rows = {}
+        self._lock = threading.Lock()
+
+    def artifact_path(self, export_type, fmt, token):
+        return os.path.join(self.export_dir, f"{export_type}_{token}.{fmt}")
+
+    def submit(self, db, export_type, fmt):
+        """The job for export_type in fmt at db's current data version, starting a build only if needed"""
+        if export_type not in EXPORT_TYPES or fmt not in EXPORT_TYPES[export_type][1]:
+            raise ValueError(f"Cannot export {export_type} as {fmt}")
+        token = version_token(db.get_data_version())
+        key = (export_type, fmt, token)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.error is None and (job.running or os.path.exists(job.path)):
+                if not job.running:
+                    self.hits += 1
+                return job
+            job = ExportJob(export_type, fmt, token, self._last_rows.get((export_type, fmt)))
+            path = self.artifact_path(export_type, fmt, token)
+            if os.path.exists(path):
+                # Built earlier, possibly by another process sharing the export directory
+                job.path, job.cached, job.finished = path, True, time.monotonic()
+                self.hits += 1
+            else:
+                self.builds += 1
+                threading.Thread(target=self._build, args=(job,), name=f"export-{export_type}", daemon=True).start()
+            self._jobs[key] = job
+        return job
+
+    def _build(self, job):
+        os.makedirs(self.export_dir, exist_ok=True)
+        db = Database(self.db_path)
+        part = None
+        try:
+            with db.read_snapshot() as snapshot:
+                # Name the file after the version it was read at, which may be newer than the one requested
+                token = version_token(snapshot.get_data_version())
+                path = self.artifact_path(job.export_type, job.format, token)
+                part = f"{path[:-len(job.format)]}{threading.get_ident()}.part.{job.format}"
+                if job.export_type == "pack":
+                    rows = write_report_pack(snapshot, part, job.progress)
+                else:
+                    rows = write_export(snapshot, job.export_type, part, job.progress)
+            os.replace(part, path)
+            with self._lock:
+                job.rows, job.path = rows, path
+                self._jobs[(job.export_type, job.format, token)] = job
+                self._last_rows[(job.export_type, job.format)] = rows
+            self._prune(job.export_type, job.format, path)
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            print(f"Export {job.export_type}.{job.format} failed:\n{traceback.format_exc()}")
+            if part and os.path.exists(part):
+                os.remove(part)
+        finally:
+            job.finished = time.monotonic()
+            db.conn.close()
+
+    def _prune(self, export_type, fmt, keep):
+        """Delete files and finished jobs of export_type/fmt for versions other than keep's"""
+        with self._lock:
+            for key, job in list(self._jobs.items()):
+                if key[:2] == (export_type, fmt) and not job.running and job.path != keep:
+                    del self._jobs[key]
+        for path in glob.glob(os.path.join(self.export_dir, f"{export_type}_*.{fmt}")):
+            if path != keep and ".part." not in path:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Error removing old export {path}: {e}")
+
+
+_runners = {}
+_runners_lock = threading.Lock()
+
+
+def get_export_runner(db_path):
+    """The process-wide export job runner for a database file"""
+    key = os.path.abspath(db_path)
+    with _runners_lock:
+        if key not in _runners:
+            _runners[key] = ExportJobRunner(key)
+        return _runners[key]
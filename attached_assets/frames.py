@@ -0,0 +1,65 @@
+import pandas as pd
+
+# Few distinct values repeated on every row: stored once per category instead of once per row
+CATEGORICAL_COLUMNS = ('transaction_type', 'category', 'item_name', 'created_by', 'source_destination')
+
+# Dates are parsed once here, so views can filter and sort them without re-parsing strings
+DATE_COLUMNS = ('date', 'expiry_date', 'created_at')
+
+INTEGER_COLUMNS = ('id', 'item_id', 'quantity', 'current_stock', 'minimum_stock')
+
+
+def compact_frame(df):
+    """A copy of a query frame with categorical labels, datetime64 dates and the smallest integer types"""
+    df = df.copy()
+    for column in df.columns:
+        if column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype('category')
+        elif column in DATE_COLUMNS:
+            # ISO strings only; anything unparsable becomes NaT rather than failing the view
+            df[column] = pd.to_datetime(df[column], format='ISO8601', errors='coerce')
+        elif column in INTEGER_COLUMNS and pd.api.types.is_integer_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    return df
+
+
+def frame_memory(df):
+    """Bytes held by a frame, including the Python strings in object columns"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _narrowest_integer(column):
+    """The smallest signed integer type that holds every value of an Arrow integer column"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    bounds = pc.min_max(column)
+    low, high = bounds['min'].as_py(), bounds['max'].as_py()
+    if low is None:
+        return column.type
+    for candidate in (pa.int8(), pa.int16(), pa.int32()):
+        limit = 2 ** (candidate.bit_width - 1)
+        if -limit <= low and high < limit:
+            return candidate
+    return pa.int64()
+
+
+def compact_table(table):
+    """compact_frame for a pyarrow Table: dictionary-encoded labels, typed dates and narrow integers"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    columns = []
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            if name in CATEGORICAL_COLUMNS:
+                column = pc.dictionary_encode(column)
+            elif name == 'created_at':
+                column = pc.strptime(pc.utf8_slice_codeunits(column, 0, 19), format='%Y-%m-%d %H:%M:%S',
+                                     unit='s', error_is_null=True)
+            elif name in DATE_COLUMNS:
+                column = pc.strptime(pc.utf8_slice_codeunits(column, 0, 10), format='%Y-%m-%d',
+                                     unit='s', error_is_null=True).cast(pa.date32())
+        elif name in INTEGER_COLUMNS and pa.types.is_integer(column.type):
+            column = column.cast(_narrowest_integer(column))
+        columns.append(column)
+    # Each record batch was encoded on its own; one shared dictionary per column keeps the Table consistent
+    return pa.table(columns, names=table.column_names).unify_dictionaries()
@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import threading
+
+
+class DataWatch:
+    """This process's view of a database's generation counters, shared by every session
+
+    The data_generation row is bumped by triggers on every write to items or
+    transactions, from any process. Reading it is cheap, but PRAGMA
+    data_version is cheaper still: it only changes after another connection
+    (including this process's writer) has committed, so the row is re-read
+    only then and an unchanged database costs one pragma per check.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # Autocommit, so no read transaction is left open between checks
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._data_version = None
+        self._state = None
+        self.checks = 0
+        self.reads = 0
+
+    def state(self):
+        """(generation, items_generation) as currently committed"""
+        with self._lock:
+            self.checks += 1
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._state is None or data_version != self._data_version:
+                # A commit landing between the two reads makes the next check read again, never serve stale
+                try:
+                    row = self._conn.execute(
+                        "SELECT generation, items_generation FROM data_generation WHERE id = 1"
+                    ).fetchone()
+                    self._state = tuple(row)
+                except sqlite3.OperationalError:
+                    # Counters not migrated yet (e.g. the file was locked at startup): every commit counts as a change
+                    self._state = (f"v{data_version}", f"v{data_version}")
+                self._data_version = data_version
+                self.reads += 1
+            return self._state
+
+
+_watches = {}
+_watches_lock = threading.Lock()
+
+
+def get_data_watch(db_path):
+    """The process-wide DataWatch for a database file"""
+    key = os.path.abspath(db_path)
+    with _watches_lock:
+        if key not in _watches:
+            _watches[key] = DataWatch(key)
+        return _watches[key]
@@ -0,0 +1,74 @@
+import os
+
+from attached_assets.backup import BackupManager
+from attached_assets.database import Database
+from attached_assets.reports import get_reports
+from attached_assets import maintenance
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Number of scheduled backups kept; older ones are deleted after each new backup
+BACKUP_KEEP_ENV = "INVENTORY_BACKUP_KEEP"
+DEFAULT_BACKUP_KEEP = 7
+
+
+def backup_job(db_path, keep=DEFAULT_BACKUP_KEEP):
+    """Create a compressed backup of the database and delete all but the newest keep backups"""
+    manager = BackupManager(db_path)
+    backup_path = manager.create_backup()
+    if not backup_path:
+        raise RuntimeError("Backup failed")
+    removed = manager.prune_backups(keep)
+    return f"{os.path.basename(backup_path)} ({removed} old backup(s) removed)"
+
+
+def snapshot_job(db_path):
+    """Create any missing month-end stock snapshots"""
+    db = Database(db_path)
+    try:
+        return f"{db.refresh_snapshots()} snapshot(s) created"
+    finally:
+        db.conn.close()
+
+
+def expiry_scan_job(db_path):
+    """Build the Reports-tab sections, so the tab opens from the cache, and count expired and near-expiry lots"""
+    db = Database(db_path)
+    try:
+        reports = get_reports(db)
+    finally:
+        db.conn.close()
+    return f"{len(reports.expired)} expired, {len(reports.near_expiry)} near expiry"
+
+
+def optimize_job(db_path):
+    """Refresh stale planner statistics with a bounded ANALYZE"""
+    db = Database(db_path)
+    try:
+        maintenance.analyze(db, analysis_limit=1000)
+        maintenance.optimize(db)
+    finally:
+        db.conn.close()
+    return "Statistics updated"
+
+
+def vacuum_job(db_path, max_pages=1000):
+    """Release a bounded number of free pages"""
+    db = Database(db_path)
+    try:
+        released = maintenance.incremental_vacuum(db, max_pages)
+    finally:
+        db.conn.close()
+    return f"{released} page(s) released"
+
+
+def register_default_jobs(scheduler, db_path, backup_keep=None):
+    """Register the maintenance and precomputation jobs for a database"""
+    if backup_keep is None:
+        backup_keep = int(os.environ.get(BACKUP_KEEP_ENV, DEFAULT_BACKUP_KEEP))
+    scheduler.add_job("snapshots", lambda: snapshot_job(db_path), HOUR, run_immediately=True)
+    scheduler.add_job("expiry_scan", lambda: expiry_scan_job(db_path), HOUR, run_immediately=True)
+    scheduler.add_job("optimize", lambda: optimize_job(db_path), 6 * HOUR)
+    scheduler.add_job("vacuum", lambda: vacuum_job(db_path), HOUR)
+    scheduler.add_job("backup", lambda: backup_job(db_path, backup_keep), DAY)
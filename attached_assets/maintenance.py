@@ -0,0 +1,69 @@
+import os
+import sqlite3
+
+AUTO_VACUUM_MODES = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}
+
+
+def _pragma(db, name):
+    cursor = db.conn.cursor()
+    cursor.execute(f"PRAGMA {name}")
+    return cursor.fetchone()[0]
+
+
+def analyze(db, analysis_limit=None):
+    """Gather planner statistics; analysis_limit bounds the rows sampled per index"""
+    if analysis_limit is not None:
+        db.conn.execute(f"PRAGMA analysis_limit = {int(analysis_limit)}")
+    db.conn.execute("ANALYZE")
+    db.conn.commit()
+
+
+def optimize(db):
+    """Let SQLite re-analyze only the tables whose statistics are stale"""
+    db.conn.execute("PRAGMA optimize")
+    db.conn.commit()
+
+
+def incremental_vacuum(db, max_pages=1000):
+    """Release up to max_pages free pages to the file system; returns the pages released"""
+    if _pragma(db, "auto_vacuum") != 2:
+        return 0
+    before = _pragma(db, "freelist_count")
+    # The pragma frees one page per VM step; executescript runs it to completion
+    db.conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+    return before - _pragma(db, "freelist_count")
+
+
+def size_report(db):
+    """Page counts, free pages and per-table/index sizes of the database file"""
+    page_size = _pragma(db, "page_size")
+    page_count = _pragma(db, "page_count")
+    freelist_count = _pragma(db, "freelist_count")
+    report = {
+        "file_bytes": os.path.getsize(db.get_db_path()),
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist_count,
+        "free_bytes": freelist_count * page_size,
+        "auto_vacuum": AUTO_VACUUM_MODES.get(_pragma(db, "auto_vacuum"), "UNKNOWN"),
+        "objects": None,
+    }
+
+    cursor = db.conn.cursor()
+    try:
+        # dbstat is an optional SQLite extension; without it only the totals are reported
+        cursor.execute("""
+        SELECT s.name, m.type, m.tbl_name, COUNT(*) as pages, SUM(s.pgsize) as bytes
+        FROM dbstat s
+        LEFT JOIN sqlite_master m ON m.name = s.name
+        GROUP BY s.name
+        ORDER BY bytes DESC
+        """)
+    except sqlite3.OperationalError:
+        return report
+
+    report["objects"] = [
+        {"name": name, "type": obj_type or "table", "table": table or name, "pages": pages, "bytes": size}
+        for name, obj_type, table, pages, size in cursor.fetchall()
+    ]
+    return report
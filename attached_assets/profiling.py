@@ -0,0 +1,135 @@
+import json
+import re
+import threading
+from datetime import datetime
+
+# Upper bounds (ms) of the latency histogram buckets; slower calls go to the last bucket
+LATENCY_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+
+def _bucket_label(index):
+    if index < len(LATENCY_BUCKETS_MS):
+        return f"<={LATENCY_BUCKETS_MS[index]}ms"
+    return f">{LATENCY_BUCKETS_MS[-1]}ms"
+
+
+_TABLE_REFERENCE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_NOT_ALIASES = {"where", "on", "join", "left", "inner", "cross", "group", "order", "limit", "using"}
+
+
+def table_names(query, tables):
+    """Names (tables and their aliases) under which query reads the given tables"""
+    names = set()
+    for table, alias in _TABLE_REFERENCE.findall(query):
+        if table in tables:
+            names.add(table)
+            if alias and alias.lower() not in _NOT_ALIASES:
+                names.add(alias)
+    return names
+
+
+def find_full_scans(plan, tables):
+    """Return the plan steps that read all of one of tables without a real index
+
+    Besides plain scans this includes lookups through an AUTOMATIC index, which
+    SQLite builds by reading the whole table on every execution.
+    """
+    scans = []
+    for detail in plan:
+        words = detail.split()
+        automatic = "AUTOMATIC" in words
+        if len(words) < 2 or not (words[0] == "SCAN" and "USING" not in words or automatic):
+            continue
+        # SQLite < 3.36 writes "SCAN TABLE name", newer versions "SCAN name"
+        table = words[2] if len(words) > 2 and words[1] == "TABLE" else words[1]
+        if table in tables:
+            scans.append(detail)
+    return scans
+
+
+class QueryProfiler:
+    """Collects call counts, latencies, row counts and query plans per named query"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.started_at = datetime.now()
+
+    def _entry(self, name):
+        if name not in self._stats:
+            self._stats[name] = {
+                "calls": 0,
+                "total_ms": 0.0,
+                "min_ms": None,
+                "max_ms": 0.0,
+                "rows": 0,
+                "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                "plan": None,
+                "full_scans": [],
+            }
+        return self._stats[name]
+
+    def record(self, name, elapsed, rows):
+        """Record one call of a query that took elapsed seconds and returned rows"""
+        elapsed_ms = elapsed * 1000
+        bucket = next(
+            (i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound),
+            len(LATENCY_BUCKETS_MS)
+        )
+        with self._lock:
+            entry = self._entry(name)
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["min_ms"] = elapsed_ms if entry["min_ms"] is None else min(entry["min_ms"], elapsed_ms)
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["rows"] += rows
+            entry["histogram"][bucket] += 1
+
+    def has_plan(self, name):
+        with self._lock:
+            return name in self._stats and self._stats[name]["plan"] is not None
+
+    def set_plan(self, name, plan, tables):
+        """Store the EXPLAIN QUERY PLAN steps of a query and flag full scans"""
+        with self._lock:
+            entry = self._entry(name)
+            entry["plan"] = plan
+            entry["full_scans"] = find_full_scans(plan, tables)
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self.started_at = datetime.now()
+
+    def snapshot(self):
+        """Return a JSON-serialisable copy of all statistics"""
+        with self._lock:
+            queries = {}
+            for name, entry in self._stats.items():
+                calls = entry["calls"]
+                queries[name] = {
+                    "calls": calls,
+                    "total_ms": round(entry["total_ms"], 3),
+                    "mean_ms": round(entry["total_ms"] / calls, 3) if calls else 0.0,
+                    "min_ms": round(entry["min_ms"] or 0.0, 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "rows": entry["rows"],
+                    "mean_rows": round(entry["rows"] / calls, 1) if calls else 0.0,
+                    "histogram": {
+                        _bucket_label(i): count for i, count in enumerate(entry["histogram"])
+                    },
+                    "plan": list(entry["plan"] or []),
+                    "full_scans": list(entry["full_scans"]),
+                }
+            return {
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "queries": queries,
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+
+# Shared by every Database instance in the process
+profiler = QueryProfiler()
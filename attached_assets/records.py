@@ -0,0 +1,24 @@
+from collections import namedtuple
+
+# Compact rows for point lookups and widget options; DataFrames are only built
+# when a view displays a table
+ItemRecord = namedtuple("ItemRecord", ["id", "name", "category", "minimum_stock"])
+LotRecord = namedtuple("LotRecord", ["expiry_date", "batch_number", "available_stock"])
+ScannedLot = namedtuple(
+    "ScannedLot", ["item_id", "item_name", "expiry_date", "batch_number", "barcode", "available_stock"]
+)
+
+# Outcomes of a stock movement
+RECORDED = "recorded"
+ISSUED = "issued"
+INSUFFICIENT_STOCK = "insufficient_stock"
+UNKNOWN_ITEM = "unknown_item"
+FAILED = "failed"
+
+
+class IssueResult(namedtuple("IssueResult", ["status", "available", "transaction_id"])):
+    """Result of remove_stock or a batched movement; truthy only when it was written"""
+    __slots__ = ()
+
+    def __bool__(self):
+        return self.status in (RECORDED, ISSUED)
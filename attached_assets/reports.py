@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from attached_assets.analytics_backend import run_analytics
+
+# Lots expiring within this many days are reported as near expiry
+NEAR_EXPIRY_DAYS = 60
+
+# The Low Stock report's fixed threshold, as in get_low_stock_items()
+LOW_STOCK_LEVEL = 20
+
+Reports = namedtuple("Reports", "expired near_expiry low_stock monthly timings")
+
+# Queries the sections are derived from; each one reads through its own connection when run in parallel
+REPORT_QUERIES = {
+    "lot_balances": lambda db: db.get_lot_balances(),
+    # Same frame as db.get_monthly_transactions(), from DuckDB when it is installed
+    "monthly": lambda db: run_analytics(db, "monthly_movement", include_archive=False),
+}
+
+_cache_lock = threading.Lock()
+_reports_cache = {}
+
+
+def compute_sections(balances, today):
+    """Expired, near-expiry and low-stock frames from one get_lot_balances() frame
+
+    Matches get_expired_items(), get_near_expiry_items() and
+    get_low_stock_items(), which each aggregate the ledger on their own.
+    """
+    horizon = (today + timedelta(days=NEAR_EXPIRY_DAYS)).isoformat()
+    today = today.isoformat()
+    in_stock = balances[(balances['balance'] > 0) & balances['expiry_date'].notna()]
+    in_stock = in_stock.rename(columns={'balance': 'current_stock'})[['item_name', 'current_stock', 'expiry_date']]
+
+    expired = in_stock[in_stock['expiry_date'] < today]
+    expired = expired.sort_values('expiry_date', ascending=False, kind='stable').reset_index(drop=True)
+    near_expiry = in_stock[(in_stock['expiry_date'] >= today) & (in_stock['expiry_date'] <= horizon)]
+    near_expiry = near_expiry.sort_values('expiry_date', kind='stable').reset_index(drop=True)
+
+    stock = balances.groupby(['item_id', 'item_name'], sort=False)['balance'].sum()
+    low_stock = stock[stock < LOW_STOCK_LEVEL].reset_index(level='item_id', drop=True)
+    low_stock = pd.DataFrame({
+        'name': low_stock.index,
+        'current_stock': low_stock.to_numpy(),
+        'minimum_stock': LOW_STOCK_LEVEL,
+        'shortage': LOW_STOCK_LEVEL - low_stock.to_numpy(),
+    })
+    low_stock = low_stock.sort_values('shortage', ascending=False, kind='stable').reset_index(drop=True)
+    return expired, near_expiry, low_stock
+
+
+def _timed(func, db):
+    start = time.perf_counter()
+    result = func(db)
+    return result, time.perf_counter() - start
+
+
+def _run_in_snapshot(db, func):
+    with db.read_snapshot() as snapshot:
+        return _timed(func, snapshot)
+
+
+def run_queries(db, parallel=False):
+    """Results and durations of REPORT_QUERIES, run side by side on reader connections if parallel"""
+    if parallel:
+        with ThreadPoolExecutor(max_workers=len(REPORT_QUERIES)) as pool:
+            futures = {name: pool.submit(_run_in_snapshot, db, func) for name, func in REPORT_QUERIES.items()}
+            return {name: future.result() for name, future in futures.items()}
+    # One snapshot keeps every section consistent with the others
+    with db.read_snapshot() as snapshot:
+        return {name: _timed(func, snapshot) for name, func in REPORT_QUERIES.items()}
+
+
+def build_reports(db, parallel=False):
+    """Every Reports-tab section from one lot-balance read and one monthly read"""
+    start = time.perf_counter()
+    results = run_queries(db, parallel)
+    timings = {name: duration for name, (_, duration) in results.items()}
+    derive_start = time.perf_counter()
+    # date('now') in the old queries is the UTC date
+    expired, near_expiry, low_stock = compute_sections(
+        results["lot_balances"][0], datetime.now(timezone.utc).date()
+    )
+    timings["derive"] = time.perf_counter() - derive_start
+    timings["total"] = time.perf_counter() - start
+    return Reports(expired, near_expiry, low_stock, results["monthly"][0], timings)
+
+
+def get_reports(db, parallel=False):
+    """Reports-tab sections for db, cached until the data version or the date changes"""
+    key = (db.get_data_version(), datetime.now(timezone.utc).date())
+    with _cache_lock:
+        cached = _reports_cache.get(db.get_db_path())
+        if cached and cached[0] == key:
+            return cached[1]
+
+    reports = build_reports(db, parallel)
+
+    with _cache_lock:
+        _reports_cache[db.get_db_path()] = (key, reports)
+    return reports
@@ -0,0 +1,106 @@
+import threading
+import time
+import traceback
+from datetime import datetime
+
+
+class Job:
+    """A named task run every interval seconds"""
+
+    def __init__(self, name, func, interval, run_immediately=False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.next_run = time.monotonic() + (0 if run_immediately else interval)
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.last_started = None
+        self.last_duration = None
+        self.last_result = None
+        self.last_error = None
+
+    def status(self):
+        return {
+            "job": self.name,
+            "interval_s": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started": self.last_started,
+            "last_duration_s": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+            "next_run_in_s": max(0, round(self.next_run - time.monotonic())),
+        }
+
+
+class Scheduler:
+    """Runs registered jobs on a background thread, never overlapping a job with itself"""
+
+    def __init__(self, tick=1.0):
+        self.tick = tick
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_job(self, name, func, interval, run_immediately=False):
+        """Register func to run every interval seconds; its return value is shown as the result"""
+        with self._lock:
+            self._jobs[name] = Job(name, func, interval, run_immediately)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="inventory-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def run_now(self, name):
+        """Start a job immediately unless it is already running"""
+        with self._lock:
+            job = self._jobs[name]
+            return self._launch(job)
+
+    def status(self):
+        with self._lock:
+            return [job.status() for job in self._jobs.values()]
+
+    def _loop(self):
+        while not self._stop.wait(self.tick):
+            now = time.monotonic()
+            with self._lock:
+                for job in self._jobs.values():
+                    if now >= job.next_run:
+                        self._launch(job)
+
+    def _launch(self, job):
+        # Overlap protection: a job still running from its last slot is skipped
+        if job.running:
+            return False
+        job.running = True
+        job.next_run = time.monotonic() + job.interval
+        threading.Thread(target=self._run, args=(job,), name=f"job-{job.name}", daemon=True).start()
+        return True
+
+    def _run(self, job):
+        start = time.perf_counter()
+        job.last_started = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            result = job.func()
+            job.last_result = None if result is None else str(result)
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"
+            print(f"Job {job.name} failed:\n{traceback.format_exc()}")
+        finally:
+            job.last_duration = time.perf_counter() - start
+            job.runs += 1
+            job.running = False
@@ -20,25 +20,12 @@ def format_date(date_str):
 def create_monthly_transaction_chart(data):
     """Display monthly transactions in tabular format"""
     if 'item_name' in data.columns:
+        from attached_assets.view_models import monthly_summary
         st.subheader("Monthly Transactions Summary")
         
-        # Prepare the data for display
-        display_data = data.copy()
-        display_data['month'] = pd.to_datetime(display_data['month'] + '-01').dt.strftime('%B %Y')
-        
-        # Rename columns for better display
-        display_data = display_data.rename(columns={
-            'month': 'Month',
-            'item_name': 'Item',
-            'category': 'Category',
-            'stock_in': 'Stock In',
-            'stock_out': 'Stock Out',
-            'net_change': 'Net Change'
-        })
-        
         # Display the data in a table
         st.dataframe(
-            display_data[['Month', 'Item', 'Category', 'Stock In', 'Stock Out', 'Net Change']],
+            monthly_summary(data),
             hide_index=True,
             use_container_width=True
         )
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from attached_assets.utils import format_date
+
+MONTHLY_SUMMARY_COLUMNS = {
+    'month': 'Month',
+    'item_name': 'Item',
+    'category': 'Category',
+    'stock_in': 'Stock In',
+    'stock_out': 'Stock Out',
+    'net_change': 'Net Change',
+}
+
+
+def format_dates(values):
+    """format_date for a whole column, formatting each distinct value once"""
+    values = pd.Series(values)
+    # Dates repeat heavily (lots, months), so factorize and format only the uniques
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format='%Y-%m-%d', errors='coerce')
+    labels = parsed.dt.strftime('%B %d, %Y').to_numpy(dtype=object)
+    # Anything that is not a 'YYYY-MM-DD' string goes through format_date itself
+    for position in np.flatnonzero(parsed.isna().to_numpy()):
+        labels[position] = format_date(uniques[position])
+    # Missing values get code -1, which takes the trailing "no date" label
+    labels = np.append(labels, format_date(None))
+    return pd.Series(labels.take(codes), index=values.index)
+
+
+def format_months(values):
+    """'YYYY-MM' strings as 'Month YYYY' labels"""
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    labels = pd.to_datetime(pd.Series(uniques) + '-01', format='%Y-%m-%d').dt.strftime('%B %Y')
+    return pd.Series(labels.to_numpy().take(codes), index=values.index)
+
+
+def filter_stock(stock, search):
+    """Current-stock rows whose name contains search, with only the displayed columns"""
+    if search:
+        # A plain substring match: characters such as '(' or '+' in item names are not regex syntax
+        stock = stock[stock['name'].str.contains(search, case=False, regex=False)]
+    return stock[['name', 'current_stock']]
+
+
+def stock_totals(stock):
+    """Number of items and total units for the metric cards"""
+    return len(stock), int(stock['current_stock'].sum())
+
+
+def monthly_summary(monthly):
+    """Monthly transaction summary with display labels and column names"""
+    display = monthly[list(MONTHLY_SUMMARY_COLUMNS)].rename(columns=MONTHLY_SUMMARY_COLUMNS)
+    display['Month'] = format_months(monthly['month']).to_numpy()
+    return display
+
+
+def lot_key(lot):
+    """(expiry_date, batch_number) identifying a lot; unlike the LotRecord it stays valid as stock is issued"""
+    return lot.expiry_date, lot.batch_number
+
+
+def lot_labels(lots):
+    """Selectbox label for each LotRecord, keyed by lot_key()"""
+    expiries = format_dates([lot.expiry_date for lot in lots])
+    return {
+        lot_key(lot): f"Batch: {lot.batch_number} (Expires: {expiry})"
+        for lot, expiry in zip(lots, expiries)
+    }
@@ -0,0 +1,100 @@
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+# Seconds a write waits for another process to release the database lock
+BUSY_TIMEOUT = 30
+
+
+class GroupCommitWriter:
+    """Applies all writes for one database on a single thread
+
+    Requests that arrive while a transaction is being written are batched into
+    the next transaction, so a burst of writes costs one commit (and one fsync)
+    instead of one each. Every request runs in its own savepoint: a failing
+    request is rolled back alone and its future receives the exception.
+    """
+
+    def __init__(self, db_path, max_batch=500):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                                     check_same_thread=False)
+        # WAL lets readers keep working while the writer commits
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._thread = threading.Thread(target=self._loop, name="inventory-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args):
+        """Queue func(cursor, *args) to run in the next transaction; returns a Future"""
+        future = Future()
+        self._queue.put((func, args, future))
+        return future
+
+    def execute(self, func, *args):
+        """Run func(cursor, *args) in the writer and wait for its committed result"""
+        return self.submit(func, *args).result()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        cursor = self._conn.cursor()
+        while True:
+            batch = self._next_batch()
+            outcomes = []
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                for func, args, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    cursor.execute("SAVEPOINT request")
+                    try:
+                        outcomes.append((future, func(cursor, *args), None))
+                        cursor.execute("RELEASE request")
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO request")
+                        cursor.execute("RELEASE request")
+                        outcomes.append((future, None, e))
+                cursor.execute("COMMIT")
+            except Exception as e:
+                # The whole batch failed (e.g. the lock could not be taken); fail every request
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+                for func, args, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(outcomes)
+            # Results are only published once the batch is durable
+            for future, result, error in outcomes:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path):
+    """The process-wide writer for a database file"""
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        if key not in _writers:
+            _writers[key] = GroupCommitWriter(db_path)
+        return _writers[key]
@@ -0,0 +1,81 @@
+"""Long-horizon analytics on SQLite vs the DuckDB backend in attached_assets.analytics_backend
+
+Usage (from the repository root):
+
+    python -m benchmarks.analytics_engines --scales 100000 1000000
+
+For each ANALYTICS_QUERIES aggregation:
+
+    sqlite        the query on the database's own connection
+    duckdb_cold   a new DuckDB backend: load the columnar copy, then query
+    duckdb_warm   the query on an up-to-date copy
+    duckdb_insert one transaction added, then the query (appends one row to the copy)
+
+The DuckDB columns are skipped when duckdb is not installed.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from attached_assets.analytics_backend import ANALYTICS_QUERIES, DuckDBAnalytics, SQLiteAnalytics, duckdb_available
+from attached_assets.database import Database
+from benchmarks.synthetic import cached_inventory
+
+CASES = ("sqlite", "duckdb_cold", "duckdb_warm", "duckdb_insert")
+
+
+def _time(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        fn(state)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run_scale(n_transactions, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "inventory.db")
+        shutil.copy2(cached_inventory(n_transactions), db_path)
+        db = Database(db_path)
+        try:
+            results = {}
+            sqlite = SQLiteAnalytics()
+            warm = DuckDBAnalytics() if duckdb_available() else None
+            for name in ANALYTICS_QUERIES:
+                result = {"sqlite": _time(lambda _: sqlite.query(db, name), repeat)}
+                if warm is not None:
+                    result["duckdb_cold"] = _time(lambda backend: backend.query(db, name), repeat,
+                                                  setup=DuckDBAnalytics)
+                    warm.query(db, name)
+                    result["duckdb_warm"] = _time(lambda _: warm.query(db, name), repeat)
+                    result["duckdb_insert"] = _time(lambda _: warm.query(db, name), repeat,
+                                                    setup=lambda: db.add_stock(1, 1, None, "benchmark"))
+                results[name] = result
+            return results
+        finally:
+            db.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if not duckdb_available():
+        print("duckdb is not installed; only SQLite is measured")
+    print(f"{'transactions':>12}  {'query':<28}" + "".join(f"{case + ' ms':>17}" for case in CASES))
+    for n in args.scales:
+        for name, result in run_scale(n, args.repeat).items():
+            print(f"{n:>12,}  {name:<28}" + "".join(
+                f"{result[case] * 1000:>17.1f}" if case in result else f"{'-':>17}" for case in CASES
+            ))
+
+
+if __name__ == "__main__":
+    main()
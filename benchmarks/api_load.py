@@ -0,0 +1,182 @@
+"""Sustained-load benchmark for the JSON HTTP API
+
+Usage (from the repository root):
+
+    python -m benchmarks.api_load --transactions 100000 --clients 1 8 32 --duration 10
+
+Each client keeps one HTTP/1.1 connection open and loops over a scanner-like
+mix: look up an item, read its lots, read a lot balance, then receive and
+issue one unit. A second pass sends the same movements through /movements
+in batches to show the effect of request batching.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import quote
+
+from attached_assets.api import InventoryServer
+from benchmarks.synthetic import cached_inventory
+
+
+class Client:
+    """One keep-alive connection to the API"""
+
+    def __init__(self, port):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port)
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if data else {}
+        self.conn.request(method, path, data, headers)
+        response = self.conn.getresponse()
+        payload = json.loads(response.read())
+        return response.status, payload
+
+
+def _catalogue(port):
+    status, items = Client(port).request("GET", "/items")
+    return [item["name"] for item in items]
+
+
+def _scanner_loop(port, names, stop, latencies, errors, seed):
+    """Single-request mix, one movement per request"""
+    rng = random.Random(seed)
+    client = Client(port)
+    expiry = (date.today() + timedelta(days=365)).isoformat()
+    while not stop.is_set():
+        name = quote(rng.choice(names))
+        start = time.perf_counter()
+        status, item = client.request("GET", f"/items/lookup?name={name}")
+        latencies.setdefault("lookup", []).append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(status)
+            continue
+        item_path = f"/items/{item['id']}"
+        movement = {"item_id": item["id"], "quantity": 1, "expiry_date": expiry, "batch_number": f"LOAD-{seed}"}
+        for label, method, path, body, expected in [
+            ("lots", "GET", f"{item_path}/lots", None, 200),
+            ("balance", "GET", f"{item_path}/balance?expiry_date={expiry}", None, 200),
+            ("stock_in", "POST", "/stock/in", dict(movement, source="Load test"), 201),
+            ("stock_out", "POST", "/stock/out", dict(movement, destination="Load test"), 201),
+        ]:
+            start = time.perf_counter()
+            status, _ = client.request(method, path, body)
+            latencies.setdefault(label, []).append(time.perf_counter() - start)
+            if status != expected:
+                errors.append(status)
+
+
+def _batch_loop(port, names, stop, latencies, errors, seed, batch_size):
+    """Batched movements: batch_size receipts and issues per request"""
+    rng = random.Random(seed)
+    client = Client(port)
+    _, items = client.request("GET", "/items")
+    ids = [item["id"] for item in items if item["name"] in names]
+    expiry = (date.today() + timedelta(days=365)).isoformat()
+    while not stop.is_set():
+        movements = []
+        for item_id in rng.sample(ids, min(batch_size // 2, len(ids))):
+            movement = {"item_id": item_id, "quantity": 1, "expiry_date": expiry, "batch_number": f"LOAD-{seed}"}
+            movements.append(dict(movement, type="IN", source="Load test"))
+            movements.append(dict(movement, type="OUT", destination="Load test"))
+        start = time.perf_counter()
+        status, payload = client.request("POST", "/movements", {"movements": movements})
+        latencies.setdefault("movements", []).append(time.perf_counter() - start)
+        if status != 200 or payload["recorded"] != len(movements):
+            errors.append(status)
+
+
+def run(port, names, n_clients, duration, batch_size=None):
+    """Requests (and movements) per second sustained by n_clients for duration seconds"""
+    stop = threading.Event()
+    latencies = [{} for _ in range(n_clients)]
+    errors = []
+    threads = []
+    for i in range(n_clients):
+        if batch_size:
+            args = (port, names, stop, latencies[i], errors, i, batch_size)
+            threads.append(threading.Thread(target=_batch_loop, args=args))
+        else:
+            threads.append(threading.Thread(target=_scanner_loop, args=(port, names, stop, latencies[i], errors, i)))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    merged = {}
+    for client_latencies in latencies:
+        for label, samples in client_latencies.items():
+            merged.setdefault(label, []).extend(samples)
+    requests = sum(len(samples) for samples in merged.values())
+    if batch_size:
+        movements = len(merged.get("movements", [])) * batch_size
+    else:
+        movements = len(merged.get("stock_in", [])) + len(merged.get("stock_out", []))
+    return {
+        "clients": n_clients,
+        "requests_per_s": round(requests / elapsed, 1),
+        "movements_per_s": round(movements / elapsed, 1),
+        "errors": len(errors),
+        "latency_ms": {
+            label: {
+                "p50": round(statistics.median(samples) * 1000, 2),
+                "p95": round(statistics.quantiles(samples, n=20)[-1] * 1000, 2) if len(samples) > 1 else None,
+            }
+            for label, samples in merged.items()
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=100000, help="size of the synthetic database")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10, help="seconds per run")
+    parser.add_argument("--batch-size", type=int, default=50, help="movements per /movements request")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    source = cached_inventory(args.transactions)
+    report = {"transactions": args.transactions, "single": [], "batched": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "inventory.db")
+        shutil.copy2(source, db_path)
+        server = InventoryServer(("127.0.0.1", 0), db_path, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        names = _catalogue(port)
+
+        for mode, batch_size in (("single", None), ("batched", args.batch_size)):
+            print(f"{mode}: {'clients':>8}{'req/s':>10}{'moves/s':>10}{'errors':>8}", file=sys.stderr)
+            for n in args.clients:
+                result = run(port, names, n, args.duration, batch_size)
+                report[mode].append(result)
+                print(f"{'':>{len(mode) + 2}}{n:>8}{result['requests_per_s']:>10.0f}"
+                      f"{result['movements_per_s']:>10.0f}{result['errors']:>8}", file=sys.stderr)
+
+        server.shutdown()
+        server.server_close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Headless rerun-latency benchmark for main.py using Streamlit's AppTest
+
+Usage (from the repository root):
+
+    python -m benchmarks.app_rerun --scales 10000 100000 1000000 --output app_rerun.json
+    python -m benchmarks.app_rerun --compare old.json new.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic import cached_inventory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(ROOT, "main.py")
+DEFAULT_SCALES = [10000, 100000, 1000000]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _summary(samples):
+    return {
+        "runs": len(samples),
+        "min_s": round(min(samples), 4),
+        "median_s": round(statistics.median(samples), 4),
+        "max_s": round(max(samples), 4),
+    }
+
+
+def _check(at, label):
+    if at.exception:
+        raise RuntimeError(f"{label} raised: {at.exception[0].value}")
+
+
+def _start_app(db_path, timeout):
+    """Start an authenticated app session against db_path"""
+    os.environ["INVENTORY_DB_PATH"] = db_path
+    # Background jobs would compete with the measured reruns
+    os.environ["INVENTORY_SCHEDULER"] = "off"
+    at = AppTest.from_file(MAIN_SCRIPT, default_timeout=timeout)
+    at.session_state["authenticated"] = True
+    at.session_state["username"] = "admin"
+    at.run()
+    _check(at, "initial run")
+    return at
+
+
+def _select_view(at, view):
+    at.radio(key="active_view").set_value(view).run()
+    _check(at, view)
+
+
+def _by_label(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def _prepare_export(at, choice):
+    """Prepare an export in the sidebar panel and rerun until its download button is shown"""
+    at.selectbox(key="export_choice").set_value(choice).run()
+    at.button(key="prepare_export").click().run()
+    job = at.session_state["export_job"]
+    while job.running:
+        time.sleep(0.01)
+    # The rerun that follows the build replaces the progress bar with the download button
+    at.run()
+    if job.error:
+        raise RuntimeError(f"export of {choice} failed: {job.error}")
+
+
+def bench_views(at, repeat):
+    """Time switching to each view, then plain reruns while it is active"""
+    results = {}
+    for view in at.radio(key="active_view").options:
+        switch = _timed(lambda: _select_view(at, view))
+        reruns = [_timed(at.run) for _ in range(repeat)]
+        _check(at, view)
+        results[view] = {"switch_s": round(switch, 4), **_summary(reruns)}
+    return results
+
+
+def bench_actions(at, repeat):
+    """Time the common user actions"""
+    views = at.radio(key="active_view").options
+    results = {}
+
+    # Search in the current stock table
+    _select_view(at, views[0])
+    samples = []
+    for n in range(repeat):
+        samples.append(_timed(lambda: at.text_input(key="stock_search").input(f"Reagent 0{n}").run()))
+    _check(at, "stock search")
+    results["search_stock"] = _summary(samples)
+
+    # Filter the transaction search by type
+    _select_view(at, views[3])
+    samples = []
+    for n in range(repeat):
+        value = ["IN", "OUT", "All"][n % 3]
+        samples.append(_timed(lambda: _by_label(at.selectbox, "Transaction Type").set_value(value).run()))
+    _check(at, "transaction search")
+    results["search_transactions"] = _summary(samples)
+
+    # Record a stock in
+    _select_view(at, views[1])
+    samples = []
+    for n in range(repeat):
+        at.text_input(key="stock_in_source").input("Benchmark")
+        at.text_input(key="stock_in_batch").input(f"BENCH-{n}")
+        samples.append(_timed(lambda: at.button(key="submit_stock_in").click().run()))
+    _check(at, "stock in")
+    results["stock_in"] = _summary(samples)
+
+    # Record a stock out from the first available lot
+    _select_view(at, views[2])
+    samples = []
+    for _ in range(repeat):
+        if not at.button(key="submit_stock_out"):
+            break
+        at.text_input(key="stock_out_dest").input("Benchmark")
+        samples.append(_timed(lambda: at.button(key="submit_stock_out").click().run()))
+    _check(at, "stock out")
+    if samples:
+        results["stock_out"] = _summary(samples)
+
+    # Prepare stock and transaction exports from the sidebar until they can be downloaded;
+    # the first sample builds the file, later ones reuse it for the same data version
+    for key, choice in (("export_stock", "Stock Levels"), ("export_transactions", "Transaction History")):
+        samples = [_timed(lambda: _prepare_export(at, choice)) for _ in range(repeat)]
+        _check(at, key)
+        results[key] = _summary(samples)
+
+    return results
+
+
+def run_scale(n_transactions, repeat, timeout):
+    """Benchmark one synthetic database size"""
+    source = cached_inventory(n_transactions)
+    # Work on a copy so write actions never change the cached database
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "inventory.db")
+        shutil.copy2(source, db_path)
+        start = time.perf_counter()
+        at = _start_app(db_path, timeout)
+        initial = time.perf_counter() - start
+        views = bench_views(at, repeat)
+        actions = bench_actions(at, repeat)
+    return {"initial_run_s": round(initial, 4), "views": views, "actions": actions}
+
+
+def run(scales, repeat, timeout):
+    """Run every scale and return the JSON-serialisable report"""
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "scales": {},
+    }
+    # main.py loads its stylesheet relative to the working directory
+    os.chdir(ROOT)
+    for n in scales:
+        print(f"Benchmarking {n:,} transactions...", file=sys.stderr)
+        report["scales"][str(n)] = run_scale(n, repeat, timeout)
+    return report
+
+
+def _flatten(report):
+    flat = {}
+    for scale, result in report["scales"].items():
+        for group in ("views", "actions"):
+            for name, stats in result[group].items():
+                flat[(scale, group, name)] = stats["median_s"]
+    return flat
+
+
+def compare(old_report, new_report):
+    """Print median rerun times of two reports side by side"""
+    old, new = _flatten(old_report), _flatten(new_report)
+    print(f"{'scale':>9}  {'group':<8}{'name':<28}{'old (s)':>10}{'new (s)':>10}{'change':>9}")
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (int(k[0]), k[1], k[2])):
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        print(f"{key[0]:>9}  {key[1]:<8}{key[2]:<28}{old[key]:>10.4f}{new[key]:>10.4f}{change:>+8.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="number of synthetic transactions per run")
+    parser.add_argument("--repeat", type=int, default=3, help="samples per measurement")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per rerun")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two existing reports instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as old, open(args.compare[1]) as new:
+            compare(json.load(old), json.load(new))
+        return
+
+    report = run(args.scales, args.repeat, args.timeout)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
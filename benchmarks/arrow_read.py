@@ -0,0 +1,98 @@
+"""End-to-end latency and peak memory of the read paths behind st.dataframe
+
+Usage (from the repository root):
+
+    python -m benchmarks.arrow_read --scales 100000 1000000
+
+Each case runs a query and serializes the result to Arrow IPC bytes the way
+st.dataframe does (streamlit.dataframe_util.convert_anything_to_arrow_bytes):
+
+    read_sql        pd.read_sql_query frame, every column
+    compact_frame   projected search columns through compact_frame() (the Search view below ARROW_VIEW_MIN_ROWS)
+    arrow           cursor chunks -> Arrow record batches (_read_arrow)
+    arrow_compact   the same, typed with compact_table() (the Search view from ARROW_VIEW_MIN_ROWS up)
+
+Every case runs in a fresh process so its peak RSS is not hidden by an
+earlier case's high-water mark; pyarrow allocations are invisible to
+tracemalloc, so RSS is what is compared.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.synthetic import cached_inventory
+
+# The search covers all history so the result is as large as the database
+SEARCH_START = date(2000, 1, 1)
+
+CASES = ("read_sql", "compact_frame", "arrow", "arrow_compact")
+
+
+def _load(db, view, case):
+    from attached_assets.components import SEARCH_VIEW_COLUMNS
+    if view == "stock":
+        return db.get_current_stock(arrow=case.startswith("arrow"))
+    if case == "read_sql":
+        return db.search_transactions(SEARCH_START, date.today())
+    return db.search_transactions(SEARCH_START, date.today(), columns=SEARCH_VIEW_COLUMNS,
+                                  compact=case != "arrow", arrow=case.startswith("arrow"))
+
+
+def _run_case(db_path, view, case, repeat, results):
+    from streamlit.dataframe_util import convert_anything_to_arrow_bytes
+    from attached_assets.database import Database
+    db = Database(db_path)
+    # Warm the page cache and imports before the baseline is taken
+    convert_anything_to_arrow_bytes(_load(db, "stock", "read_sql"))
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = _load(db, view, case)
+        payload = convert_anything_to_arrow_bytes(data)
+        samples.append(time.perf_counter() - start)
+        del data
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    db.conn.close()
+    # ru_maxrss is in KiB on Linux
+    results.put((statistics.median(samples), peak * 1024, len(payload)))
+
+
+def run(db_path, view, case, repeat):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run_case, args=(db_path, view, case, repeat, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'transactions':>12}  {'view':<8}{'case':<15}{'latency ms':>12}{'peak MB':>10}{'payload MB':>12}")
+    for n in args.scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "inventory.db")
+            shutil.copy2(cached_inventory(n), db_path)
+            for view in ("search", "stock"):
+                for case in CASES:
+                    if view == "stock" and "compact" in case:
+                        continue
+                    latency, peak, payload = run(db_path, view, case, args.repeat)
+                    print(f"{n:>12,}  {view:<8}{case:<15}{latency * 1000:>12.0f}{peak / 2 ** 20:>10.1f}"
+                          f"{payload / 2 ** 20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Micro-benchmarks for every public Database method
+
+Usage (from the repository root):
+
+    python -m benchmarks.db_methods --scales 10000 100000 --output db_methods.json
+    python -m benchmarks.db_methods --baseline db_methods.json --tolerance 1.25
+
+With --baseline the run exits with status 1 when any method's median time
+exceeds its baseline median by more than the tolerance factor.
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from attached_assets.database import Database, read_generations
+from benchmarks.synthetic import cached_inventory
+
+DEFAULT_SCALES = [10000, 100000, 1000000]
+
+# Differences below this many seconds are treated as timer noise
+NOISE_FLOOR_S = 0.002
+
+
+def _sample_context(db):
+    """Pick an item and lot that exist in the database"""
+    cursor = db.conn.cursor()
+    cursor.execute("""
+    SELECT item_id, expiry_date, batch_number FROM transactions
+    WHERE transaction_type = 'IN'
+    ORDER BY id DESC LIMIT 1
+    """)
+    item_id, expiry_date, batch_number = cursor.fetchone()
+    today = date.today()
+    return {
+        "item_id": item_id,
+        "expiry_date": expiry_date,
+        "batch_number": batch_number,
+        "start_date": today - timedelta(days=30),
+        "end_date": today,
+        "snapshot_date": today - timedelta(days=1),
+        "as_of": today - timedelta(days=200),
+        "archive_start": today - timedelta(days=900),
+        "counter": 0,
+        "archive_days": 0,
+    }
+
+
+def _next(ctx, key="counter"):
+    ctx[key] += 1
+    return ctx[key]
+
+
+def _in_snapshot(db, read):
+    with db.read_snapshot() as snapshot:
+        return read(snapshot)
+
+
+# Methods that reshape the data run after all others so they do not skew them
+RUN_LAST = ["archive_transactions"]
+
+# One callable per public Database method; write methods run against a scratch copy
+CASES = {
+    "get_db_path": lambda db, ctx: db.get_db_path(),
+    "create_tables": lambda db, ctx: db.create_tables(),
+    "verify_user": lambda db, ctx: db.verify_user("admin", "admin123"),
+    "add_user": lambda db, ctx: db.add_user(f"bench_user_{_next(ctx)}", "secret"),
+    "change_password": lambda db, ctx: db.change_password("admin", "admin123", "admin123"),
+    "add_item": lambda db, ctx: db.add_item(f"Bench Item {_next(ctx)}", "Benchmark"),
+    "update_item": lambda db, ctx: db.update_item(ctx["item_id"], minimum_stock=20),
+    "get_items": lambda db, ctx: db.get_items(),
+    "get_item": lambda db, ctx: db.get_item(ctx["item_id"]),
+    "get_item_by_name": lambda db, ctx: db.get_item_by_name("Reagent 000001"),
+    "get_item_names": lambda db, ctx: db.get_item_names(),
+    "search_item_names": lambda db, ctx: db.search_item_names("gent 0001"),
+    "add_stock": lambda db, ctx: db.add_stock(
+        ctx["item_id"], 10, ctx["expiry_date"], "Benchmark", f"BENCH-{_next(ctx)}"),
+    "remove_stock": lambda db, ctx: db.remove_stock(ctx["item_id"], 1, "Benchmark", ctx["expiry_date"]),
+    "record_movements": lambda db, ctx: db.record_movements([
+        {"type": "IN", "item_id": ctx["item_id"], "quantity": 1, "expiry_date": ctx["expiry_date"],
+         "source": "Benchmark", "batch_number": f"BENCH-{_next(ctx)}"}
+        for _ in range(50)
+    ]),
+    "get_current_stock": lambda db, ctx: db.get_current_stock(),
+    "get_monthly_transactions": lambda db, ctx: db.get_monthly_transactions(),
+    "get_low_stock_items": lambda db, ctx: db.get_low_stock_items(),
+    "get_lot_balances": lambda db, ctx: db.get_lot_balances(),
+    "get_item_expiry_dates": lambda db, ctx: db.get_item_expiry_dates(ctx["item_id"]),
+    "lookup_lot": lambda db, ctx: db.lookup_lot(ctx["batch_number"]),
+    "get_item_lots": lambda db, ctx: db.get_item_lots(ctx["item_id"]),
+    "get_lots": lambda db, ctx: db.get_lots(),
+    "get_available_stock": lambda db, ctx: db.get_available_stock(ctx["item_id"], ctx["expiry_date"]),
+    "search_transactions": lambda db, ctx: db.search_transactions(ctx["start_date"], ctx["end_date"]),
+    "get_all_transactions": lambda db, ctx: db.get_all_transactions(),
+    "iter_all_transactions": lambda db, ctx: sum(len(rows) for _, rows in db.iter_all_transactions()),
+    "import_items": lambda db, ctx: db.import_items(
+        [(f"Imported Item {_next(ctx)}", "Benchmark", 20) for _ in range(100)]),
+    "import_transactions": lambda db, ctx: db.import_transactions([
+        (ctx["item_id"], "IN", 1, str(ctx["end_date"]), "Benchmark", ctx["expiry_date"],
+         f"IMPORT-{_next(ctx)}", None, "benchmark", None)
+        for _ in range(1000)
+    ]),
+    "get_expired_items": lambda db, ctx: db.get_expired_items(),
+    "get_near_expiry_items": lambda db, ctx: db.get_near_expiry_items(),
+    "create_snapshot": lambda db, ctx: db.create_snapshot(ctx["snapshot_date"]),
+    "refresh_snapshots": lambda db, ctx: db.refresh_snapshots(),
+    "invalidate_snapshots": lambda db, ctx: db.invalidate_snapshots(ctx["end_date"]),
+    "get_stock_as_of": lambda db, ctx: db.get_stock_as_of(ctx["as_of"]),
+    "get_archive_cutoff": lambda db, ctx: db.get_archive_cutoff(),
+    "get_daily_consumption": lambda db, ctx: db.get_daily_consumption(ctx["end_date"] - timedelta(days=89)),
+    "get_data_version": lambda db, ctx: db.get_data_version(),
+    "advance_generations": lambda db, ctx: db.advance_generations(read_generations(db.get_db_path())),
+    "read_snapshot": lambda db, ctx: _in_snapshot(db, lambda snapshot: snapshot.get_data_version()),
+    "archive_transactions": lambda db, ctx: db.archive_transactions(
+        ctx["archive_start"] + timedelta(days=_next(ctx, "archive_days"))),
+}
+
+
+def public_methods():
+    """Names of all public Database methods"""
+    return sorted(
+        name for name, _ in inspect.getmembers(Database, inspect.isfunction)
+        if not name.startswith("_")
+    )
+
+
+def time_method(db, ctx, name, repeat):
+    """Median, min and max wall time of one method"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        CASES[name](db, ctx)
+        samples.append(time.perf_counter() - start)
+    return {
+        "runs": repeat,
+        "min_s": round(min(samples), 6),
+        "median_s": round(statistics.median(samples), 6),
+        "max_s": round(max(samples), 6),
+    }
+
+
+def run_scale(n_transactions, repeat, methods):
+    """Time every method against one synthetic database size"""
+    source = cached_inventory(n_transactions)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "inventory.db")
+        shutil.copy2(source, db_path)
+        db = Database(db_path)
+        # Build the month-end snapshots once so historical lookups run in steady state
+        db.refresh_snapshots()
+        ctx = _sample_context(db)
+        for name in methods:
+            results[name] = time_method(db, ctx, name, repeat)
+        db.conn.close()
+    return results
+
+
+def check_regressions(report, baseline, tolerance):
+    """List methods whose median exceeds the baseline by more than tolerance"""
+    failures = []
+    for scale, methods in report["scales"].items():
+        for name, stats in methods.items():
+            base = baseline.get("scales", {}).get(scale, {}).get(name)
+            if not base:
+                continue
+            limit = base["median_s"] * tolerance + NOISE_FLOOR_S
+            if stats["median_s"] > limit:
+                failures.append(
+                    f"{name} @ {int(scale):,}: {stats['median_s']:.4f}s > {limit:.4f}s "
+                    f"(baseline {base['median_s']:.4f}s x {tolerance})"
+                )
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="number of synthetic transactions per run")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per method")
+    parser.add_argument("--methods", nargs="+", help="only time these methods")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="fail when slower than this earlier report")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="allowed slowdown factor against the baseline")
+    args = parser.parse_args(argv)
+
+    missing = [name for name in public_methods() if name not in CASES]
+    if missing:
+        print(f"No benchmark case for: {', '.join(missing)}", file=sys.stderr)
+    methods = args.methods or [name for name in public_methods() if name in CASES]
+    methods.sort(key=lambda name: name in RUN_LAST)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    for n in args.scales:
+        print(f"Benchmarking {n:,} transactions...", file=sys.stderr)
+        report["scales"][str(n)] = run_scale(n, args.repeat, methods)
+        for name, stats in report["scales"][str(n)].items():
+            print(f"  {name:<28}{stats['median_s'] * 1000:>10.2f} ms", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = check_regressions(report, json.load(f), args.tolerance)
+        if failures:
+            print("Performance regressions:", file=sys.stderr)
+            for failure in failures:
+                print(f"  {failure}", file=sys.stderr)
+            sys.exit(1)
+        print("No performance regressions.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
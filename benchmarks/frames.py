@@ -0,0 +1,83 @@
+"""Per-view memory of transaction frames: object columns vs projected, compact frames
+
+Usage (from the repository root):
+
+    python -m benchmarks.frames --scales 100000 1000000
+
+For each view the "before" frame is what the view used to load (every
+column, strings as Python objects); "after" loads only the view's columns
+through compact_frame(). Memory is measured with deep=True, so the Python
+strings in object columns are counted.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+
+from attached_assets.components import SEARCH_VIEW_COLUMNS
+from attached_assets.database import Database
+from attached_assets.frames import frame_memory
+from benchmarks.synthetic import cached_inventory
+
+# A movement history needs only these
+HISTORY_COLUMNS = ("item_name", "category", "transaction_type", "quantity", "date")
+
+
+def views(db):
+    """view -> (before loader, after loader)"""
+    today = date.today()
+    return {
+        "search_30d": (
+            lambda: db.search_transactions(today - timedelta(days=30), today),
+            lambda: db.search_transactions(today - timedelta(days=30), today,
+                                           columns=SEARCH_VIEW_COLUMNS, compact=True),
+        ),
+        "search_365d": (
+            lambda: db.search_transactions(today - timedelta(days=365), today),
+            lambda: db.search_transactions(today - timedelta(days=365), today,
+                                           columns=SEARCH_VIEW_COLUMNS, compact=True),
+        ),
+        "all_transactions": (
+            lambda: db.get_all_transactions(),
+            lambda: db.get_all_transactions(compact=True),
+        ),
+        "history": (
+            lambda: db.get_all_transactions(),
+            lambda: db.get_all_transactions(columns=HISTORY_COLUMNS, compact=True),
+        ),
+    }
+
+
+def _measure(loader):
+    start = time.perf_counter()
+    frame = loader()
+    return frame_memory(frame), time.perf_counter() - start, len(frame)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[100000])
+    args = parser.parse_args(argv)
+
+    print(f"{'transactions':>12}  {'view':<18}{'rows':>10}{'before MB':>11}{'after MB':>10}{'saved':>8}"
+          f"{'before ms':>11}{'after ms':>10}")
+    for n in args.scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "inventory.db")
+            shutil.copy2(cached_inventory(n), db_path)
+            db = Database(db_path)
+            try:
+                for name, (before, after) in views(db).items():
+                    before_bytes, before_s, rows = _measure(before)
+                    after_bytes, after_s, _ = _measure(after)
+                    print(f"{n:>12,}  {name:<18}{rows:>10,}{before_bytes / 2 ** 20:>11.1f}"
+                          f"{after_bytes / 2 ** 20:>10.1f}{1 - after_bytes / before_bytes:>8.0%}"
+                          f"{before_s * 1000:>11.0f}{after_s * 1000:>10.0f}")
+            finally:
+                db.conn.close()
+
+
+if __name__ == "__main__":
+    main()
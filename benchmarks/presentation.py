@@ -0,0 +1,147 @@
+"""Micro-benchmarks for the presentation layer: row-wise versions vs attached_assets.view_models
+
+Usage (from the repository root):
+
+    python -m benchmarks.presentation --rows 10000 100000
+
+Each case times the per-rerun work of one view path on synthetic frames of
+the given size. The "before" functions reproduce the row-by-row code the
+view models replaced.
+"""
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from attached_assets.records import LotRecord
+from attached_assets.utils import format_date
+from attached_assets.view_models import filter_stock, format_dates, format_months, lot_key, lot_labels, monthly_summary
+
+
+def _frames(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    start = date.today() - timedelta(days=3 * 365)
+    days = rng.integers(0, 5 * 365, rows)
+    expiry = pd.Series([str(start + timedelta(days=int(d))) for d in days])
+    expiry[rng.random(rows) < 0.05] = None
+    stock = pd.DataFrame({
+        "id": np.arange(rows),
+        "name": [f"Reagent {i:06d}" for i in range(rows)],
+        "category": rng.choice(["Kits", "Buffers", "Enzymes"], rows),
+        "minimum_stock": 20,
+        "current_stock": rng.integers(0, 500, rows),
+    })
+    months = pd.Series([f"{start.year + m // 12}-{m % 12 + 1:02d}" for m in rng.integers(0, 36, rows)])
+    monthly = pd.DataFrame({
+        "month": months,
+        "item_name": stock["name"],
+        "category": stock["category"],
+        "stock_in": rng.integers(0, 100, rows),
+        "stock_out": rng.integers(0, 100, rows),
+    })
+    monthly["net_change"] = monthly["stock_in"] - monthly["stock_out"]
+    lots = pd.DataFrame({
+        "expiry_date": expiry,
+        "batch_number": [f"B{i:06d}" for i in range(rows)],
+        "available_stock": rng.integers(1, 100, rows),
+    })
+    return stock, monthly, expiry, lots
+
+
+# Row-wise implementations the view models replaced
+
+def filter_stock_before(stock, search):
+    filtered = stock.copy()
+    if search:
+        filtered = filtered[filtered["name"].str.contains(search, case=False)]
+    return filtered[["name", "current_stock"]]
+
+
+def monthly_summary_before(monthly):
+    display = monthly.copy()
+    display["month"] = pd.to_datetime(display["month"] + "-01").dt.strftime("%B %Y")
+    display = display.rename(columns={
+        "month": "Month", "item_name": "Item", "category": "Category",
+        "stock_in": "Stock In", "stock_out": "Stock Out", "net_change": "Net Change",
+    })
+    return display[["Month", "Item", "Category", "Stock In", "Stock Out", "Net Change"]]
+
+
+def format_dates_before(values):
+    return values.apply(format_date)
+
+
+def select_lot_before(lots, choice):
+    options = lots.apply(
+        lambda x: f"Batch: {x['batch_number']} (Expires: {format_date(x['expiry_date'])})", axis=1
+    ).tolist()
+    row = lots.iloc[options.index(choice)]
+    return row["expiry_date"], row["batch_number"], row["available_stock"]
+
+
+def select_lot_after(records, choice):
+    # The selectbox returns the chosen lot key; the stock comes from the lots just fetched
+    labels = lot_labels(records)
+    lots_by_key = {lot_key(lot): lot for lot in records}
+    return choice[0], choice[1], lots_by_key[choice].available_stock, labels[choice]
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def cases(rows):
+    """(before, after) callables per view path on frames of the given size"""
+    stock, monthly, expiry, lots = _frames(rows)
+    records = [LotRecord(*row) for row in lots.itertuples(index=False, name=None)]
+    chosen = records[len(records) // 2]
+    choice = lot_labels(records)[lot_key(chosen)]
+    return {
+        "filter_stock": (
+            lambda: filter_stock_before(stock, "reagent 0001"),
+            lambda: filter_stock(stock, "reagent 0001"),
+        ),
+        "monthly_summary": (
+            lambda: monthly_summary_before(monthly),
+            lambda: monthly_summary(monthly),
+        ),
+        "format_dates": (
+            lambda: format_dates_before(expiry),
+            lambda: format_dates(expiry),
+        ),
+        "months_only": (
+            lambda: pd.to_datetime(monthly["month"] + "-01").dt.strftime("%B %Y"),
+            lambda: format_months(monthly["month"]),
+        ),
+        "select_lot": (
+            lambda: select_lot_before(lots, choice),
+            lambda: select_lot_after(records, lot_key(chosen)),
+        ),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<18}{'rows':>10}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for rows in args.rows:
+        for name, (before, after) in cases(rows).items():
+            before_s = _time(before, args.repeat)
+            after_s = _time(after, args.repeat)
+            print(f"{name:<18}{rows:>10,}{before_s * 1000:>12.2f}{after_s * 1000:>12.2f}"
+                  f"{before_s / after_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Query cost of the Reports tab: four independent queries vs attached_assets.reports
+
+Usage (from the repository root):
+
+    python -m benchmarks.reports --scales 10000 100000 1000000
+
+"before" runs get_expired_items, get_near_expiry_items, get_low_stock_items
+and get_monthly_transactions as render_reports used to. "serial" and
+"parallel" build every section with build_reports(); "cached" is a
+get_reports() call at an unchanged data version, i.e. a tab rerun.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from attached_assets.database import Database
+from attached_assets.reports import build_reports, get_reports
+from benchmarks.synthetic import cached_inventory
+
+BEFORE_QUERIES = ("get_expired_items", "get_near_expiry_items", "get_low_stock_items", "get_monthly_transactions")
+
+
+def _before(db):
+    for name in BEFORE_QUERIES:
+        getattr(db, name)()
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run_scale(n_transactions, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "inventory.db")
+        shutil.copy2(cached_inventory(n_transactions), db_path)
+        db = Database(db_path)
+        try:
+            get_reports(db)
+            return {
+                "before": _time(lambda: _before(db), repeat),
+                "serial": _time(lambda: build_reports(db), repeat),
+                "parallel": _time(lambda: build_reports(db, parallel=True), repeat),
+                "cached": _time(lambda: get_reports(db), repeat),
+            }
+        finally:
+            db.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'transactions':>12}{'before ms':>12}{'serial ms':>12}{'parallel ms':>13}{'cached ms':>12}")
+    for n in args.scales:
+        result = run_scale(n, args.repeat)
+        print(f"{n:>12,}" + "".join(f"{result[name] * 1000:>{width}.1f}" for name, width in
+                                    (("before", 12), ("serial", 12), ("parallel", 13), ("cached", 12))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Build synthetic inventory databases for benchmarking
+
+Usage (from the repository root):
+
+    python -m benchmarks.synthetic out.db --transactions 100000 --items 2000 --in-ratio 0.3
+"""
+import argparse
+import os
+import random
+import sqlite3
+from datetime import date, timedelta
+
+from attached_assets.database import Database
+
+CATEGORIES = ["Enzymes", "Buffers", "Primers", "Kits", "Consumables", "Antibodies"]
+DESTINATIONS = ["Lab A", "Lab B", "QC", "Sequencing", "PCR Room", "Cell Culture"]
+SOURCES = ["HO", "Vendor", "Central Store"]
+EXPIRY_DISTRIBUTIONS = ("uniform", "normal", "short")
+
+
+def _shelf_life(rng, distribution, shelf_life):
+    """Days between receipt and expiry for a new lot"""
+    low, high = shelf_life
+    if distribution == "normal":
+        days = rng.gauss((low + high) / 2, (high - low) / 6)
+    elif distribution == "short":
+        # Most lots expire soon after receipt, a few last much longer
+        days = low + rng.expovariate(4 / (high - low))
+    else:
+        days = rng.uniform(low, high)
+    return int(min(high, max(low, days)))
+
+
+def build_inventory(db_path, n_transactions, n_items=None, in_ratio=0.3, max_lots_per_item=20,
+                    shelf_life=(90, 720), expiry_distribution="uniform", history_days=3 * 365,
+                    seed=42):
+    """Create a database at db_path filled with n_transactions random movements
+
+    n_items defaults to one item per 50 transactions. in_ratio is the share of
+    movements that receive a new lot (the rest issue from existing lots and never
+    overdraw them). max_lots_per_item caps how many lots an item receives while
+    it still has stock. Expiry dates are drawn from expiry_distribution over
+    shelf_life days.
+    """
+    if expiry_distribution not in EXPIRY_DISTRIBUTIONS:
+        raise ValueError(f"expiry_distribution must be one of {EXPIRY_DISTRIBUTIONS}")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    # Let Database create the schema so it always matches the application
+    db = Database(db_path)
+    db.conn.close()
+
+    rng = random.Random(seed)
+    n_items = n_items or max(10, min(5000, n_transactions // 50))
+    start = date.today() - timedelta(days=history_days)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executemany(
+        "INSERT INTO items (id, name, category, minimum_stock) VALUES (?, ?, ?, ?)",
+        [(i, f"Reagent {i:06d}", rng.choice(CATEGORIES), rng.choice([5, 10, 20, 50]))
+         for i in range(1, n_items + 1)]
+    )
+
+    # Every item keeps its lots as [batch, expiry, balance] so OUT rows draw from real stock
+    lots = {}
+    received = {}
+    rows = []
+    for n in range(n_transactions):
+        item_id = rng.randint(1, n_items)
+        day = start + timedelta(days=n * history_days // n_transactions)
+        item_lots = lots.setdefault(item_id, [])
+        stocked = [lot for lot in item_lots if lot[2] > 0]
+        can_receive = received.get(item_id, 0) < max_lots_per_item
+
+        if not stocked or (can_receive and rng.random() < in_ratio):
+            received[item_id] = received.get(item_id, 0) + 1
+            batch = f"B{item_id:06d}-{received[item_id]:03d}"
+            expiry = day + timedelta(days=_shelf_life(rng, expiry_distribution, shelf_life))
+            quantity = rng.randint(50, 200)
+            item_lots.append([batch, expiry, quantity])
+            rows.append((item_id, "IN", quantity, day, rng.choice(SOURCES), expiry, batch))
+        else:
+            lot = rng.choice(stocked)
+            quantity = min(lot[2], rng.randint(1, 10))
+            lot[2] -= quantity
+            rows.append((item_id, "OUT", quantity, day, rng.choice(DESTINATIONS), lot[1], lot[0]))
+
+        if len(rows) >= 50000:
+            _insert_transactions(conn, rows)
+            rows = []
+
+    _insert_transactions(conn, rows)
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def _insert_transactions(conn, rows):
+    conn.executemany("""
+    INSERT INTO transactions
+    (item_id, transaction_type, quantity, date, source_destination, expiry_date, batch_number, notes, created_by)
+    VALUES (?, ?, ?, ?, ?, ?, ?, '', 'admin')
+    """, [(r[0], r[1], r[2], r[3].isoformat(), r[4], r[5].isoformat(), r[6]) for r in rows])
+
+
+def cached_inventory(n_transactions, data_dir=None):
+    """Return the path of a synthetic database, building it on first use"""
+    data_dir = data_dir or os.path.join(os.path.dirname(__file__), ".data")
+    os.makedirs(data_dir, exist_ok=True)
+    db_path = os.path.join(data_dir, f"inventory_{n_transactions}.db")
+    if not os.path.exists(db_path):
+        print(f"Building synthetic database with {n_transactions:,} transactions...")
+        build_inventory(db_path, n_transactions)
+    return db_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db_path", help="database file to create (overwritten if it exists)")
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--items", type=int, help="catalogue size (default: transactions / 50)")
+    parser.add_argument("--in-ratio", type=float, default=0.3, help="share of IN movements")
+    parser.add_argument("--max-lots", type=int, default=20, help="maximum lots received per item")
+    parser.add_argument("--shelf-life", type=int, nargs=2, default=[90, 720], metavar=("MIN", "MAX"),
+                        help="shelf life range in days")
+    parser.add_argument("--expiry-distribution", choices=EXPIRY_DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--history-days", type=int, default=3 * 365)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    build_inventory(
+        args.db_path, args.transactions, n_items=args.items, in_ratio=args.in_ratio,
+        max_lots_per_item=args.max_lots, shelf_life=tuple(args.shelf_life),
+        expiry_distribution=args.expiry_distribution, history_days=args.history_days,
+        seed=args.seed
+    )
+    print(f"Wrote {args.transactions:,} transactions to {args.db_path}")
+
+
+if __name__ == "__main__":
+    main()
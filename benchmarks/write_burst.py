@@ -0,0 +1,125 @@
+"""Concurrent write throughput: group-commit writer vs. one commit per call
+
+Usage (from the repository root):
+
+    python -m benchmarks.write_burst --writers 1 4 16 --writes 200
+
+A second table has the same threads racing to issue from one lot holding
+half the requested units, and checks that the lot is never overdrawn.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from attached_assets.database import Database
+from attached_assets.records import ISSUED
+
+
+def _direct_add_stock(db_path, item_id, n, errors):
+    """The previous write path: a private connection committing every insert"""
+    conn = sqlite3.connect(db_path)
+    expiry = date.today() + timedelta(days=365)
+    for i in range(n):
+        try:
+            conn.execute("""
+            INSERT INTO transactions
+            (item_id, transaction_type, quantity, date, source_destination, expiry_date, batch_number, notes, created_by)
+            VALUES (?, 'IN', 1, ?, 'Benchmark', ?, ?, '', 'admin')
+            """, (item_id, date.today(), expiry, f"DIRECT-{i}"))
+            conn.commit()
+        except sqlite3.OperationalError:
+            conn.rollback()
+            errors.append(1)
+    conn.close()
+
+
+def _queued_add_stock(db_path, item_id, n, errors):
+    """The current write path through Database and its shared writer"""
+    db = Database(db_path)
+    expiry = date.today() + timedelta(days=365)
+    for i in range(n):
+        if not db.add_stock(item_id, 1, expiry, "Benchmark", f"QUEUED-{i}"):
+            errors.append(1)
+
+
+def run(mode, n_writers, n_writes):
+    """Writes per second with n_writers threads each making n_writes writes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "inventory.db")
+        db = Database(db_path)
+        db.add_item("Benchmark Reagent")
+        item_id = db.get_item_by_name("Benchmark Reagent").id
+
+        target = _queued_add_stock if mode == "queued" else _direct_add_stock
+        errors = []
+        threads = [
+            threading.Thread(target=target, args=(db_path, item_id, n_writes, errors))
+            for _ in range(n_writers)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        db.conn.close()
+    return (n_writers * n_writes - len(errors)) / elapsed, len(errors)
+
+
+def run_issue_race(n_writers, n_writes):
+    """Issues per second and final lot balance when n_writers threads drain one lot"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "inventory.db")
+        db = Database(db_path)
+        db.add_item("Benchmark Reagent")
+        item_id = db.get_item_by_name("Benchmark Reagent").id
+        expiry = date.today() + timedelta(days=365)
+        stock = n_writers * n_writes // 2
+        db.add_stock(item_id, stock, expiry, "Benchmark", "RACE")
+
+        outcomes = []
+
+        def issue():
+            issuer = Database(db_path)
+            for _ in range(n_writes):
+                outcomes.append(issuer.remove_stock(item_id, 1, "Benchmark", expiry, "RACE").status)
+
+        threads = [threading.Thread(target=issue) for _ in range(n_writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        balance = db.get_available_stock(item_id, expiry)
+        issued = outcomes.count(ISSUED)
+        db.conn.close()
+    return len(outcomes) / elapsed, issued, stock, balance
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--writes", type=int, default=200, help="writes per writer thread")
+    args = parser.parse_args(argv)
+
+    print(f"{'writers':>8}{'direct/s':>12}{'errors':>8}{'queued/s':>12}{'errors':>8}")
+    for n in args.writers:
+        direct, direct_errors = run("direct", n, args.writes)
+        queued, queued_errors = run("queued", n, args.writes)
+        print(f"{n:>8}{direct:>12.0f}{direct_errors:>8}{queued:>12.0f}{queued_errors:>8}")
+
+    print()
+    print(f"{'writers':>8}{'issues/s':>12}{'issued':>8}{'stock':>8}{'left':>8}")
+    for n in args.writers:
+        rate, issued, stock, left = run_issue_race(n, args.writes)
+        flag = "" if issued == stock and left == 0 else "  OVERDRAWN" if issued > stock else "  SHORT"
+        print(f"{n:>8}{rate:>12.0f}{issued:>8}{stock:>8}{left:>8}{flag}")
+
+
+if __name__ == "__main__":
+    main()
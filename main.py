@@ -11,11 +11,19 @@ from attached_assets.components import (
     render_stock_in,
     render_stock_out,
     render_search_filter,
-    render_reports
+    render_reports,
+    render_reorder_planning,
+    render_archive_settings,
+    render_job_status,
+    render_maintenance,
+    render_query_diagnostics,
+    render_export_panel
 )
 from attached_assets.auth import check_password
 from attached_assets.backup import BackupManager
-from attached_assets.export import export_data
+from attached_assets.database import default_db_path
+from attached_assets.scheduler import Scheduler
+from attached_assets.jobs import register_default_jobs
 
 # Set page configuration
 st.set_page_config(
@@ -37,6 +45,19 @@ if 'reset_stock_in_form' not in st.session_state:
 if 'reset_stock_out_form' not in st.session_state:
     st.session_state.reset_stock_out_form = False
 
+@st.cache_resource
+def get_scheduler(db_path):
+    """Start the background job scheduler once per process and database"""
+    scheduler = Scheduler()
+    register_default_jobs(scheduler, db_path)
+    scheduler.start()
+    return scheduler
+
+# Background jobs can be disabled, e.g. for benchmarks
+scheduler = None
+if os.environ.get("INVENTORY_SCHEDULER", "on") != "off":
+    scheduler = get_scheduler(default_db_path())
+
 # Authentication check
 if not check_password():
     st.stop()
@@ -62,10 +83,13 @@ st.markdown(
 
 # Sidebar
 with st.sidebar:
-    st.subheader("User: admin")
+    username = st.session_state.get("username")
+    st.subheader(f"User: {username or 'unknown'}")
     
     if st.button("📤 Logout", key="logout"):
         st.session_state.authenticated = False
+        st.session_state.pop("username", None)
+        st.session_state.pop("role", None)
         st.rerun()
     
     st.divider()
@@ -73,25 +97,8 @@ with st.sidebar:
     # Settings and Export section
     st.subheader("⚙️ Settings & Export")
     
-    # Export current stock
-    if st.button("Export Current Stock", key="export_stock"):
-        excel_data, filename = export_data(db, "stock")
-        st.download_button(
-            label="📥 Download Excel File",
-            data=excel_data,
-            file_name=filename,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-    
-    # Export transactions
-    if st.button("Export Transactions", key="export_transactions"):
-        excel_data, filename = export_data(db, "transactions")
-        st.download_button(
-            label="📥 Download Excel File",
-            data=excel_data,
-            file_name=filename,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    # Exports are built in the background and cached until the data changes
+    render_export_panel(db)
     
     st.divider()
     
@@ -140,39 +147,45 @@ with st.sidebar:
                 elif len(new_password) < 6:
                     st.error("Password must be at least 6 characters!")
                 else:
-                    if db.change_password("admin", current_password, new_password):
+                    if db.change_password(username, current_password, new_password):
                         st.success("Password changed successfully!")
                     else:
                         st.error("Current password is incorrect!")
 
-# Main content with tabs
-tabs = st.tabs([
-    "Current Stock 📦", 
-    "Stock In 📥", 
-    "Stock Out 📤", 
-    "Search & Filter 🔍", 
-    "Reports 📊"
-])
-
-# Current Stock Tab
-with tabs[0]:
-    render_balance_stock(db)
-
-# Stock In Tab
-with tabs[1]:
-    render_stock_in(db)
-
-# Stock Out Tab 
-with tabs[2]:
-    render_stock_out(db)
-
-# Search & Filter Tab
-with tabs[3]:
-    render_search_filter(db)
-
-# Reports Tab
-with tabs[4]:
-    render_reports(db)
+    # Administration is shown only for a role stored at login, never assumed from a missing username
+    if st.session_state.get("role") == "admin":
+        with st.expander("🗄️ Archive Old Transactions"):
+            render_archive_settings(db)
+
+        if scheduler:
+            with st.expander("⏱️ Background Jobs"):
+                render_job_status(scheduler)
+
+        with st.expander("🧰 Database Maintenance"):
+            render_maintenance(db)
+
+        with st.expander("🩺 Query Diagnostics"):
+            render_query_diagnostics()
+
+# Main content: only the selected view runs on each rerun
+VIEWS = {
+    "Current Stock 📦": render_balance_stock,
+    "Stock In 📥": render_stock_in,
+    "Stock Out 📤": render_stock_out,
+    "Search & Filter 🔍": render_search_filter,
+    "Reports 📊": render_reports,
+    "Reorder Planning 🛒": render_reorder_planning,
+}
+
+active_view = st.radio(
+    "View",
+    list(VIEWS),
+    horizontal=True,
+    key="active_view",
+    label_visibility="collapsed"
+)
+
+VIEWS[active_view](db)
 
 # Footer
 st.markdown(
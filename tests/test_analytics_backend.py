@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from attached_assets.analytics_backend import ANALYTICS_QUERIES, SQLiteAnalytics
+from attached_assets.backup import BackupManager
+from attached_assets.database import Database
+
+
+def _assert_engines_agree(duckdb_backend, db):
+    for name in ANALYTICS_QUERIES:
+        pd.testing.assert_frame_equal(
+            duckdb_backend.query(db, name), SQLiteAnalytics().query(db, name), check_dtype=False
+        )
+
+
+def test_duckdb_matches_sqlite_after_restore(tmp_path):
+    pytest.importorskip("duckdb")
+    from attached_assets.analytics_backend import DuckDBAnalytics
+
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_item("Buffer")
+    item_id = db.get_item_by_name("Buffer").id
+    db.add_stock(item_id, 10, "2030-01-01", "Supplier")
+    manager = BackupManager(db.get_db_path(), str(tmp_path / "backups"))
+    backup = manager.create_backup()
+
+    duckdb_backend = DuckDBAnalytics()
+    for _ in range(3):
+        db.add_stock(item_id, 100, "2030-01-01", "Supplier")
+        _assert_engines_agree(duckdb_backend, db)
+    assert duckdb_backend.query(db, "monthly_movement")["stock_in"].sum() == 310
+
+    assert manager.restore_backup(backup)
+    db = Database(db.get_db_path())
+    _assert_engines_agree(duckdb_backend, db)
+    for _ in range(3):
+        db.add_stock(item_id, 5, "2030-01-01", "Supplier")
+        _assert_engines_agree(duckdb_backend, db)
+    assert duckdb_backend.query(db, "monthly_movement")["stock_in"].sum() == 25
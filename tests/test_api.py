@@ -0,0 +1,58 @@
+import json
+import threading
+from http.client import HTTPConnection
+
+import pytest
+
+from attached_assets.api import InventoryServer
+from attached_assets.database import Database
+
+
+@pytest.fixture
+def api(tmp_path):
+    db_path = str(tmp_path / "inventory.db")
+    db = Database(db_path)
+    db.add_item("Buffer")
+    server = InventoryServer(("127.0.0.1", 0), db_path, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    connection = HTTPConnection(*server.server_address)
+
+    def post(path, body):
+        connection.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    yield db, db.get_item_by_name("Buffer").id, post
+    connection.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_movements_for_unknown_items_are_refused(api):
+    db, item_id, post = api
+    status, _ = post("/stock/in", {"item_id": 999, "quantity": 5, "expiry_date": "2030-01-01"})
+    assert status == 404
+
+    status, payload = post("/movements", {"movements": [
+        {"type": "IN", "item_id": item_id, "quantity": 5, "expiry_date": "2030-01-01"},
+        {"type": "IN", "item_id": 999, "quantity": 5, "expiry_date": "2030-01-01"},
+    ]})
+    assert status == 200
+    assert [result["status"] for result in payload["results"]] == ["recorded", "unknown_item"]
+    assert db.conn.execute("SELECT item_id FROM transactions").fetchall() == [(item_id,)]
+
+
+@pytest.mark.parametrize("quantity", [2.7, "abc", 0, -3, True])
+def test_invalid_quantities_are_refused(api, quantity):
+    db, item_id, post = api
+    status, payload = post("/stock/in", {"item_id": item_id, "quantity": quantity, "expiry_date": "2030-01-01"})
+    assert status == 400, payload
+    assert db.conn.execute("SELECT COUNT(*) FROM transactions").fetchone() == (0,)
+
+
+def test_whole_number_quantities_are_accepted(api):
+    db, item_id, post = api
+    status, _ = post("/stock/in", {"item_id": str(item_id), "quantity": 3.0, "expiry_date": "2030-01-01"})
+    assert status == 201
+    assert db.conn.execute("SELECT quantity FROM transactions").fetchall() == [(3,)]
@@ -0,0 +1,81 @@
+import sqlite3
+from datetime import date, timedelta
+
+from attached_assets.database import Database
+
+
+def _backdate(db, days):
+    conn = sqlite3.connect(db.get_db_path())
+    conn.execute("UPDATE transactions SET date = ?", (str(date.today() - timedelta(days=days)),))
+    conn.commit()
+    conn.close()
+
+
+def test_archive_keeps_barcodes(tmp_path):
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_item("Buffer")
+    item_id = db.get_item_by_name("Buffer").id
+    db.add_stock(item_id, 10, "2030-01-01", "Supplier", "B1", barcode="0123456789")
+    db.remove_stock(item_id, 4, "Lab", "2030-01-01", "B1")
+    _backdate(db, 400)
+
+    assert db.archive_transactions(date.today() - timedelta(days=30)) == 2
+    [lot] = db.lookup_lot("0123456789")
+    assert (lot.batch_number, lot.barcode, lot.available_stock) == ("B1", "0123456789", 6)
+
+    # The archived rows keep their barcodes, and so does the opening balance left in the live table
+    history = db.get_all_transactions().sort_values("id")
+    assert list(history["barcode"].fillna("")) == ["0123456789", ""]
+    opening = db.conn.execute("SELECT transaction_type, quantity, barcode FROM main.transactions").fetchall()
+    assert opening == [("OPENING", 6, "0123456789")]
+
+
+def test_archive_created_before_barcodes_is_upgraded(tmp_path):
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_item("Buffer")
+    item_id = db.get_item_by_name("Buffer").id
+    db.add_stock(item_id, 10, "2030-01-01", "Supplier", "B1", barcode="0123456789")
+    _backdate(db, 400)
+    archive_path = str(tmp_path / "inventory_archive.db")
+    old = sqlite3.connect(archive_path)
+    old.execute("""CREATE TABLE transactions (id INTEGER, item_id INTEGER, transaction_type TEXT, quantity INTEGER,
+        date DATE, source_destination TEXT, expiry_date DATE, batch_number TEXT, notes TEXT, created_by TEXT,
+        created_at TIMESTAMP)""")
+    old.execute("INSERT INTO transactions VALUES (0, ?, 'IN', 1, '2001-01-01', 'Old', NULL, 'OLD', NULL, 'admin', NULL)",
+                (item_id,))
+    old.commit()
+    old.close()
+
+    assert db.archive_transactions(date.today() - timedelta(days=30), archive_path) == 1
+    history = db.get_all_transactions().sort_values("id")
+    assert list(history["barcode"].fillna("")) == ["", "0123456789"]
+
+
+def test_archiving_keeps_every_read_the_same(tmp_path):
+    db = Database(str(tmp_path / "inventory.db"))
+    for name in ("Buffer", "Enzyme"):
+        db.add_item(name)
+    rows = []
+    for item_id, lot in ((db.get_item_by_name("Buffer").id, "B1"), (db.get_item_by_name("Enzyme").id, "E1")):
+        for month in range(1, 13):
+            rows.append((item_id, "IN", 10, f"2025-{month:02d}-05", "Supplier", "2030-01-01", lot, None, "import", None))
+            rows.append((item_id, "OUT", 4, f"2025-{month:02d}-20", "Lab", "2030-01-01", lot, None, "import", None))
+    db.import_transactions(rows)
+    db.refresh_snapshots()
+
+    def reads():
+        history = db.search_transactions()
+        return (
+            db.get_current_stock().to_dict("records"),
+            db.get_lots().to_dict("records"),
+            {day: db.get_stock_as_of(day, by_lot=True).to_dict("records")
+             for day in ("2025-03-04", "2025-06-30", "2025-09-15", "2025-12-31")},
+            sorted(zip(history["item_name"], history["transaction_type"], history["quantity"], history["date"])),
+        )
+
+    before = reads()
+    assert db.archive_transactions("2025-07-01") == 24
+    assert reads() == before
+    # A later cutoff moves the next quarter on top of the existing archive
+    assert db.archive_transactions("2025-10-01") == 12
+    assert reads() == before
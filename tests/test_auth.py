@@ -0,0 +1,39 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from attached_assets.database import Database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_PANELS = ("🗄️ Archive Old Transactions", "🧰 Database Maintenance", "🩺 Query Diagnostics")
+
+
+def test_only_the_admin_account_gets_the_admin_role(tmp_path):
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_user("alice", "secret")
+
+    assert db.get_user_role("admin") == "admin"
+    assert db.get_user_role("alice") == "user"
+    assert db.get_user_role("nobody") is None
+
+
+@pytest.mark.parametrize("session, shown", [
+    ({}, False),
+    ({"username": "alice", "role": "user"}, False),
+    ({"username": "admin", "role": "admin"}, True),
+])
+def test_admin_panels_follow_the_stored_role(tmp_path, monkeypatch, session, shown):
+    # The app loads its stylesheet relative to the repository root
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setenv("INVENTORY_DB_PATH", str(tmp_path / "inventory.db"))
+    monkeypatch.setenv("INVENTORY_SCHEDULER", "off")
+    app = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=30)
+    app.session_state["authenticated"] = True
+    for key, value in session.items():
+        app.session_state[key] = value
+    app.run()
+
+    assert not app.exception
+    labels = {expander.label for expander in app.sidebar.expander}
+    assert all((panel in labels) == shown for panel in ADMIN_PANELS)
@@ -0,0 +1,38 @@
+import time
+
+import pandas as pd
+
+from attached_assets.backup import BackupManager
+from attached_assets.database import Database
+from attached_assets.export_jobs import ExportJobRunner
+
+
+def _export_stock(runner, db):
+    job = runner.submit(db, "stock", "csv")
+    while job.running:
+        time.sleep(0.01)
+    assert job.error is None
+    return pd.read_csv(job.path)
+
+
+def test_restore_never_reuses_a_generation(tmp_path):
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_item("Buffer")
+    item_id = db.get_item_by_name("Buffer").id
+    db.add_stock(item_id, 10, "2030-01-01", "Supplier")
+    manager = BackupManager(db.get_db_path(), str(tmp_path / "backups"))
+    backup = manager.create_backup()
+
+    for _ in range(3):
+        db.add_stock(item_id, 100, "2030-01-01", "Supplier")
+    used = db.get_data_version()
+    runner = ExportJobRunner(db.get_db_path(), str(tmp_path / "exports"))
+    assert _export_stock(runner, db)["current_stock"].sum() == 310
+
+    assert manager.restore_backup(backup)
+    db = Database(db.get_db_path())
+    assert db.get_data_version() > used
+    for _ in range(3):
+        db.add_stock(item_id, 5, "2030-01-01", "Supplier")
+    assert db.get_data_version() > used
+    assert _export_stock(runner, db)["current_stock"].sum() == 25
@@ -0,0 +1,78 @@
+import sqlite3
+
+from attached_assets.catalogue import Catalogue
+from attached_assets.records import ItemRecord
+
+
+def _items(*names):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, category TEXT, minimum_stock INTEGER)")
+    conn.executemany("INSERT INTO items (name, minimum_stock) VALUES (?, 20)", [(name,) for name in names])
+    return conn
+
+
+def test_reload_rebuilds_search_index():
+    conn = _items("Alpha buffer", "Alpine", "Alps")
+    catalogue = Catalogue()
+    assert catalogue.search(conn, "al") == ["Alpha buffer", "Alpine", "Alps"]
+
+    catalogue.reload(conn)
+    catalogue.reload(conn)
+    assert catalogue.search(conn, "al") == ["Alpha buffer", "Alpine", "Alps"]
+
+    conn.execute("UPDATE items SET name = 'Beta buffer' WHERE name = 'Alpha buffer'")
+    catalogue.put(ItemRecord(1, "Beta buffer", None, 20))
+    assert catalogue.search(conn, "al") == ["Alpine", "Alps"]
+    assert catalogue.search(conn, "buffer") == ["Beta buffer"]
+
+    catalogue.reload(conn)
+    assert catalogue.search(conn, "al") == ["Alpine", "Alps"]
+    assert catalogue.search(conn, "buffer") == ["Beta buffer"]
+
+
+def test_own_item_writes_do_not_reload_the_catalogue(tmp_path, monkeypatch):
+    from attached_assets.database import Database
+
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_item("Alpine")
+    assert db.search_item_names("al") == ["Alpine"]
+
+    reloads = []
+    original = Catalogue.reload
+    monkeypatch.setattr(Catalogue, "reload", lambda self, conn: reloads.append(1) or original(self, conn))
+    db.add_item("Alps")
+    assert db.search_item_names("al") == ["Alpine", "Alps"]
+    db.update_item(db.get_item_by_name("Alps").id, name="Alpaca")
+    assert db.search_item_names("al") == ["Alpaca", "Alpine"]
+    assert reloads == []
+
+    # A write from another connection still makes the next lookup reload
+    other = sqlite3.connect(db.get_db_path())
+    other.execute("INSERT INTO items (name, minimum_stock) VALUES ('Albumin', 20)")
+    other.commit()
+    assert db.search_item_names("alb") == ["Albumin"]
+    assert reloads == [1]
+
+
+def test_item_writes_update_the_catalogue_in_place(tmp_path):
+    from attached_assets.catalogue import get_catalogue
+    from attached_assets.database import Database
+
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_item("Buffer", "Reagents")
+    assert db.get_item_names() == ["Buffer"]
+    catalogue = get_catalogue(db.get_db_path())
+    catalogue._get_search_index()
+
+    db.add_item("Pipette tips", "Plastics")
+    item_id = db.get_item_by_name("Buffer").id
+    db.update_item(item_id, name="Lysis buffer", minimum_stock=5)
+
+    assert catalogue._loaded
+    keys, trigrams = catalogue._search_index
+    assert [name for _, name in keys] == ["Lysis buffer", "Pipette tips"]
+    assert ("lysis buffer", "Lysis buffer") in trigrams["lys"]
+    assert "buf" in trigrams and ("buffer", "Buffer") not in trigrams["buf"]
+    assert db.get_item(item_id).minimum_stock == 5
+    assert db.get_item_names("Plastics") == ["Pipette tips"]
+    assert catalogue._loaded
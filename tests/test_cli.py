@@ -0,0 +1,46 @@
+from attached_assets import cli
+from attached_assets.database import Database
+
+
+def test_import_rejects_issues_beyond_the_lot_balance(tmp_path, capsys):
+    db_path = str(tmp_path / "inventory.db")
+    db = Database(db_path)
+    db.add_item("Buffer")
+    item_id = db.get_item_by_name("Buffer").id
+    db.add_stock(item_id, 5, "2030-01-01", "Supplier", "B1")
+    source = tmp_path / "movements.csv"
+    source.write_text(
+        "item_name,transaction_type,quantity,date,expiry_date,batch_number\n"
+        "Buffer,OUT,4,2026-01-02,2030-01-01,B1\n"
+        "Buffer,OUT,2,2026-01-03,2030-01-01,B1\n"
+        "Buffer,IN,3,2026-01-04,2030-01-01,B1\n"
+        "Buffer,OUT,4,2026-01-05,2030-01-01,B1\n"
+        "Buffer,OUT,1,2026-01-06,2030-01-01,B2\n"
+    )
+
+    cli.main(["--db", db_path, "import", str(source)])
+
+    assert "exceeds the 1 held in lot 'B1'" in capsys.readouterr().err
+    assert db.get_lot_quantities() == {(item_id, "2030-01-01", "B1"): 0}
+
+
+def test_rebuild_lots_from_transactions_and_opening_balances(tmp_path):
+    db_path = str(tmp_path / "inventory.db")
+    db = Database(db_path)
+    db.add_item("Buffer")
+    item_id = db.get_item_by_name("Buffer").id
+    db.add_stock(item_id, 10, "2030-01-01", "Supplier", "B1", barcode="0123456789")
+    db.remove_stock(item_id, 4, "Lab", "2030-01-01", "B1")
+    db.import_transactions([(item_id, "OPENING", 7, "2026-01-01", None, "2031-01-01", "B0", None, "import", None)])
+    expected = db.get_lot_quantities()
+    db.conn.execute("UPDATE lots SET quantity = 0")
+    db.conn.execute("DELETE FROM lots WHERE batch_number = 'B0'")
+    db.conn.commit()
+
+    assert cli.main(["--db", db_path, "rebuild", "lots"]) == 0
+
+    assert db.get_lot_quantities() == expected == {
+        (item_id, "2030-01-01", "B1"): 6,
+        (item_id, "2031-01-01", "B0"): 7,
+    }
+    assert [lot.barcode for lot in db.lookup_lot("B1")] == ["0123456789"]
@@ -0,0 +1,43 @@
+import os
+from datetime import date
+
+import pyarrow as pa
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from attached_assets import components
+from attached_assets.database import Database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("threshold, arrow", [(1000, False), (3, True)])
+def test_search_view_reads_large_results_as_arrow(tmp_path, monkeypatch, threshold, arrow):
+    db_path = str(tmp_path / "inventory.db")
+    db = Database(db_path)
+    db.add_item("Buffer")
+    item_id = db.get_item_by_name("Buffer").id
+    db.import_transactions([(item_id, "IN", 1, date.today().isoformat(), None, None, f"B{n}", None, "import", None)
+                            for n in range(5)])
+    monkeypatch.setattr(components, "ARROW_VIEW_MIN_ROWS", threshold)
+    searches = []
+    search = Database.search_transactions
+
+    def recording_search(self, *args, **kwargs):
+        searches.append(search(self, *args, **kwargs))
+        return searches[-1]
+
+    monkeypatch.setattr(Database, "search_transactions", recording_search)
+
+    app = AppTest.from_string(
+        "import sys\n"
+        f"sys.path.insert(0, {ROOT!r})\n"
+        "from attached_assets.components import render_search_filter\n"
+        "from attached_assets.database import Database\n"
+        f"render_search_filter(Database({db_path!r}))\n"
+    )
+    app.run()
+
+    assert not app.exception
+    assert isinstance(searches[-1], pa.Table) == arrow
+    assert len(app.dataframe) == 1 and len(app.dataframe[0].value) == 5
@@ -0,0 +1,75 @@
+import sqlite3
+
+from attached_assets import database
+from attached_assets.database import Database
+
+
+def test_read_arrow_reads_mixed_chunks_as_text(tmp_path):
+    db = Database(str(tmp_path / "inventory.db"))
+    db.conn.execute("CREATE TABLE mixed (id INTEGER PRIMARY KEY, value)")
+    db.conn.executemany("INSERT INTO mixed (value) VALUES (?)", [(1,), (2,), (None,), ("3a",), (4.5,), (None,)])
+
+    table = db._read_arrow("mixed", "SELECT value FROM mixed ORDER BY id", batch_size=2)
+    assert table.column("value").to_pylist() == ["1", "2", None, "3a", "4.5", None]
+
+    # Numbers in every chunk keep a numeric type; all-NULL chunks take it from the others
+    table = db._read_arrow("numbers", "SELECT value FROM mixed WHERE id IN (1, 2, 3, 6) ORDER BY id", batch_size=2)
+    assert table.column("value").type == "int64"
+    assert table.column("value").to_pylist() == [1, 2, None, None]
+
+
+class _LockedAfter:
+    """A connection whose execute() fails as if locked once the first calls statements have run"""
+
+    def __init__(self, conn, calls):
+        self.conn = conn
+        self.calls = calls
+
+    def execute(self, *args):
+        if self.calls == 0:
+            raise sqlite3.OperationalError("database is locked")
+        self.calls -= 1
+        return self.conn.execute(*args)
+
+
+def _schema(path):
+    conn = sqlite3.connect(path)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(transactions)")]
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return version, "barcode" in columns, "lots" in tables
+    finally:
+        conn.close()
+
+
+def test_failed_migration_leaves_nothing_behind_and_is_retried(tmp_path, monkeypatch):
+    path = str(tmp_path / "inventory.db")
+    migrations = list(database.MIGRATIONS)
+    add_lots_table = migrations[1]
+    # Fail after ALTER TABLE transactions ADD COLUMN barcode and CREATE TABLE lots
+    monkeypatch.setattr(database, "MIGRATIONS", migrations[:1] + [
+        lambda conn: add_lots_table(_LockedAfter(conn, 2))
+    ] + migrations[2:])
+    Database(path).conn.close()
+    assert _schema(path) == (1, False, False)
+
+    monkeypatch.setattr(database, "MIGRATIONS", migrations)
+    db = Database(path)
+    assert _schema(path) == (len(database.MIGRATIONS), True, True)
+    db.add_item("Buffer")
+    db.add_stock(db.get_item_by_name("Buffer").id, 5, "2030-01-01", "Supplier", "B1")
+    assert db.get_item_lots(db.get_item_by_name("Buffer").id)[0].available_stock == 5
+
+
+def test_count_transactions_matches_the_search_and_stops_at_the_limit(tmp_path):
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_item("Buffer")
+    item_id = db.get_item_by_name("Buffer").id
+    db.import_transactions([(item_id, "IN", 1, f"2026-01-{day:02d}", None, None, None, None, "import", None)
+                            for day in range(1, 21)])
+
+    assert db.count_transactions("2026-01-05", "2026-01-14") == len(db.search_transactions("2026-01-05", "2026-01-14"))
+    assert db.count_transactions("2026-01-05", "2026-01-14") == 10
+    assert db.count_transactions(limit=5) == 5
+    assert db.count_transactions(transaction_type="OUT") == 0
@@ -0,0 +1,42 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from attached_assets.database import Database
+from attached_assets.invalidation import DataWatch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADD_ITEM_ELSEWHERE = """
+import sys
+from attached_assets.database import Database
+Database(sys.argv[1]).add_item("Enzyme")
+"""
+
+
+def test_writes_from_other_processes_invalidate_caches(tmp_path):
+    db_path = str(tmp_path / "inventory.db")
+    db = Database(db_path)
+    db.add_item("Buffer")
+    assert db.get_item_names() == ["Buffer"]
+    version = db.get_data_version()
+
+    subprocess.run([sys.executable, "-c", ADD_ITEM_ELSEWHERE, db_path], check=True, cwd=ROOT)
+
+    assert db.get_data_version() != version
+    assert db.get_item_names() == ["Buffer", "Enzyme"]
+
+
+def test_unchanged_database_is_checked_with_a_pragma_only(tmp_path):
+    db_path = str(tmp_path / "inventory.db")
+    Database(db_path).add_item("Buffer")
+    watch = DataWatch(db_path)
+    first = watch.state()
+    assert [watch.state() for _ in range(5)] == [first] * 5
+    assert (watch.checks, watch.reads) == (6, 1)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO items (name) VALUES ('Enzyme')")
+    conn.commit()
+    assert watch.state()[1] > first[1]
+    assert watch.reads == 2
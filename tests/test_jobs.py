@@ -0,0 +1,30 @@
+import os
+
+from attached_assets.database import Database
+from attached_assets.jobs import backup_job, expiry_scan_job
+from attached_assets import reports
+
+
+def test_backup_job_keeps_the_newest_backups(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = Database(str(tmp_path / "inventory.db"))
+    os.makedirs("backups")
+    old = [f"inventory_backup_2020010{day}_000000.db.zip" for day in range(1, 5)]
+    for name in old + ["uploaded.zip"]:
+        open(os.path.join("backups", name), "w").close()
+
+    assert backup_job(db.get_db_path(), keep=2).endswith("(3 old backup(s) removed)")
+    remaining = sorted(os.listdir("backups"))
+    assert len(remaining) == 3
+    assert old[-1] in remaining and "uploaded.zip" in remaining
+
+
+def test_expiry_scan_job_caches_the_reports(tmp_path, monkeypatch):
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_item("Buffer")
+    db.add_stock(db.get_item_by_name("Buffer").id, 5, "2001-01-01", "Supplier")
+
+    assert expiry_scan_job(db.get_db_path()) == "1 expired, 0 near expiry"
+    # The Reports tab is served from what the job built
+    monkeypatch.setattr(reports, "build_reports", None)
+    assert list(reports.get_reports(db).expired["item_name"]) == ["Buffer"]
@@ -0,0 +1,67 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from attached_assets.database import Database
+
+
+def _recomputed(db):
+    rows = db.conn.execute("""
+    SELECT item_id, expiry_date, batch_number,
+           SUM(CASE WHEN transaction_type IN ('IN', 'OPENING') THEN quantity ELSE -quantity END)
+    FROM transactions
+    GROUP BY item_id, expiry_date, batch_number
+    """).fetchall()
+    return {tuple(row[:3]): row[3] for row in rows}
+
+
+def _lots(db):
+    return {lot: quantity for lot, quantity in db.get_lot_quantities().items() if quantity}
+
+
+def test_triggers_keep_lots_in_step_with_transactions(tmp_path):
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_item("Buffer")
+    item_id = db.get_item_by_name("Buffer").id
+    db.add_stock(item_id, 10, "2030-01-01", "Supplier", "B1", barcode="0123456789")
+    db.add_stock(item_id, 5, "2031-01-01", "Supplier", "B2")
+    db.remove_stock(item_id, 4, "Lab", "2030-01-01", "B1")
+    assert _lots(db) == _recomputed(db) == {(item_id, "2030-01-01", "B1"): 6, (item_id, "2031-01-01", "B2"): 5}
+
+    # Corrections move quantity between lots, change the type or remove the row entirely
+    db.conn.execute("UPDATE transactions SET quantity = 7 WHERE transaction_type = 'IN' AND batch_number = 'B2'")
+    db.conn.execute("UPDATE transactions SET batch_number = 'B3' WHERE transaction_type = 'OUT'")
+    assert _lots(db) == _recomputed(db)
+    db.conn.execute("UPDATE transactions SET transaction_type = 'OUT' WHERE batch_number = 'B2'")
+    db.conn.execute("DELETE FROM transactions WHERE batch_number = 'B3'")
+    db.conn.commit()
+    assert _lots(db) == _recomputed(db) == {(item_id, "2030-01-01", "B1"): 10, (item_id, "2031-01-01", "B2"): -7}
+
+    [lot] = db.lookup_lot("0123456789")
+    assert (lot.batch_number, lot.available_stock) == ("B1", 10)
+    assert [lot.barcode for lot in db.lookup_lot("B1")] == ["0123456789"]
+
+
+
+def _issue_one_at_a_time(db_path, count):
+    db = Database(db_path)
+    item_id = db.get_item_by_name("Buffer").id
+    return sum(bool(db.remove_stock(item_id, 1, "Lab", "2030-01-01", "B1")) for _ in range(count))
+
+
+def test_concurrent_issues_never_overdraw_a_lot(tmp_path):
+    db_path = str(tmp_path / "inventory.db")
+    db = Database(db_path)
+    db.add_item("Buffer")
+    item_id = db.get_item_by_name("Buffer").id
+    db.add_stock(item_id, 30, "2030-01-01", "Supplier", "B1")
+
+    # Threads share this process's writer; the other processes each have their own
+    with ThreadPoolExecutor(4) as threads, \
+            ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as processes:
+        futures = [threads.submit(_issue_one_at_a_time, db_path, 10) for _ in range(4)]
+        futures += [processes.submit(_issue_one_at_a_time, db_path, 10) for _ in range(2)]
+        issued = sum(future.result() for future in futures)
+
+    assert issued == 30
+    assert _lots(db) == {}
+    assert db.conn.execute("SELECT COUNT(*) FROM transactions WHERE transaction_type = 'OUT'").fetchone() == (30,)
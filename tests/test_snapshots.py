@@ -0,0 +1,48 @@
+from attached_assets import cli
+from attached_assets.database import Database
+
+
+def _stock(db, as_of):
+    stock = db.get_stock_as_of(as_of)
+    return dict(zip(stock["name"], stock["stock"]))
+
+
+def _movements(item_id):
+    # IN 10 on the 5th and OUT 3 on the 20th of every month in 2025
+    for month in range(1, 13):
+        yield (item_id, "IN", 10, f"2025-{month:02d}-05", None, "2030-01-01", "B1", None, "import", None)
+        yield (item_id, "OUT", 3, f"2025-{month:02d}-20", None, "2030-01-01", "B1", None, "import", None)
+
+
+def test_stock_as_of_starts_from_snapshots(tmp_path):
+    db = Database(str(tmp_path / "inventory.db"))
+    db.add_item("Buffer")
+    db.import_transactions(list(_movements(db.get_item_by_name("Buffer").id)))
+    replayed = {day: _stock(db, day) for day in ("2025-03-04", "2025-03-05", "2025-06-30", "2025-12-31")}
+
+    assert db.refresh_snapshots() > 12
+    assert {day: _stock(db, day) for day in replayed} == replayed == {
+        "2025-03-04": {"Buffer": 14},
+        "2025-03-05": {"Buffer": 24},
+        "2025-06-30": {"Buffer": 42},
+        "2025-12-31": {"Buffer": 84},
+    }
+
+
+def test_back_dated_import_invalidates_later_snapshots(tmp_path):
+    db_path = str(tmp_path / "inventory.db")
+    db = Database(db_path)
+    db.add_item("Buffer")
+    db.import_transactions(list(_movements(db.get_item_by_name("Buffer").id)))
+    db.refresh_snapshots()
+    source = tmp_path / "late.csv"
+    source.write_text("item_name,transaction_type,quantity,date\nBuffer,IN,100,2025-06-10\n")
+
+    cli.main(["--db", db_path, "import", str(source)])
+
+    # Snapshots before the movement still stand; the later ones were dropped and are replayed
+    assert db.conn.execute("SELECT MAX(snapshot_date) FROM stock_snapshots").fetchone() == ("2025-05-31",)
+    assert _stock(db, "2025-06-09") == {"Buffer": 45}
+    assert _stock(db, "2025-12-31") == {"Buffer": 184}
+    db.refresh_snapshots()
+    assert _stock(db, "2025-12-31") == {"Buffer": 184}
@@ -0,0 +1,40 @@
+import sqlite3
+import threading
+
+import pytest
+
+from attached_assets.writer import GroupCommitWriter
+
+
+def _insert(cursor, value):
+    cursor.execute("INSERT INTO numbers (value) VALUES (?)", (value,))
+    if value < 0:
+        raise ValueError("negative")
+    return cursor.lastrowid
+
+
+def test_queued_writes_share_a_commit_and_fail_alone(tmp_path):
+    db_path = str(tmp_path / "writer.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE numbers (id INTEGER PRIMARY KEY, value INTEGER)")
+    conn.commit()
+    writer = GroupCommitWriter(db_path)
+
+    # Hold the writer in its first transaction while the rest queue up behind it
+    started, release = threading.Event(), threading.Event()
+
+    def block(cursor):
+        started.set()
+        return release.wait(5)
+
+    blocker = writer.submit(block)
+    started.wait(5)
+    futures = [writer.submit(_insert, value) for value in (1, 2, -3, 4, 5)]
+    release.set()
+
+    assert blocker.result()
+    with pytest.raises(ValueError):
+        futures[2].result()
+    assert [future.result() for future in futures[:2] + futures[3:]] == [1, 2, 3, 4]
+    assert writer.requests == 6 and writer.batches == 2
+    assert conn.execute("SELECT value FROM numbers ORDER BY id").fetchall() == [(1,), (2,), (4,), (5,)]